@@ -0,0 +1,262 @@
+from pathlib import Path
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "cleaning"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "dashboard"))
+from aggregates import DIFFUSION_CINEMA, DIFFUSION_STREAMING
+from dataset import POLL_INTERVAL, DatasetWatcher
+from derived import DerivedCache
+from manifest import StaleFileError
+from query import MovieQuery
+from sql_query import movie_query, open_dataset
+
+# ===============================
+# 📁 CONFIGURATION
+# ===============================
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+HOST = "127.0.0.1"
+PORT = 8080
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+MAX_AGE = POLL_INTERVAL     # une nouvelle version peut être servie au plus tard après ce délai
+RETRY_AFTER = 1             # secondes (503 pendant la bascule vers une version déjà écrite dans la base)
+
+# Colonnes renvoyées pour un film
+MOVIE_COLUMNS = [
+    "Movie_id", "Movie_name", "Original_Title", "Release_date", "Release_year", "Genre", "Runtime_minutes",
+    "Director", "Top_Actors", "Overview", "Budget", "Revenue", "Profit", "ROI", "Rating", "Poster_URL", "Source",
+]
+SORTS = ["relevance", "rating"]
+DIFFUSIONS = [DIFFUSION_CINEMA, DIFFUSION_STREAMING]
+
+
+def jsonable(value):
+    """Convertit résultats pandas / numpy en types JSON (valeurs manquantes -> null)."""
+    if isinstance(value, pd.DataFrame):
+        return [jsonable(row) for row in value.to_dict("records")]
+    if isinstance(value, pd.Series):
+        return {str(key): jsonable(v) for key, v in value.items()}
+    if isinstance(value, dict):
+        return {str(key): jsonable(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [jsonable(v) for v in value]
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def bad_request(message):
+    return web.HTTPBadRequest(text=json.dumps({"error": message}, ensure_ascii=False), content_type="application/json")
+
+
+def not_found(message):
+    return web.HTTPNotFound(text=json.dumps({"error": message}, ensure_ascii=False), content_type="application/json")
+
+
+def _int_param(params, name, default, minimum=1, maximum=None):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise bad_request(f"{name} doit être un entier")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise bad_request(f"{name} hors limites ({minimum}..{maximum or '∞'})")
+    return value
+
+
+def _filters(params) -> dict:
+    """Filtres de la requête HTTP (mêmes clés que query.FILTER_KEYS)."""
+    diffusion = params.get("diffusion") or None
+    if diffusion is not None and diffusion not in DIFFUSIONS:
+        raise bad_request(f"diffusion : {' ou '.join(DIFFUSIONS)}")
+    return {
+        "query": params.get("q", ""),
+        "genre": params.get("genre") or None,
+        "source": params.get("source") or None,
+        "decade": params.get("decade") or None,
+        "diffusion": diffusion,
+    }
+
+# ===============================
+# 🔎 REQUÊTES
+# ===============================
+# Chaque fonction reçoit le MovieQuery de la version servie, les paramètres
+# de l'URL et ceux du chemin, et retourne le contenu JSON (dict) de la réponse.
+def get_options(movies: MovieQuery, params, match):
+    return {"options": movies.options(params.get("q", ""))}
+
+
+def get_movies(movies: MovieQuery, params, match):
+    sort = params.get("sort", "relevance")
+    if sort not in SORTS:
+        raise bad_request(f"sort : {' ou '.join(SORTS)}")
+    page = _int_param(params, "page", 1)
+    page_size = _int_param(params, "page_size", PAGE_SIZE, maximum=MAX_PAGE_SIZE)
+    positions = movies.positions(_filters(params))
+    start, stop = (page - 1) * page_size, min(page * page_size, len(positions))
+    # Pertinence (recherche) ou ordre du fichier ; par note : tri partiel jusqu'à la page demandée
+    selected = movies.top_rated(positions, stop)[start:] if sort == "rating" else positions[start:stop]
+    columns = [col for col in MOVIE_COLUMNS if col in movies.columns]
+    return {
+        "total": len(positions),
+        "page": page,
+        "page_size": page_size,
+        "movies": movies.movies(selected, columns),
+    }
+
+
+def get_summary(movies: MovieQuery, params, match):
+    view = movies.view(_filters(params))
+    return {key: value for key, value in view.items() if key != "positions"}
+
+
+def get_movie(movies: MovieQuery, params, match):
+    position = _movie_position(movies, match)
+    columns = [col for col in MOVIE_COLUMNS if col in movies.columns]
+    return {"movie": movies.movies(position, columns)}
+
+
+def get_recommendations(movies: MovieQuery, params, match):
+    movie_id = _movie_id(movies, match)
+    n = _int_param(params, "n", 5, maximum=50)
+    by_rating = params.get("by_rating", "false").lower() in ("1", "true", "yes")
+    return {"movie_id": movie_id, "recommendations": movies.recommend(movie_id, n, by_rating=by_rating)}
+
+
+def _movie_id(movies, match):
+    try:
+        movie_id = int(match["movie_id"])
+    except ValueError:
+        raise bad_request("movie_id doit être un entier")
+    if movies.position(movie_id) is None:
+        raise not_found(f"film {movie_id} inconnu")
+    return movie_id
+
+
+def _movie_position(movies, match):
+    return movies.position(_movie_id(movies, match))
+
+# ===============================
+# 🌐 SERVICE HTTP
+# ===============================
+class QueryService:
+    """Versions chargées du jeu de données et cache partagé des résultats et des réponses.
+
+    Comme le dashboard, le service suit le manifeste (cf. dataset.DatasetWatcher) :
+    une nouvelle version est chargée en arrière-plan avant d'être servie.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, cache=None):
+        self.cache = cache if cache is not None else DerivedCache()
+        self.datasets = {}
+        self.lock = threading.Lock()
+        self.watcher = DatasetWatcher(data_dir, warm=self._warm, retire=self._retire)
+
+    def dataset(self, version):
+        """query.Dataset ou sql_query.SqlDataset de la version (cf. sql_query.open_dataset)."""
+        with self.lock:
+            if version not in self.datasets:
+                self.datasets[version] = open_dataset(version, lambda role: self.watcher.path(version, role),
+                                                      self.watcher.manifest(version))
+            return self.datasets[version]
+
+    def _warm(self, version):
+        self.dataset(version).warm()
+
+    def _retire(self, version):
+        with self.lock:
+            self.datasets.pop(version, None)
+        self.cache.drop_version(version)
+
+    def movies(self) -> MovieQuery:
+        return movie_query(self.dataset(self.watcher.version()), self.cache)
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get("If-None-Match", "")
+    return header.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def endpoint(service: QueryService, handler):
+    """Handler aiohttp : réponse JSON mise en cache par (version, URL), avec ETag et 304."""
+    async def handle(request):
+        movies = service.movies()
+        version = movies.dataset.version
+        signature = (request.path, tuple(sorted(request.query.items())))
+
+        def render():
+            payload = {"version": version, **jsonable(handler(movies, request.query, request.match_info))}
+            body = json.dumps(payload, ensure_ascii=False, allow_nan=False).encode("utf-8")
+            return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+        # Réponse déjà en cache : servie sans passer par le pool de threads
+        cached = service.cache.peek(version, "response", signature)
+        if cached is None:
+            loop = asyncio.get_running_loop()
+            try:
+                cached = await loop.run_in_executor(None, service.cache.get, version, "response", signature, render)
+            except StaleFileError:
+                # Base SQLite déjà passée à la version suivante : le client réessaie après la bascule
+                service.watcher.refresh()
+                return web.json_response({"error": "données en cours de mise à jour"}, status=503,
+                                         headers={"Retry-After": str(RETRY_AFTER)})
+        body, etag = cached
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={MAX_AGE}", "X-Dataset-Version": version}
+        if _etag_matches(request, etag):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/json", charset="utf-8", headers=headers)
+    return handle
+
+
+def make_app(service: QueryService) -> web.Application:
+    async def health(request):
+        return web.json_response({"status": "ok", "version": service.watcher.version()})
+
+    async def version(request):
+        return web.json_response(service.watcher.manifest(service.watcher.version()))
+
+    async def cache_stats(request):
+        return web.json_response(jsonable(service.cache.stats()))
+
+    async def warm(app):
+        # Première version chargée avant d'accepter des requêtes
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, service._warm, service.watcher.version())
+
+    app = web.Application()
+    app.on_startup.append(warm)
+    app.add_routes([
+        web.get("/health", health),
+        web.get("/version", version),
+        web.get("/cache", cache_stats),
+        web.get("/options", endpoint(service, get_options)),
+        web.get("/movies", endpoint(service, get_movies)),
+        web.get("/summary", endpoint(service, get_summary)),
+        web.get("/movies/{movie_id}", endpoint(service, get_movie)),
+        web.get("/movies/{movie_id}/recommendations", endpoint(service, get_recommendations)),
+    ])
+    return app
+
+# ===============================
+# 🚀 LANCEMENT
+# ===============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP JSON sur les films nettoyés.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="dossier du manifeste et des fichiers nettoyés")
+    args = parser.parse_args(argv)
+
+    web.run_app(make_app(QueryService(args.data)), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+from pathlib import Path
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scraper"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "cleaning"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "dashboard"))
+from aggregates import DIFFUSION_CINEMA, DIFFUSION_STREAMING, build_cube, build_people_cube, write_cube_files
+from clean_movie import add_movie_ids, build_bridge_tables, clean_movie_data, write_bridge_tables, write_parquet
+from derived import DerivedCache
+from extractors import DEFAULT_EXTRACTOR, parse_detail, saved_pages
+from filters import FilterIndex
+from query import Dataset, MovieQuery, read_movies
+from recommender import SimilarityIndex
+from search import SearchIndex
+from synthetic import FIRST_NAMES, LAST_NAMES, TITLE_WORDS, detail_pages, synthetic_movies
+
+# ===============================
+# 📁 CONFIGURATION
+# ===============================
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+ROWS = 10_000
+PAGES = 500         # pages détail synthétiques (sans --pages)
+QUERIES = 200       # requêtes par étape de requête (filtres, recherche, recommandation)
+REPEAT = 3          # passages des étapes de traitement par lots
+TOLERANCE = 0.5     # écart toléré par rapport à la baseline avant de signaler une régression
+
+STAGES = [
+    "parse", "clean", "write", "load", "bridges", "cubes",
+    "filter_index", "search_index", "similarity_index", "view", "search", "recommend",
+]
+
+# ===============================
+# ⏱️ MESURE
+# ===============================
+def measure(ops, count, unit, repeat=1, memory=True) -> dict:
+    """Exécute `ops` (liste de fonctions sans argument) `repeat` fois.
+
+    `count` unités (lignes, pages, requêtes) sont traitées par passage.
+    Chaque opération donne une latence. Le pic mémoire (allocations Python
+    et numpy, via tracemalloc) est relevé sur un passage préalable, qui sert
+    aussi de mise en route et ne compte pas dans les temps.
+    """
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        for op in ops:
+            op()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies = []
+    for _ in range(repeat):
+        for op in ops:
+            start = time.perf_counter()
+            op()
+            latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+    result = {
+        "unit": unit,
+        "count": count * repeat,
+        "seconds": round(total, 6),
+        "throughput": round(count * repeat / total, 3) if total else float("inf"),
+        **{f"p{q}_ms": round(float(np.percentile(latencies, q)) * 1000, 4) for q in (50, 95, 99)},
+    }
+    if peak is not None:
+        result["peak_mb"] = round(peak / 2**20, 2)
+    return result
+
+
+def quiet(fn):
+    """`fn` sans ses messages de progression (clean_movie_data écrit sur la sortie standard)."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+# ===============================
+# 🏁 ÉTAPES
+# ===============================
+def run(rows=ROWS, pages=PAGES, pages_dir=None, queries=QUERIES, repeat=REPEAT, stages=STAGES,
+        memory=True, seed=0, log=print) -> dict:
+    """Mesure chaque étape de `stages` sur un catalogue synthétique de `rows` films."""
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    def stage(name, ops, count, unit, times=1):
+        if name in stages:
+            results[name] = measure(ops, count, unit, repeat=times, memory=memory)
+            log(format_row(name, results[name]))
+
+    raw = synthetic_movies(rows, seed=seed)
+
+    # --- Analyse HTML : pages enregistrées (cache du scraper, dossier .html) ou synthétiques ---
+    if "parse" in stages:
+        corpus = [html for _, html in (saved_pages(pages_dir) if pages_dir else detail_pages(raw.head(pages)))]
+        stage("parse", [lambda html=html: parse_detail(html, DEFAULT_EXTRACTOR) for html in corpus], len(corpus), "pages")
+
+    # --- Nettoyage et écriture ---
+    stage("clean", [quiet(lambda: clean_movie_data(raw))], rows, "lignes", repeat)
+    df_clean = add_movie_ids(quiet(lambda: clean_movie_data(raw))())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        files = {"parquet": tmp / "movies_clean.parquet", "cube": tmp / "movies_cube.parquet",
+                 "people_cube": tmp / "movies_people_cube.parquet",
+                 **{name: tmp / f"movies_{name.lower()}s.parquet" for name in ["Genre", "Actor", "Director"]}}
+        stage("write", [lambda: write_parquet(df_clean, files["parquet"])], len(df_clean), "lignes", repeat)
+        write_parquet(df_clean, files["parquet"])
+        bridges = write_bridge_tables(df_clean, {name: files[name] for name in ["Genre", "Actor", "Director"]})
+        write_cube_files(build_cube(df_clean, bridges["Genre"]), build_people_cube(df_clean, bridges),
+                         files["cube"], files["people_cube"])
+
+        # --- Chargement et index du dashboard ---
+        stage("load", [lambda: read_movies(files["parquet"])], len(df_clean), "lignes", repeat)
+        df = read_movies(files["parquet"])
+        stage("bridges", [lambda: build_bridge_tables(df)], len(df), "lignes", repeat)
+        stage("cubes", [lambda: (build_cube(df, bridges["Genre"]), build_people_cube(df, bridges))], len(df), "lignes", repeat)
+        stage("filter_index", [lambda: FilterIndex(df, bridges["Genre"])], len(df), "lignes", repeat)
+        stage("search_index", [lambda: SearchIndex(df)], len(df), "lignes", repeat)
+        stage("similarity_index", [lambda: SimilarityIndex(df, bridges)], len(df), "lignes", repeat)
+
+        # --- Requêtes, sans cache de résultats (plafond nul : rien n'est gardé) ---
+        dataset = Dataset("bench", lambda role: files.get(role))
+        if {"view", "search", "recommend"} & set(stages):
+            dataset.warm()
+        movies = MovieQuery(dataset, DerivedCache(max_bytes=0))
+
+        if "view" in stages:
+            options = movies.options()
+            pick = lambda values: values[rng.integers(len(values))] if rng.random() < 0.5 else None
+            filters = [{
+                "genre": pick(options["Genre"]),
+                "decade": pick(options.get("Release_decade", [None])),
+                "diffusion": pick([DIFFUSION_CINEMA, DIFFUSION_STREAMING]),
+            } for _ in range(queries)]
+            stage("view", [lambda f=f: movies.view(f) for f in filters], len(filters), "requêtes")
+
+        if "search" in stages:
+            words = TITLE_WORDS + FIRST_NAMES + LAST_NAMES
+            terms = [" ".join(words[i] for i in rng.integers(0, len(words), rng.integers(1, 3))) for _ in range(queries)]
+            # Saisie en cours : une partie des requêtes s'arrête au milieu d'un mot
+            terms = [t[:max(2, len(t) - int(rng.integers(0, 4)))] for t in terms]
+            stage("search", [lambda t=t: movies.search(t) for t in terms], len(terms), "requêtes")
+
+        if "recommend" in stages:
+            ids = df["Movie_id"].to_numpy()[rng.integers(0, len(df), queries)]
+            stage("recommend", [lambda i=i: movies.recommend(i, by_rating=True) for i in ids], len(ids), "requêtes")
+
+    return {
+        "rows": rows,
+        "clean_rows": len(df_clean),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "stages": results,
+    }
+
+# ===============================
+# 📊 RAPPORT ET BASELINE
+# ===============================
+def format_row(name, r):
+    peak = f"{r['peak_mb']:>9.1f} Mo" if "peak_mb" in r else " " * 12
+    return (f"{name:<17} {r['throughput']:>12,.0f} {r['unit']}/s  p50 {r['p50_ms']:>9.2f} ms  "
+            f"p95 {r['p95_ms']:>9.2f} ms  p99 {r['p99_ms']:>9.2f} ms  {peak}")
+
+
+def compare(results, baseline, tolerance=TOLERANCE) -> list:
+    """Étapes plus lentes que la baseline (même taille) : débit plus faible ou p95 plus élevé que toléré."""
+    reference = baseline.get(str(results["rows"]))
+    if reference is None:
+        return []
+    regressions = []
+    for name, current in results["stages"].items():
+        ref = reference["stages"].get(name)
+        if ref is None:
+            continue
+        throughput = current["throughput"] / ref["throughput"] - 1
+        p95 = current["p95_ms"] / ref["p95_ms"] - 1 if ref["p95_ms"] else 0.0
+        if throughput < -tolerance or p95 > tolerance:
+            regressions.append((name, throughput, p95))
+    return regressions
+
+
+def load_baseline(path) -> dict:
+    """Baseline : résultats de référence par nombre de films ({"10000": {...}})."""
+    path = Path(path)
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def save_baseline(results, path):
+    baseline = load_baseline(path)
+    baseline[str(results["rows"])] = results
+    Path(path).write_text(json.dumps(baseline, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+# ===============================
+# 🚀 PIPELINE PRINCIPAL
+# ===============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du scraping, du nettoyage et du dashboard.")
+    parser.add_argument("--rows", type=int, default=ROWS, help="films du catalogue synthétique")
+    parser.add_argument("--pages", type=Path,
+                        help="pages détail à rejouer (dossier .html ou cache du scraper) ; par défaut, pages synthétiques")
+    parser.add_argument("--synthetic-pages", type=int, default=PAGES, help="pages synthétiques (sans --pages)")
+    parser.add_argument("--queries", type=int, default=QUERIES, help="requêtes par étape de requête")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="passages des étapes de traitement par lots")
+    parser.add_argument("--stages", default=",".join(STAGES), help="étapes mesurées, séparées par des virgules")
+    parser.add_argument("--no-memory", action="store_true", help="sans mesure du pic mémoire (plus rapide)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="résultats JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="baseline de référence")
+    parser.add_argument("--save-baseline", action="store_true", help="enregistre ces résultats comme baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="écart toléré (0.25 = 25 %%)")
+    args = parser.parse_args(argv)
+
+    stages = [name.strip() for name in args.stages.split(",") if name.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"étapes inconnues : {', '.join(sorted(unknown))} (disponibles : {', '.join(STAGES)})")
+
+    print("=" * 60)
+    print(f"⏱️  BENCHMARKS ({args.rows:,} films synthétiques)")
+    print("=" * 60)
+    results = run(args.rows, args.synthetic_pages, args.pages, args.queries, args.repeat, stages,
+                  memory=not args.no_memory, seed=args.seed)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\n💾 Baseline enregistrée : {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if str(args.rows) not in baseline:
+        print(f"\nℹ️  Pas de baseline pour {args.rows} films dans {args.baseline}")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for name, throughput, p95 in regressions:
+        print(f"❌ {name} : débit {throughput:+.0%}, p95 {p95:+.0%} par rapport à la baseline")
+    print(f"\n{'❌' if regressions else '✅'} {len(regressions)} régression(s) (tolérance {args.tolerance:.0%})")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+from html import escape
+from pathlib import Path
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scraper"))
+from extractors import COMMON_GENRES
+
+# ===============================
+# 🧪 CATALOGUE SYNTHÉTIQUE
+# ===============================
+# Même schéma que data/raw/all_movies_datas.json (sortie du scraper) :
+# durées "2h 14m", genres et acteurs joints par des virgules, résumés en
+# français ou en anglais, "N/A" et montants à 0 quand TMDb n'a rien.
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+TITLE_WORDS = [
+    "Shadow", "Night", "Love", "Last", "City", "Dream", "Fire", "Lost", "Star", "Blood", "King", "Ocean", "Silent",
+    "Broken", "Secret", "Wild", "Iron", "Summer", "Ghost", "Empire", "Nuit", "Amour", "Ville", "Rêve", "Étoile",
+]
+FIRST_NAMES = [
+    "James", "Maria", "Jean", "Sophie", "David", "Emma", "Léa", "Michael", "Anna", "Pierre", "Olivia", "Hugo",
+    "Chloé", "Daniel", "Zoe", "Ryan", "Camille", "Noah", "Inès", "Lucas", "Sandra", "Ivan", "Mikhail", "Yuki",
+]
+LAST_NAMES = [
+    "Smith", "Martin", "Bernard", "Dubois", "Johnson", "Garcia", "Müller", "Rossi", "Nolan", "Cameron", "Weaver",
+    "Gosling", "Hüller", "Saldaña", "Tanaka", "Kim", "Petrov", "Lefèvre", "Moreau", "Brown", "Wilson", "Lopez",
+]
+OVERVIEW_EN = [
+    "A young detective uncovers a conspiracy that reaches the highest levels of power.",
+    "After the death of her father, a woman returns to the small town she swore never to see again.",
+    "Two strangers meet on a train and discover they share a dangerous secret.",
+    "A team of explorers travels beyond the edge of the known galaxy.",
+    "An aging boxer gets one last chance to prove himself.",
+]
+OVERVIEW_FR = [
+    "Un jeune détective découvre une conspiration qui remonte jusqu'aux plus hautes sphères du pouvoir.",
+    "Après la mort de son père, une femme revient dans la petite ville qu'elle avait juré de ne jamais revoir.",
+    "Deux inconnus se rencontrent dans un train et découvrent qu'ils partagent un secret dangereux.",
+    "Une équipe d'explorateurs voyage au-delà des limites de la galaxie connue.",
+    "Un boxeur vieillissant obtient une dernière chance de faire ses preuves.",
+]
+# Genres tels que normalisés par le scraper, et libellé affiché sur la page
+# détail (français quand extractors.normalize_genres le reconnaît)
+GENRE_LABELS = list(COMMON_GENRES)
+DISPLAYED_GENRES = {
+    genre: next((v for v in reversed(variants) if v.capitalize() in variants), genre)
+    for genre, variants in COMMON_GENRES.items()
+}
+
+
+def _people(rng, n, pool_size):
+    """Noms tirés d'un vivier de `pool_size` personnes, les premiers bien plus fréquents que les autres."""
+    ranks = (pool_size * rng.random(n) ** 3).astype(np.int64)
+    first = np.array(FIRST_NAMES)[ranks % len(FIRST_NAMES)]
+    last = np.array(LAST_NAMES)[(ranks // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    suffix = ranks // (len(FIRST_NAMES) * len(LAST_NAMES))
+    names = pd.Series(first, dtype=object) + " " + pd.Series(last, dtype=object)
+    return names.where(suffix == 0, names + " " + pd.Series(suffix, dtype=str))
+
+
+def _joined(rng, n, parts, low, high, missing=0.0):
+    """Listes de `low` à `high` valeurs prises dans `parts` (n, k), jointes par ", " ; "N/A" si vide."""
+    counts = rng.integers(low, high + 1, n)
+    counts[rng.random(n) < missing] = 0
+    out = pd.Series(parts[:, 0], dtype=object)
+    for k in range(1, high):
+        out = out.where(counts <= k, out + ", " + pd.Series(parts[:, k], dtype=object))
+    return out.where(counts > 0, "N/A")
+
+
+def synthetic_movies(n, seed=0, duplicates=0.01) -> pd.DataFrame:
+    """`n` films bruts au format du scraper ; une fraction `duplicates` reprend un film déjà vu."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n)
+    repeated = rng.random(n) < duplicates
+    ids[repeated] = rng.integers(0, max(n, 1), repeated.sum())
+
+    words = np.array(TITLE_WORDS, dtype=object)
+    titles = (pd.Series(words[ids % len(words)]) + " " + pd.Series(words[(ids // len(words)) % len(words)])
+              + " " + pd.Series(ids, dtype=str))
+    original = titles.where(rng.random(n) > 0.1, titles.str.upper())
+
+    years = rng.integers(1920, 2027, n)
+    dates = (pd.Series(np.array(MONTHS)[rng.integers(0, 12, n)], dtype=object) + " "
+             + pd.Series(rng.integers(1, 29, n), dtype=str) + ", " + pd.Series(years, dtype=str))
+    dates[rng.random(n) < 0.01] = "N/A"
+
+    rating = np.round(rng.normal(65, 12, n).clip(0, 100))
+    rating = pd.Series(rating, dtype=object).where(rng.random(n) > 0.02, "N/A")
+
+    genre_parts = np.array(GENRE_LABELS, dtype=object)[rng.integers(0, len(GENRE_LABELS), (n, 3))]
+    genres = _joined(rng, n, genre_parts, 1, 3, missing=0.02)
+    # Genres distincts et triés, comme après extractors.normalize_genres
+    genres = genres.map(dict((g, ", ".join(sorted(set(g.split(", "))))) for g in genres.unique()))
+
+    minutes = rng.integers(60, 200, n)
+    hours = pd.Series(minutes // 60, dtype=str) + "h"
+    runtime = hours.where(minutes % 60 == 0, hours + " " + pd.Series(minutes % 60, dtype=str) + "m").astype(object)
+    runtime[rng.random(n) < 0.03] = "N/A"
+
+    french = rng.random(n) < 0.4
+    overview = pd.Series(np.where(french, np.array(OVERVIEW_FR, dtype=object)[rng.integers(0, len(OVERVIEW_FR), n)],
+                                  np.array(OVERVIEW_EN, dtype=object)[rng.integers(0, len(OVERVIEW_EN), n)]))
+    overview = overview + " " + titles  # un mot propre à chaque film pour la recherche et le TF-IDF
+    overview[rng.random(n) < 0.02] = "N/A"
+
+    director = _people(rng, n, pool_size=max(50, n // 5))
+    director[rng.random(n) < 0.02] = "N/A"
+    actor_parts = _people(rng, n * 5, pool_size=max(200, n)).to_numpy().reshape(n, 5)
+    actors = _joined(rng, n, actor_parts, 1, 5, missing=0.02)
+
+    known = rng.random(n) < 0.5
+    budget = np.where(known, rng.integers(1, 300, n) * 1_000_000, 0)
+    revenue = np.where(known & (rng.random(n) < 0.9), (budget * rng.lognormal(0.5, 1.0, n)).astype(np.int64), 0)
+    roi = pd.Series(np.round((revenue - budget) / np.where(budget > 0, budget, 1), 2)).where((budget > 0) & (revenue > 0))
+
+    df = pd.DataFrame({
+        "Movie_name": titles,
+        "Original_Title": original,
+        "Release_date": dates,
+        "Rating_Numeric": rating,
+        "Genre": genres,
+        "Run_time": runtime,
+        "Overview": overview,
+        "Director": director,
+        "Top_Actors": actors,
+        "Budget": budget,
+        "Revenue": revenue,
+        "ROI": roi.astype(object).where(roi.notna(), None),
+        "Poster_URL": "https://media.themoviedb.org/t/p/w220_and_h330_face/" + pd.Series(ids, dtype=str) + ".jpg",
+        "Source": "TMDb",
+    })
+    return df
+
+
+def write_ndjson(df: pd.DataFrame, path):
+    """Écrit le catalogue au format NDJSON (une ligne par film), comme les shards du scraper."""
+    df.to_json(path, orient="records", lines=True, force_ascii=False)
+
+# ===============================
+# 📄 PAGES DÉTAIL SYNTHÉTIQUES
+# ===============================
+def detail_page(movie: dict) -> str:
+    """Page détail TMDb minimale portant les champs de `movie` (mêmes balises que le vrai site)."""
+    genres = "" if movie["Genre"] == "N/A" else "".join(
+        f'<a href="/genre/{i}">{escape(DISPLAYED_GENRES[g])}</a>' for i, g in enumerate(movie["Genre"].split(", ")))
+    actors = "" if movie["Top_Actors"] == "N/A" else "".join(
+        f'<li class="card"><a href="#"><img class="profile" alt="{escape(a)}" src="#"></a><p>{escape(a)}</p></li>'
+        for a in movie["Top_Actors"].split(", "))
+    rating = "" if movie["Rating_Numeric"] == "N/A" else \
+        f'<div class="user_score_chart" data-percent="{movie["Rating_Numeric"]}"></div>'
+    return f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>{escape(movie["Movie_name"])}</title></head>
+<body><section class="header poster">
+<h2><a href="#">{escape(movie["Movie_name"])}</a></h2>
+<h2 class="original_title">{escape(movie["Original_Title"])}</h2>
+<div class="consensus">{rating}</div>
+<div class="facts"><span class="genres">{genres}</span><span class="runtime">{escape(movie["Run_time"])}</span></div>
+<div class="header_info"><h3 dir="auto">Synopsis</h3><div class="overview" dir="auto"><p>{escape(movie["Overview"])}</p></div>
+<ol class="people no_image"><li class="profile"><p><a href="#">{escape(movie["Director"])}</a></p><p class="character">Director</p></li></ol>
+</div></section>
+<section class="panel top_billed scroller"><ol class="people scroller">{actors}</ol></section>
+<section class="facts left_column">
+<p><strong><bdi>Statut</bdi></strong> Sorti</p>
+<p><strong><bdi>Budget</bdi></strong> ${movie["Budget"]:,}.00</p>
+<p><strong><bdi>Recette</bdi></strong> ${movie["Revenue"]:,}.00</p>
+</section></body></html>"""
+
+
+def detail_pages(df: pd.DataFrame):
+    """(nom, HTML) des pages détail des films de `df`."""
+    for i, movie in enumerate(df.to_dict("records")):
+        yield f"synthetic-{i}.html", detail_page(movie)
+
+if __name__ == "__main__":
+    # python src/benchmarks/synthetic.py 100000 catalogue.ndjson
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    out = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(f"synthetic_{rows}.ndjson")
+    write_ndjson(synthetic_movies(rows), out)
+    print(json.dumps({"rows": rows, "path": str(out)}))
@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# ===============================
+# 📁 CONFIGURATION DES CHEMINS
+# ===============================
+PROCESSED_DIR = Path(__file__).resolve().parents[2] / "data"
+CUBE_FILE = PROCESSED_DIR / "movies_cube.parquet"
+PEOPLE_CUBE_FILE = PROCESSED_DIR / "movies_people_cube.parquet"
+
+# ===============================
+# 🧊 CUBE D'AGRÉGATS
+# ===============================
+# Le cube contient des sommes et des comptes (additifs) par cellule
+# Genre_filter × Genre × Release_year × Source × Diffusion × Budget_category.
+#  - Genre_filter : genre sélectionné dans le dashboard, ALL = "Tous"
+#  - Genre : genre du film pour les graphiques par genre, ALL = film compté une fois
+# Un film à k genres apparaît dans (1 + k)² cellules ; les métriques d'une
+# sélection sont des sommes de cellules, quel que soit le nombre de films.
+ALL = "*"
+
+DIFFUSION_CINEMA = "Cinéma"
+DIFFUSION_STREAMING = "Streaming"
+
+CUBE_DIMENSIONS = ["Genre_filter", "Genre", "Release_year", "Release_decade", "Source", "Diffusion", "Budget_category"]
+PEOPLE_DIMENSIONS = ["Role", "Name", "Genre_filter", "Release_decade", "Source", "Diffusion"]
+# Mesure -> colonne source ; chacune donne une somme (_sum) et un compte des valeurs connues (_count)
+MEASURES = {"Rating": "Rating", "ROI": "ROI", "Profitable": "Is_profitable", "Profit": "Profit"}
+# Médiane des profits : histogramme logarithmique par cellule (Profit_bins, Profit_bin_counts).
+# Chaque classe couvre ]γ^(i-1), γ^i] : la valeur rendue est à PROFIT_ACCURACY
+# près (en relatif) et une cellule a au plus ~2 × log_γ(profit max) classes,
+# quel que soit son nombre de films. Sous 1 $ en valeur absolue : classe 0.
+PROFIT_ACCURACY = 0.01
+PROFIT_GAMMA = (1 + PROFIT_ACCURACY) / (1 - PROFIT_ACCURACY)
+
+
+def diffusion_column(df: pd.DataFrame) -> np.ndarray:
+    """"Cinéma" si le film a un budget ou des recettes connus, "Streaming" sinon."""
+    cinema = (df["Budget"].notna() | df["Revenue"].notna()).to_numpy()
+    return np.where(cinema, DIFFUSION_CINEMA, DIFFUSION_STREAMING)
+
+
+def _genre_members(df: pd.DataFrame, genres: pd.DataFrame) -> pd.DataFrame:
+    """(Movie_id, genre) pour chaque genre du film, plus (Movie_id, ALL)."""
+    genres = genres[genres["Movie_id"].isin(df["Movie_id"])]
+    return pd.concat([
+        pd.DataFrame({"Movie_id": df["Movie_id"].to_numpy(), "value": ALL}),
+        pd.DataFrame({"Movie_id": genres["Movie_id"].to_numpy(), "value": genres["Genre"].astype(str).to_numpy()}),
+    ], ignore_index=True)
+
+
+def _movie_measures(df: pd.DataFrame) -> pd.DataFrame:
+    movies = pd.DataFrame({
+        "Movie_id": df["Movie_id"].to_numpy(),
+        "Release_year": df["Release_year"].astype("int64").to_numpy(),
+        "Release_decade": df["Release_decade"].astype(str).to_numpy(),
+        "Source": df["Source"].astype(str).to_numpy(),
+        "Diffusion": diffusion_column(df),
+        "Budget_category": df["Budget_category"].astype(str).to_numpy(),
+    })
+    for name, column in MEASURES.items():
+        movies[name] = pd.to_numeric(df[column].astype("Float64"), errors="coerce").astype("float64").to_numpy()
+    return movies
+
+
+def _sum_and_count(rows: pd.DataFrame, keys, measures) -> pd.DataFrame:
+    known = rows[measures].notna().astype("int64").add_suffix("_count")
+    totals = rows[measures].fillna(0).add_suffix("_sum")
+    return pd.concat([rows[keys], totals, known], axis=1).groupby(keys, sort=False, observed=True).sum()
+
+
+def build_cube(df: pd.DataFrame, genres: pd.DataFrame) -> pd.DataFrame:
+    """Cube d'agrégats des films de `df` (cf. CUBE_DIMENSIONS et MEASURES)."""
+    members = _genre_members(df, genres)
+    rows = (
+        members.rename(columns={"value": "Genre_filter"})
+        .merge(members.rename(columns={"value": "Genre"}), on="Movie_id")
+        .merge(_movie_measures(df), on="Movie_id")
+    )
+    cube = _sum_and_count(rows, CUBE_DIMENSIONS, list(MEASURES))
+    cube.insert(0, "Count", rows.groupby(CUBE_DIMENSIONS, sort=False, observed=True).size())
+    return cube.reset_index()
+
+
+def profit_bins(values) -> np.ndarray:
+    """Classe de chaque profit (croissante avec le profit, signe compris)."""
+    values = np.asarray(values, dtype=float)
+    magnitude = np.abs(values)
+    keys = np.ceil(np.log(np.maximum(magnitude, 1)) / np.log(PROFIT_GAMMA)) + 1
+    return (np.sign(values) * np.where(magnitude < 1, 0, keys)).astype(np.int32)
+
+
+def bin_values(bins) -> np.ndarray:
+    """Valeur représentative de chaque classe (à PROFIT_ACCURACY près de tout profit de la classe)."""
+    bins = np.asarray(bins, dtype=np.int64)
+    upper = PROFIT_GAMMA ** (np.abs(bins) - 1.0)
+    return np.where(bins == 0, 0.0, np.sign(bins) * 2 * upper / (PROFIT_GAMMA + 1))
+
+
+def _profit_sketches(cells, bins, counts) -> pd.DataFrame:
+    """Histogramme (classes croissantes, comptes) de chaque cellule, `cells` étant le numéro de cellule de chaque valeur."""
+    if not len(cells):
+        return pd.DataFrame({"Profit_bins": [], "Profit_bin_counts": []}, dtype=object)
+    order = np.lexsort((bins, cells))
+    cells, bins, counts = cells[order], bins[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, (cells[1:] != cells[:-1]) | (bins[1:] != bins[:-1])])
+    cells, bins, counts = cells[starts], bins[starts], np.add.reduceat(counts, starts)
+    bounds = np.flatnonzero(cells[1:] != cells[:-1]) + 1
+    return pd.DataFrame({"Profit_bins": np.split(bins, bounds), "Profit_bin_counts": np.split(counts, bounds)})
+
+
+def build_people_cube(df: pd.DataFrame, bridges: dict) -> pd.DataFrame:
+    """Profit des réalisateurs et acteurs par cellule de PEOPLE_DIMENSIONS.
+
+    Outre somme et compte, chaque cellule garde l'histogramme de ses profits
+    (cf. PROFIT_ACCURACY) : des histogrammes s'additionnent, ce qui donne une
+    médiane approchée sur n'importe quelle combinaison de cellules, pour une
+    taille de cube qui ne suit pas le nombre de films.
+    """
+    movies = _movie_measures(df)[["Movie_id", "Release_decade", "Source", "Diffusion", "Profit"]].dropna(subset=["Profit"])
+    members = _genre_members(df, bridges["Genre"]).rename(columns={"value": "Genre_filter"})
+    people = pd.concat([
+        bridges[role].rename(columns={role: "Name"}).assign(Role=role)[["Movie_id", "Role", "Name"]]
+        for role in ["Director", "Actor"]
+    ], ignore_index=True)
+    people["Name"] = people["Name"].astype(str)
+    rows = people.merge(members, on="Movie_id").merge(movies, on="Movie_id")
+    grouped = rows.groupby(PEOPLE_DIMENSIONS, sort=True)
+    cube = pd.DataFrame({"Profit_sum": grouped["Profit"].sum(), "Profit_count": grouped.size()})
+    sketches = _profit_sketches(grouped.ngroup().to_numpy(), profit_bins(rows["Profit"]),
+                                np.ones(len(rows), dtype=np.int64))
+    return pd.concat([cube.reset_index(), sketches], axis=1)
+
+
+def merge_cubes(parts) -> pd.DataFrame:
+    """Fusionne des cubes partiels (mêmes colonnes) : somme des mesures et des histogrammes."""
+    cube = pd.concat(parts, ignore_index=True)
+    keys = [col for col in cube.columns if col in CUBE_DIMENSIONS + PEOPLE_DIMENSIONS]
+    if "Profit_bins" in cube.columns and not cube.empty:
+        grouped = cube.groupby(keys, sort=True)
+        merged = grouped[["Profit_sum", "Profit_count"]].sum().reset_index()
+        lengths = cube["Profit_bins"].map(len).to_numpy()
+        sketches = _profit_sketches(np.repeat(grouped.ngroup().to_numpy(), lengths),
+                                    np.concatenate(cube["Profit_bins"].to_list()).astype(np.int32),
+                                    np.concatenate(cube["Profit_bin_counts"].to_list()).astype(np.int64))
+        return pd.concat([merged, sketches], axis=1)
+    return cube.groupby(keys, sort=False).sum().reset_index()
+
+
+def write_cubes(df: pd.DataFrame, bridges: dict, cube_path=CUBE_FILE, people_path=PEOPLE_CUBE_FILE):
+    write_cube_files(build_cube(df, bridges["Genre"]), build_people_cube(df, bridges), cube_path, people_path)
+
+
+def write_cube_files(cube, people, cube_path=CUBE_FILE, people_path=PEOPLE_CUBE_FILE):
+    pq.write_table(pa.Table.from_pandas(cube, preserve_index=False), cube_path, compression="zstd")
+    pq.write_table(pa.Table.from_pandas(people, preserve_index=False), people_path, compression="zstd")
+
+# ===============================
+# 🔎 LECTURE DU CUBE
+# ===============================
+def slice_cube(cube: pd.DataFrame, genre=None, **dimensions) -> pd.DataFrame:
+    """Cellules correspondant aux filtres ; None ne filtre pas la dimension."""
+    mask = cube["Genre_filter"] == (ALL if genre is None else genre)
+    for column, value in dimensions.items():
+        if value is not None:
+            mask &= cube[column] == value
+    return cube[mask]
+
+
+def _ratio(totals, name):
+    count = totals[f"{name}_count"]
+    return totals[f"{name}_sum"] / count if count else float("nan")
+
+
+def summary(cells: pd.DataFrame) -> dict:
+    """Métriques principales de la sélection (comptes et moyennes)."""
+    movies = cells[cells["Genre"] == ALL]
+    totals = movies.drop(columns=CUBE_DIMENSIONS).sum()
+    return {
+        "count": int(totals["Count"]),
+        "rating": _ratio(totals, "Rating"),
+        "year_min": movies["Release_year"].min(),
+        "year_max": movies["Release_year"].max(),
+        "roi": _ratio(totals, "ROI"),
+        "profitable_rate": _ratio(totals, "Profitable"),
+        "profit": _ratio(totals, "Profit"),
+    }
+
+
+def mean_by(cells: pd.DataFrame, column, measure="Rating") -> pd.Series:
+    """Moyenne de `measure` par valeur de `column` (Genre : un film compte pour chacun de ses genres)."""
+    cells = cells[cells["Genre"] != ALL] if column == "Genre" else cells[cells["Genre"] == ALL]
+    totals = cells.groupby(column, sort=True)[[f"{measure}_sum", f"{measure}_count"]].sum()
+    totals = totals[totals[f"{measure}_count"] > 0]
+    return (totals[f"{measure}_sum"] / totals[f"{measure}_count"]).rename(measure)
+
+
+def count_by(cells: pd.DataFrame, column) -> pd.Series:
+    return cells[cells["Genre"] == ALL].groupby(column)["Count"].sum().sort_values(ascending=False)
+
+
+def _sketch_median(bins, counts) -> float:
+    """Médiane (comme np.median) de l'histogramme, classes croissantes."""
+    cumulative = np.cumsum(counts)
+    total = cumulative[-1]
+    middle = np.searchsorted(cumulative, [(total - 1) // 2, total // 2], side="right")
+    return float(bin_values(np.asarray(bins)[middle]).mean())
+
+
+def top_people(people_cells: pd.DataFrame, role, n=10) -> pd.DataFrame:
+    """Les `n` personnes au profit moyen le plus élevé : mean, median (à PROFIT_ACCURACY près), count.
+
+    Le classement n'utilise que sommes et comptes ; les histogrammes ne sont
+    fusionnés que pour les `n` retenues.
+    """
+    cells = people_cells[people_cells["Role"] == role]
+    totals = cells.groupby("Name")[["Profit_sum", "Profit_count"]].sum()
+    totals = totals[totals["Profit_count"] > 0]
+    top = (totals["Profit_sum"] / totals["Profit_count"]).sort_values(ascending=False).head(n)
+    binned = cells.loc[cells["Name"].isin(top.index), ["Name", "Profit_bins", "Profit_bin_counts"]]
+    binned = binned.explode(["Profit_bins", "Profit_bin_counts"]).astype({"Profit_bins": np.int64, "Profit_bin_counts": np.int64})
+    binned = binned.groupby(["Name", "Profit_bins"])["Profit_bin_counts"].sum().reset_index()
+    medians = binned.groupby("Name").apply(
+        lambda group: _sketch_median(group["Profit_bins"].to_numpy(), group["Profit_bin_counts"].to_numpy()),
+        include_groups=False) if len(binned) else pd.Series(dtype=float)
+    return pd.DataFrame({
+        role: top.index,
+        "mean": top.to_numpy(),
+        "median": medians.reindex(top.index).to_numpy(dtype=float),
+        "count": totals["Profit_count"].reindex(top.index).astype("int64").to_numpy(),
+    })
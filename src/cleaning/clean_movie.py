@@ -1,7 +1,25 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
+import argparse
+import collections
+import contextlib
+import io
+import itertools
+import json
 import re
+import sys
+
+from aggregates import CUBE_FILE, PEOPLE_CUBE_FILE, build_cube, build_people_cube, merge_cubes, write_cube_files
+from manifest import MANIFEST_FILE, dataset_version, describe_files, file_sha256, staged_outputs, write_manifest
+from recommender import NEIGHBOR_COLUMNS, NEIGHBORS_FILE, write_neighbors
+from store import STORE_FILE, MovieStore, row_hashes, write_store
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "monitoring"))
+import metrics as instrumentation
+from metrics import metrics
 
 # ===============================
 # 📁 CONFIGURATION DES CHEMINS
@@ -12,6 +30,13 @@ PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
 INPUT_FILE = RAW_DIR / "all_movies_datas.json"
 OUTPUT_FILE = PROCESSED_DIR / "movies_clean.csv"
+PARQUET_FILE = PROCESSED_DIR / "movies_clean.parquet"   # lu en priorité par le dashboard
+# Tables de liaison film ↔ genre / acteur / réalisateur (une ligne par couple)
+BRIDGE_FILES = {
+    "Genre": PROCESSED_DIR / "movies_genres.parquet",
+    "Actor": PROCESSED_DIR / "movies_actors.parquet",
+    "Director": PROCESSED_DIR / "movies_directors.parquet",
+}
 
 # ===============================
 # 🧼 FONCTIONS DE NETTOYAGE
@@ -84,10 +109,237 @@ def calculate_profit(row):
         return revenue - budget
     return None
 
+def categorize_budget(budget):
+    if pd.isna(budget):
+        return "Unknown"
+    if budget < 1_000_000:
+        return "Low (<1M)"
+    elif budget < 10_000_000:
+        return "Low-Medium (1-10M)"
+    elif budget < 50_000_000:
+        return "Medium (10-50M)"
+    elif budget < 100_000_000:
+        return "Medium-High (50-100M)"
+    else:
+        return "High (>100M)"
+
+def categorize_rating(rating):
+    if pd.isna(rating):
+        return "Not Rated"
+    if rating >= 8.0:
+        return "Excellent (8+)"
+    elif rating >= 7.0:
+        return "Very Good (7-8)"
+    elif rating >= 6.0:
+        return "Good (6-7)"
+    elif rating >= 5.0:
+        return "Average (5-6)"
+    else:
+        return "Below Average (<5)"
+
+# Mêmes seuils que categorize_budget / categorize_rating, pour np.select
+BUDGET_BINS = [
+    (1_000_000, "Low (<1M)"),
+    (10_000_000, "Low-Medium (1-10M)"),
+    (50_000_000, "Medium (10-50M)"),
+    (100_000_000, "Medium-High (50-100M)"),
+]
+RATING_BINS = [
+    (8.0, "Excellent (8+)"),
+    (7.0, "Very Good (7-8)"),
+    (6.0, "Good (6-7)"),
+    (5.0, "Average (5-6)"),
+]
+
+# ===============================
+# ⚡ VERSIONS VECTORISÉES
+# ===============================
+# Chaque fonction traite une colonne entière et donne le même résultat que
+# `Series.apply` de la fonction ligne par ligne correspondante (dtype compris).
+
+def _like_apply(values, integer=False):
+    """Reproduit le dtype de apply() pour une fonction qui retourne un nombre ou None.
+
+    Tout manquant -> object (None) ; rien de manquant et `integer` -> int64 ; sinon float64.
+    """
+    if len(values) and values.isna().all():
+        return pd.Series([None] * len(values), index=values.index, dtype=object)
+    if integer and values.notna().all():
+        return values.astype("int64")
+    return values.astype("float64")
+
+def clean_text_column(s):
+    is_list = s.map(type) == list if s.dtype == object else None
+    if is_list is not None and is_list.any():
+        s = s.copy()
+        s[is_list] = s[is_list].map(lambda t: ', '.join(str(x).strip() for x in t))
+    missing = s.isna() | s.isin(["N/A", ""])
+    return s.astype(str).str.strip().mask(missing, "N/A")
+
+def extract_year_column(s):
+    year = pd.to_numeric(s.astype(str).str.extract(r'(\d{4})', expand=False), errors='coerce')
+    return _like_apply(year.where(year.between(1888, 2030)), integer=True)
+
+def parse_runtime_column(s):
+    s = s.astype(str)
+    hours = pd.to_numeric(s.str.extract(r'(\d+)h', expand=False), errors='coerce').fillna(0)
+    minutes = pd.to_numeric(s.str.extract(r'(\d+)m', expand=False), errors='coerce').fillna(0)
+    total = hours * 60 + minutes
+    return _like_apply(total.where(total > 0), integer=True)
+
+def clean_genres_column(s):
+    # Peu de combinaisons de genres distinctes : chacune est nettoyée une seule
+    # fois, puis le résultat est redistribué par code (coût ~ valeurs distinctes)
+    codes, uniques = pd.factorize(s)
+    cleaned = np.array([clean_genres(g) for g in uniques] + ["Autre"], dtype=object)
+    return pd.Series(cleaned[codes], index=s.index).astype(str)
+
+def clean_budget_revenue_column(s):
+    values = pd.to_numeric(s, errors='coerce').astype("float64")
+    return _like_apply(values.where(values > 0))
+
+def categorize_budget_column(budget):
+    conditions = [budget.isna()] + [budget < limit for limit, _ in BUDGET_BINS]
+    labels = ["Unknown"] + [label for _, label in BUDGET_BINS]
+    return pd.Series(np.select(conditions, labels, default="High (>100M)"), index=budget.index).astype(str)
+
+def categorize_rating_column(rating):
+    conditions = [rating.isna()] + [rating >= limit for limit, _ in RATING_BINS]
+    labels = ["Not Rated"] + [label for _, label in RATING_BINS]
+    return pd.Series(np.select(conditions, labels, default="Below Average (<5)"), index=rating.index).astype(str)
+
 # ===============================
 # 🧹 NETTOYAGE DES DONNÉES
 # ===============================
+COLUMNS_ORDER = [
+    'Movie_name', 'Original_Title', 'Release_date', 'Release_year', 'Release_decade',
+    'Genre', 'Runtime_minutes', 'Director', 'Top_Actors', 'Actor_count', 'Overview',
+    'Budget', 'Budget_category', 'Revenue', 'Profit', 'ROI', 'Is_profitable',
+    'Rating', 'Rating_category', 'Poster_URL', 'Source'
+]
+# Colonnes par langue du scraper multilingue (Title_en-US, Overview_en-US, Genre_en-US...),
+# nettoyées comme du texte et gardées après COLUMNS_ORDER
+LOCALIZED_COLUMN = re.compile(r"^(Title|Overview|Genre)_[A-Za-z]{2,3}(-[A-Za-z0-9]+)*$")
+
+def localized_columns(df: pd.DataFrame) -> list:
+    return [col for col in df.columns if LOCALIZED_COLUMN.match(str(col))]
+
 def clean_movie_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Nettoie les données brutes colonne par colonne (sans apply ligne par ligne).
+
+    Résultat identique à clean_movie_data_rowwise, vérifiable avec
+    `python src/cleaning/clean_movie.py --check`.
+    """
+    from datetime import datetime
+
+    print(f"🧹 Nettoyage des données... ({len(df)} films)")
+
+    CURRENT_YEAR = datetime.now().year
+
+    # Suppression des doublons
+    initial_count = len(df)
+    df = df.drop_duplicates(subset=["Movie_name", "Source"], keep='first')
+    duplicates_removed = initial_count - len(df)
+    metrics.inc("clean_rows_dropped_total", duplicates_removed, filter="duplicates")
+    if duplicates_removed > 0:
+        print(f"   🗑️  {duplicates_removed} doublons supprimés")
+
+    # Durée de chaque transformation, par colonne produite (si les métriques sont actives)
+    def timer(column):
+        return metrics.timer("clean_column_seconds", column=column)
+
+    # Nettoyage des champs texte
+    with timer('Movie_name'):
+        df['Movie_name'] = clean_text_column(df['Movie_name'])
+    with timer('Original_Title'):
+        if 'Original_Title' in df.columns:
+            df['Original_Title'] = clean_text_column(df['Original_Title'])
+        else:
+            df['Original_Title'] = df['Movie_name']
+
+    # ✅ Nouveau : Nettoyage de Poster_URL
+    with timer('Poster_URL'):
+        if 'Poster_URL' in df.columns:
+            df['Poster_URL'] = clean_text_column(df['Poster_URL'])
+        else:
+            df['Poster_URL'] = "N/A"
+
+    # Extraction de l'année
+    with timer('Release_year'):
+        df['Release_year'] = extract_year_column(df['Release_date'])
+
+    # Filtrage des films futurs
+    before_filter = len(df)
+    df = df[df['Release_year'] <= CURRENT_YEAR].copy()
+    metrics.inc("clean_rows_dropped_total", before_filter - len(df), filter="future_or_no_year")
+
+    # Nettoyage et transformation des autres colonnes
+    with timer('Genre'):
+        df['Genre'] = clean_genres_column(df['Genre'])
+    with timer('Runtime_minutes'):
+        df['Runtime_minutes'] = parse_runtime_column(df['Run_time'])
+    for column in ['Overview', 'Director', 'Top_Actors'] + localized_columns(df):
+        with timer(column):
+            df[column] = clean_text_column(df[column])
+    for column in ['Budget', 'Revenue']:
+        with timer(column):
+            df[column] = clean_budget_revenue_column(df[column])
+    with timer('Rating'):
+        df['Rating'] = pd.to_numeric(df['Rating_Numeric'], errors='coerce')
+
+    # ROI et profit : arithmétique de colonnes (NaN si budget ou revenue manquant)
+    with timer('ROI_Profit'):
+        budget = df['Budget'].astype("float64")
+        revenue = df['Revenue'].astype("float64")
+        profit = revenue - budget
+        df['ROI'] = _like_apply((profit / budget).round(2).where(budget > 0))
+        df['Profit'] = _like_apply(profit)
+        is_profitable = pd.Series(np.where(df['ROI'].isna(), None, df['ROI'] > 0), index=df.index, dtype=object)
+        df['Is_profitable'] = is_profitable.astype(bool) if df['ROI'].notna().all() else is_profitable
+    with timer('Actor_count'):
+        df['Actor_count'] = np.where(df['Top_Actors'] == "N/A", 0, df['Top_Actors'].str.count(',') + 1).astype("int64")
+
+    # Catégories de budget et note
+    with timer('Budget_category'):
+        df['Budget_category'] = categorize_budget_column(df['Budget'])
+    with timer('Rating_category'):
+        df['Rating_category'] = categorize_rating_column(df['Rating'])
+
+    # Décennie de sortie
+    with timer('Release_decade'):
+        # En entier même si Release_year est en float (un film sans année) : "2020s", pas "2020.0s"
+        decade = (df['Release_year'] // 10) * 10
+        df['Release_decade'] = pd.Series(np.where(decade.notna(), decade.astype("Int64").astype(str) + "s", None), index=df.index)
+
+    # Supprimer les films sans note ni année
+    before_filter = len(df)
+    df = df.dropna(subset=['Rating', 'Release_year'])
+    after_filter = len(df)
+    metrics.inc("clean_rows_dropped_total", before_filter - after_filter, filter="no_rating_or_year")
+    if before_filter - after_filter > 0:
+        print(f"   🗑️  {before_filter - after_filter} films supprimés (sans note ou année)")
+
+    # Réorganisation des colonnes
+    available_columns = [col for col in COLUMNS_ORDER if col in df.columns] + localized_columns(df)
+    df = df[available_columns]
+
+    print(f"✅ {len(df)} films valides après nettoyage.")
+    return df
+
+def check_equivalence(df: pd.DataFrame) -> bool:
+    """Compare clean_movie_data à la référence ligne par ligne sur `df`."""
+    expected = clean_movie_data_rowwise(df.copy())
+    result = clean_movie_data(df.copy())
+    try:
+        pd.testing.assert_frame_equal(result, expected)
+    except AssertionError as e:
+        print(f"❌ Résultats différents :\n{e}")
+        return False
+    print("✅ Résultat identique à la version ligne par ligne.")
+    return True
+
+def clean_movie_data_rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    """Implémentation ligne par ligne d'origine, conservée comme référence (cf. check_equivalence)."""
     from datetime import datetime
 
     print(f"🧹 Nettoyage des données... ({len(df)} films)")
@@ -126,6 +378,8 @@ def clean_movie_data(df: pd.DataFrame) -> pd.DataFrame:
     df['Overview'] = df['Overview'].apply(clean_text)
     df['Director'] = df['Director'].apply(clean_text)
     df['Top_Actors'] = df['Top_Actors'].apply(clean_text)
+    for column in localized_columns(df):
+        df[column] = df[column].apply(clean_text)
     df['Budget'] = df['Budget'].apply(clean_budget_revenue)
     df['Revenue'] = df['Revenue'].apply(clean_budget_revenue)
     df['Rating'] = pd.to_numeric(df['Rating_Numeric'], errors='coerce')
@@ -135,38 +389,12 @@ def clean_movie_data(df: pd.DataFrame) -> pd.DataFrame:
     df['Actor_count'] = df['Top_Actors'].apply(lambda x: len(str(x).split(',')) if pd.notna(x) and x != "N/A" else 0)
 
     # Catégories de budget et note
-    def categorize_budget(budget):
-        if pd.isna(budget):
-            return "Unknown"
-        if budget < 1_000_000:
-            return "Low (<1M)"
-        elif budget < 10_000_000:
-            return "Low-Medium (1-10M)"
-        elif budget < 50_000_000:
-            return "Medium (10-50M)"
-        elif budget < 100_000_000:
-            return "Medium-High (50-100M)"
-        else:
-            return "High (>100M)"
     df['Budget_category'] = df['Budget'].apply(categorize_budget)
 
-    def categorize_rating(rating):
-        if pd.isna(rating):
-            return "Not Rated"
-        if rating >= 8.0:
-            return "Excellent (8+)"
-        elif rating >= 7.0:
-            return "Very Good (7-8)"
-        elif rating >= 6.0:
-            return "Good (6-7)"
-        elif rating >= 5.0:
-            return "Average (5-6)"
-        else:
-            return "Below Average (<5)"
     df['Rating_category'] = df['Rating'].apply(categorize_rating)
 
     # Décennie de sortie
-    df['Release_decade'] = df['Release_year'].apply(lambda y: f"{(y // 10) * 10}s" if pd.notna(y) else None)
+    df['Release_decade'] = df['Release_year'].apply(lambda y: f"{int(y // 10) * 10}s" if pd.notna(y) else None)
 
     # Supprimer les films sans note ni année
     before_filter = len(df)
@@ -182,7 +410,7 @@ def clean_movie_data(df: pd.DataFrame) -> pd.DataFrame:
         'Budget', 'Budget_category', 'Revenue', 'Profit', 'ROI', 'Is_profitable',
         'Rating', 'Rating_category', 'Poster_URL', 'Source'  
     ]
-    available_columns = [col for col in columns_order if col in df.columns]
+    available_columns = [col for col in columns_order if col in df.columns] + localized_columns(df)
     df = df[available_columns]
 
     print(f"✅ {len(df)} films valides après nettoyage.")
@@ -234,25 +462,501 @@ def display_statistics(df: pd.DataFrame):
         if missing > 0:
             print(f"   - {col}: {missing} ({missing/len(df)*100:.1f}%)")
 
+# ===============================
+# 🗜️ EXPORT PARQUET (TYPES COMPACTS)
+# ===============================
+# Types pandas appliqués avant l'export : ils sont gardés dans les métadonnées
+# du fichier, donc pd.read_parquet les restitue tels quels (Int16, boolean...).
+PARQUET_DTYPES = {
+    'Release_year': 'Int16', 'Runtime_minutes': 'Int16', 'Actor_count': 'int8',
+    'Rating': 'float32', 'ROI': 'float32', 'Is_profitable': 'boolean',
+    'Genre': 'category', 'Budget_category': 'category', 'Rating_category': 'category',
+    'Release_decade': 'category', 'Source': 'category',
+}
+
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+PARQUET_SCHEMA = pa.schema([
+    ('Movie_id', pa.int64()), ('Movie_name', pa.string()), ('Original_Title', pa.string()), ('Release_date', pa.string()),
+    ('Release_year', pa.int16()), ('Release_decade', _CATEGORY), ('Genre', _CATEGORY),
+    ('Runtime_minutes', pa.int16()), ('Director', pa.string()), ('Top_Actors', pa.string()),
+    ('Actor_count', pa.int8()), ('Overview', pa.string()),
+    ('Budget', pa.float64()), ('Budget_category', _CATEGORY), ('Revenue', pa.float64()),
+    ('Profit', pa.float64()), ('ROI', pa.float32()), ('Is_profitable', pa.bool_()),
+    ('Rating', pa.float32()), ('Rating_category', _CATEGORY), ('Poster_URL', pa.string()),
+    ('Source', _CATEGORY),
+])
+
+def to_parquet_table(df: pd.DataFrame) -> pa.Table:
+    """Convertit le DataFrame nettoyé en table Arrow au schéma PARQUET_SCHEMA."""
+    df = df.astype({col: dtype for col, dtype in PARQUET_DTYPES.items() if col in df.columns})
+    schema = pa.schema([field for field in PARQUET_SCHEMA if field.name in df.columns]
+                       + [pa.field(col, pa.string()) for col in localized_columns(df)])
+    return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+def write_parquet(df: pd.DataFrame, path=PARQUET_FILE):
+    pq.write_table(to_parquet_table(df), path, compression="zstd")
+
+# ===============================
+# 🔗 IDENTIFIANTS ET TABLES DE LIAISON
+# ===============================
+# Colonne du film nettoyé découpée pour chaque table de liaison
+BRIDGE_SOURCES = {"Genre": "Genre", "Actor": "Top_Actors", "Director": "Director"}
+
+BRIDGE_SCHEMAS = {
+    name: pa.schema([('Movie_id', pa.int64()), (name, _CATEGORY if name == "Genre" else pa.string())])
+    for name in BRIDGE_SOURCES
+}
+
+def add_movie_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute en tête `Movie_id`, entier stable d'un run à l'autre.
+
+    Hash (déterministe) de la clé de dédoublonnage (Movie_name, Source) :
+    le même film garde le même identifiant à chaque nettoyage, quel que
+    soit son rang dans le fichier ou le découpage en blocs.
+    """
+    df = df.copy()
+    df.insert(0, "Movie_id", key_hashes(df))
+    return df
+
+def key_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash (int64 positif) de la clé de dédoublonnage (Movie_name, Source) de chaque ligne."""
+    keys = df["Movie_name"].astype(str) + "\x1f" + df["Source"].astype(str)
+    hashes = pd.util.hash_array(keys.to_numpy(dtype=object)) & np.uint64(0x7FFF_FFFF_FFFF_FFFF)
+    return hashes.astype("int64")
+
+def build_bridge_tables(df: pd.DataFrame) -> dict:
+    """Tables de liaison (Movie_id, valeur) pour chaque entrée de BRIDGE_SOURCES.
+
+    Les listes "a, b, c" sont découpées une fois ici, pour que le dashboard
+    agrège par simple groupby / jointure sur Movie_id. Les valeurs "N/A"
+    (acteurs ou réalisateur inconnus) ne sont pas reprises.
+    """
+    tables = {}
+    for name, column in BRIDGE_SOURCES.items():
+        bridge = pd.DataFrame({
+            "Movie_id": df["Movie_id"].to_numpy(),
+            name: df[column].astype(str).str.split(",").to_numpy(),
+        }).explode(name)
+        bridge[name] = bridge[name].str.strip()
+        bridge = bridge[bridge[name].ne("") & bridge[name].ne("N/A")].drop_duplicates()
+        tables[name] = bridge.reset_index(drop=True)
+    return tables
+
+def bridge_to_parquet_table(name, bridge: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(bridge, schema=BRIDGE_SCHEMAS[name], preserve_index=False)
+
+def write_bridge_tables(df: pd.DataFrame, paths=BRIDGE_FILES):
+    bridges = build_bridge_tables(df)
+    for name, bridge in bridges.items():
+        pq.write_table(bridge_to_parquet_table(name, bridge), paths[name], compression="zstd")
+    return bridges
+
+# ===============================
+# 🌊 NETTOYAGE PAR BLOCS (HORS MÉMOIRE)
+# ===============================
+# En mode par blocs (et incrémental), chaque colonne numérique a un type fixe :
+# sinon le type inféré par bloc (int s'il ne manque rien, float sinon)
+# changerait l'écriture CSV d'un bloc à l'autre ("134" / "134.0").
+STREAM_DTYPES = {
+    'Release_year': 'int64', 'Actor_count': 'int64',
+    'Runtime_minutes': 'float64', 'Budget': 'float64', 'Revenue': 'float64',
+    'Profit': 'float64', 'ROI': 'float64', 'Rating': 'float64',
+}
+
+def iter_json_records(path, block_size=1 << 20):
+    """Texte JSON brut de chaque film, lu par blocs de `block_size` caractères.
+
+    Accepte un NDJSON (un film par ligne) ou un tableau JSON ; le tableau est
+    découpé au fil de la lecture (json.JSONDecoder.raw_decode), sans jamais
+    être chargé entièrement.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as f:
+        buffer = f.read(block_size)
+        pos = len(buffer) - len(buffer.lstrip())
+        if not buffer[pos:pos + 1] == "[":
+            # NDJSON
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+            return
+
+        pos += 1
+        eof = False
+        while True:
+            # Saute les blancs et les virgules entre deux éléments
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                buffer, pos = f.read(block_size), 0
+                eof = not buffer
+            if pos >= len(buffer) or buffer[pos] == "]":
+                return
+            try:
+                _, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Élément coupé en fin de bloc : on complète le buffer
+                more = f.read(block_size)
+                eof = not more
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            # Les chaînes JSON ne contiennent pas de retour à la ligne brut
+            yield buffer[pos:end].replace("\n", " ")
+            pos = end
+
+def read_json_chunks(path, chunksize):
+    """DataFrames de `chunksize` films, lus comme dans main() (pd.read_json, sans conversion de dates)."""
+    records = iter_json_records(path)
+    while True:
+        lines = list(itertools.islice(records, chunksize))
+        if not lines:
+            return
+        yield pd.read_json(io.StringIO("\n".join(lines)), lines=True, convert_dates=False)
+
+def unique_chunks(path, chunksize):
+    """Blocs de films de `path` sans les doublons (Movie_name, Source) déjà vus, même dans un bloc précédent.
+
+    Comme drop_duplicates sur le fichier entier, le premier film est gardé ;
+    seul l'ensemble des clés vues est conservé d'un bloc à l'autre. Chaque
+    bloc garde l'index de ses lignes (0..n-1).
+    """
+    seen = set()
+    for chunk in read_json_chunks(path, chunksize):
+        keys = pd.Series(list(zip(chunk["Movie_name"].astype(object).where(chunk["Movie_name"].notna(), None),
+                                  chunk["Source"].astype(object).where(chunk["Source"].notna(), None))),
+                         index=chunk.index)
+        fresh = ~keys.isin(seen) & ~keys.duplicated()
+        seen.update(keys[fresh])
+        yield len(chunk), chunk[fresh]
+
+def _common_dtype(dtypes, missing):
+    """Type qu'aurait la colonne lue en une fois : mêmes règles que pd.read_json (int + manquant -> float)."""
+    dtypes = list(dict.fromkeys(dtypes))
+    if all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in dtypes):
+        dtype = np.result_type(*dtypes)
+        return np.dtype("float64") if missing and dtype.kind in "iu" else dtype
+    return dtypes[0] if len(dtypes) == 1 and not (missing and pd.api.types.is_bool_dtype(dtypes[0])) else object
+
+def scan_chunks(path, chunksize) -> tuple:
+    """Premier passage du nettoyage par blocs : colonnes et types bruts du fichier entier, types nettoyés.
+
+    Un bloc seul ne dit pas si une colonne est entière sur tout le catalogue :
+    types bruts (pd.read_json du fichier entier) et types du nettoyage
+    complet (full_clean_dtypes) sont donc établis avant d'écrire quoi que ce
+    soit, puis imposés à chaque bloc.
+    """
+    columns, dtypes, missing, clean_dtypes = {}, collections.defaultdict(list), set(), {}
+    for _, chunk in unique_chunks(path, chunksize):
+        if chunk.empty:
+            continue
+        # Colonne apparue après le premier bloc : absente des blocs précédents
+        missing.update(col for col in chunk.columns if columns and col not in columns)
+        for col in chunk.columns:
+            columns.setdefault(col, chunk[col].dtype)
+            if chunk[col].notna().any():
+                dtypes[col].append(chunk[col].dtype)
+            if chunk[col].isna().any():
+                missing.add(col)
+        missing.update(col for col in columns if col not in chunk.columns)
+        for col, dtype in full_clean_dtypes(chunk).items():
+            clean_dtypes[col] = dtype if clean_dtypes.get(col, dtype) == dtype else np.dtype("float64")
+    raw_dtypes = {col: _common_dtype(dtypes[col], col in missing) if dtypes[col] else dtype
+                  for col, dtype in columns.items()}
+    return list(columns), raw_dtypes, clean_dtypes
+
+def clean_in_chunks(input_path, output_path, chunksize=50_000, parquet_path=None, bridge_paths=None,
+                    cube_paths=None, store=None, neighbors_path=None, raw_manifest_path=None):
+    """Nettoie `input_path` bloc par bloc et écrit les mêmes fichiers qu'un nettoyage complet.
+
+    La mémoire dépend de `chunksize`, pas de la taille du fichier. Un premier
+    passage fixe les types (cf. scan_chunks) ; le second nettoie chaque bloc,
+    dédoublonné entre blocs (cf. unique_chunks), et l'écrit au fil de l'eau.
+    Les cubes d'agrégats, additifs, sont calculés par bloc puis fusionnés à la
+    fin. La base `store` (MovieStore ouverte par l'appelant, validée avec la
+    version une fois les fichiers publiés) reçoit chaque bloc par upsert.
+    Les voisins (`neighbors_path`) sont calculés à la fin sur les
+    seules colonnes utiles, relues du Parquet et des tables de liaison ; le
+    manifeste brut (`raw_manifest_path`) permet au run suivant d'être
+    incrémental.
+    """
+    columns, raw_dtypes, clean_dtypes = scan_chunks(input_path, chunksize)
+    cubes, people_cubes, manifests = [], [], []
+    total_in = total_out = 0
+    writers = {}
+
+    def append(path, table):
+        if path not in writers:
+            writers[path] = pq.ParquetWriter(path, table.schema, compression="zstd")
+        writers[path].write_table(table)
+
+    with open(output_path, "w", encoding="utf-8-sig", newline="") as out:
+        for read, chunk in unique_chunks(input_path, chunksize):
+            total_in += read
+            if chunk.empty:
+                continue
+            # Types du fichier lu en une fois : le bloc est nettoyé (et hashé) comme une tranche du tout
+            chunk = chunk.reindex(columns=columns).astype(
+                {col: dtype for col, dtype in raw_dtypes.items() if chunk[col].dtype != dtype})
+
+            df_clean = normalize_clean_types(add_movie_ids(clean_movie_data(chunk)), clean_dtypes)
+            df_clean.to_csv(out, index=False, header=(out.tell() == 0))
+            row = pd.Series(-1, index=chunk.index, dtype="int64")
+            row[df_clean.index] = np.arange(total_out, total_out + len(df_clean))
+            manifests.append(pd.DataFrame({"Record_key": key_hashes(chunk), "Raw_hash": row_hashes(chunk),
+                                           "Row": row.to_numpy()}))
+            if parquet_path:
+                append(parquet_path, to_parquet_table(df_clean))
+            if bridge_paths or cube_paths or store:
+                bridges = build_bridge_tables(df_clean)
+            if bridge_paths:
+                for name, bridge in bridges.items():
+                    append(bridge_paths[name], bridge_to_parquet_table(name, bridge))
+            if cube_paths:
+                cubes.append(build_cube(df_clean, bridges["Genre"]))
+                people_cubes.append(build_people_cube(df_clean, bridges))
+            if store:
+                store.upsert(df_clean, bridges)
+            total_out += len(df_clean)
+        if store:
+            store.prune()
+    for writer in writers.values():
+        writer.close()
+    if store:
+        print_store_counts(store.counts)
+    if cube_paths and cubes:
+        write_cube_files(merge_cubes(cubes), merge_cubes(people_cubes), *cube_paths)
+    if neighbors_path and parquet_path and bridge_paths:
+        movies = pd.read_parquet(parquet_path, columns=NEIGHBOR_COLUMNS)
+        write_neighbors(movies, {name: pd.read_parquet(path) for name, path in bridge_paths.items()}, neighbors_path)
+    if raw_manifest_path and manifests:
+        write_raw_manifest(pd.concat(manifests, ignore_index=True), columns, output_path, raw_manifest_path)
+    return total_in, total_out
+
+def print_store_counts(counts):
+    print(f"🗄️  Base SQLite : {counts['inserted']} ajoutés, {counts['updated']} modifiés, "
+          f"{counts['unchanged']} inchangés, {counts['deleted']} supprimés")
+
+# ===============================
+# ♻️ NETTOYAGE INCRÉMENTAL
+# ===============================
+# Le manifeste brut garde, pour chaque enregistrement brut (clé de
+# dédoublonnage Movie_name + Source), le hash de son contenu et sa ligne dans
+# le CSV nettoyé (-1 s'il a été écarté). Au run suivant, seuls les
+# enregistrements nouveaux ou modifiés sont nettoyés ; les autres lignes sont
+# reprises telles quelles du CSV précédent et les films disparus du brut n'y
+# figurent plus. Seul ce nettoyage des lignes est incrémental : les fichiers
+# dérivés (Parquet, liaisons, cubes, voisins) sont recalculés sur tout le
+# catalogue nettoyé.
+RAW_MANIFEST_FILE = PROCESSED_DIR / "raw_manifest.parquet"
+RAW_MANIFEST_SCHEMA = pa.schema([('Record_key', pa.int64()), ('Raw_hash', pa.int64()), ('Row', pa.int64())])
+
+def raw_manifest_meta(columns, csv_path) -> dict:
+    """Conditions de validité du manifeste brut : mêmes colonnes brutes, même année, CSV inchangé depuis."""
+    from datetime import datetime
+    return {"columns": [str(col) for col in columns], "year": datetime.now().year, "csv_sha256": file_sha256(csv_path)}
+
+def read_raw_manifest(path, csv_path, columns):
+    """Manifeste brut du run précédent (indexé par Record_key), ou None s'il ne s'applique plus."""
+    path, csv_path = Path(path), Path(csv_path)
+    if not path.exists() or not csv_path.exists():
+        return None
+    table = pq.read_table(path)
+    meta = json.loads((table.schema.metadata or {}).get(b"popcorn", b"{}"))
+    # Année changée : des films « futurs », écartés jusque-là, peuvent devenir valides
+    if meta != raw_manifest_meta(columns, csv_path):
+        return None
+    return table.to_pandas().set_index("Record_key")
+
+def write_raw_manifest(manifest: pd.DataFrame, columns, csv_path, path=RAW_MANIFEST_FILE):
+    """Enregistre le manifeste brut, une fois `csv_path` écrit (son hash en fait partie)."""
+    table = pa.Table.from_pandas(manifest, schema=RAW_MANIFEST_SCHEMA, preserve_index=False)
+    table = table.replace_schema_metadata({"popcorn": json.dumps(raw_manifest_meta(columns, csv_path))})
+    pq.write_table(table, path, compression="zstd")
+
+def full_clean_dtypes(raw: pd.DataFrame) -> dict:
+    """Types des colonnes numériques qu'un nettoyage complet de `raw` (dédoublonné) écrirait.
+
+    Une colonne est entière si rien n'y manque à l'étape de clean_movie_data
+    qui la produit, sur tout le catalogue : les lignes reprises du CSV et les
+    lignes nettoyées s'écrivent alors comme en --full ("67", pas "67.0").
+    Seules les colonnes concernées sont recalculées, avec les mêmes fonctions.
+    """
+    from datetime import datetime
+
+    dtypes = dict(STREAM_DTYPES)
+    year = extract_year_column(raw['Release_date'])
+    dtypes['Release_year'] = year.dtype
+    kept = raw[year <= datetime.now().year]
+    dtypes['Runtime_minutes'] = parse_runtime_column(kept['Run_time']).dtype
+    dtypes['Rating'] = pd.to_numeric(kept['Rating_Numeric'], errors='coerce').dtype
+    return {col: dtype if dtype != object else STREAM_DTYPES[col] for col, dtype in dtypes.items()}
+
+def read_clean_csv(path) -> pd.DataFrame:
+    """Relit un CSV nettoyé (nombres en float64, convertis ensuite par normalize_clean_types)."""
+    dtypes = collections.defaultdict(lambda: str, {"Movie_id": "int64", **{col: "float64" for col in STREAM_DTYPES}})
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype=dtypes, keep_default_na=False, na_values=[""],
+                     float_precision="round_trip")
+    profitable = df["Is_profitable"]
+    df["Is_profitable"] = pd.Series(np.where(profitable.isna(), None, profitable.eq("True")), index=df.index, dtype=object)
+    return df
+
+def normalize_clean_types(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """Types d'un nettoyage complet (full_clean_dtypes) : lignes reprises du CSV et lignes nettoyées s'écrivent à l'identique."""
+    df = df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+    profitable = df["Is_profitable"]
+    df["Is_profitable"] = (profitable.astype(bool) if profitable.notna().all()
+                           else profitable.astype(object).where(profitable.notna(), None))
+    return df
+
+def clean_incremental(df: pd.DataFrame, csv_path, manifest_path=RAW_MANIFEST_FILE, full=False):
+    """Nettoie `df` (brut) en ne traitant que les enregistrements nouveaux ou modifiés depuis le run précédent.
+
+    Retourne le DataFrame nettoyé complet (avec Movie_id, dans l'ordre du
+    brut, comme un nettoyage complet) et le nouveau manifeste brut, à
+    enregistrer avec write_raw_manifest une fois le CSV écrit. Sans manifeste
+    valable (premier run, `full`, colonnes brutes ou année changées, CSV
+    modifié entre-temps), tout est nettoyé.
+    """
+    raw = df.drop_duplicates(subset=["Movie_name", "Source"], keep='first')
+    keys = key_hashes(raw)
+    hashes = row_hashes(raw)
+    previous = None if full else read_raw_manifest(manifest_path, csv_path, df.columns)
+
+    if previous is None:
+        print("♻️  Pas de manifeste brut valable : nettoyage complet")
+        df_clean = add_movie_ids(clean_movie_data(df))
+    else:
+        known = np.isin(keys, previous.index.to_numpy())
+        dirty = previous["Raw_hash"].reindex(keys, fill_value=-1).to_numpy() != hashes
+        rows = previous["Row"].reindex(keys[~dirty]).to_numpy()
+        counts = {"new": int((~known).sum()), "changed": int((known & dirty).sum()),
+                  "unchanged": int((~dirty).sum()), "deleted": int((~previous.index.isin(keys)).sum())}
+        for change, n in counts.items():
+            metrics.inc("clean_records_total", n, change=change)
+        print(f"♻️  Nettoyage incrémental : {counts['new']} nouveaux, {counts['changed']} modifiés, "
+              f"{counts['deleted']} supprimés, {counts['unchanged']} inchangés")
+
+        # Lignes reprises du CSV précédent, réindexées comme leur enregistrement brut
+        reused = read_clean_csv(csv_path).iloc[rows[rows >= 0]].set_axis(raw.index[~dirty][rows >= 0])
+        parts = [reused, add_movie_ids(clean_movie_data(raw[dirty]))] if dirty.any() else [reused]
+        df_clean = pd.concat([part for part in parts if len(part)] or parts[:1]).sort_index(kind="stable")
+
+    df_clean = normalize_clean_types(df_clean, full_clean_dtypes(raw))
+    row = pd.Series(-1, index=raw.index, dtype="int64")
+    row[df_clean.index] = np.arange(len(df_clean))
+    manifest = pd.DataFrame({"Record_key": keys, "Raw_hash": hashes, "Row": row.to_numpy()})
+    return df_clean, manifest
+
 # ===============================
 # 🚀 PIPELINE PRINCIPAL
 # ===============================
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nettoyage des données TMDb.")
+    parser.add_argument("--check", action="store_true",
+                        help="vérifie que la version vectorisée donne le même résultat que la version ligne par ligne")
+    parser.add_argument("--input", type=Path, default=INPUT_FILE, help="données brutes (tableau JSON ou NDJSON)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE, help="CSV nettoyé")
+    parser.add_argument("--parquet", type=Path, default=PARQUET_FILE,
+                        help="copie Parquet du CSV, aux types compacts (lue par le dashboard)")
+    parser.add_argument("--chunksize", type=int,
+                        help="nettoie par blocs de N films (mémoire bornée, pour les gros fichiers ; toujours complet)")
+    parser.add_argument("--store", type=Path, default=STORE_FILE,
+                        help="base SQLite mise à jour par upsert (requêtes SQL du dashboard)")
+    parser.add_argument("--no-store", action="store_true", help="n'écrit pas la base SQLite")
+    parser.add_argument("--full", action="store_true",
+                        help="nettoie tous les films, sans reprendre les lignes inchangées du run précédent")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with instrumentation.instrumented(args, "clean"):
+        run(args)
+
+def run(args):
     print("="*60)
     print("🎬 NETTOYAGE DES DONNÉES TMDB")
     print("="*60)
 
+    # Tables de liaison et cubes d'agrégats écrits à côté du Parquet
+    bridge_paths = {name: args.parquet.parent / path.name for name, path in BRIDGE_FILES.items()}
+    cube_paths = (args.parquet.parent / CUBE_FILE.name, args.parquet.parent / PEOPLE_CUBE_FILE.name)
+    neighbors_path = args.parquet.parent / NEIGHBORS_FILE.name
+    # Manifeste publié une fois tous les fichiers écrits (lu par le dashboard)
+    manifest_path = args.parquet.parent / MANIFEST_FILE.name
+    raw_manifest_path = args.parquet.parent / RAW_MANIFEST_FILE.name
+    store_path = None if args.no_store else args.store
+    # Fichiers de la version : écrits à côté (".tmp") puis remplacés d'un coup
+    # (cf. manifest.staged_outputs) ; la base SQLite est mise à jour sur place
+    files = {"csv": args.output, "parquet": args.parquet, **bridge_paths,
+             "cube": cube_paths[0], "people_cube": cube_paths[1], "neighbors": neighbors_path}
+    outputs = {**files, "store": store_path} if store_path else files
+
+    if args.chunksize:
+        # Base validée après la publication des fichiers, avec la version qu'ils forment
+        with metrics.stage("clean_chunks"), \
+                (MovieStore(store_path) if store_path else contextlib.nullcontext()) as store:
+            with staged_outputs(files) as staged:
+                total_in, total_out = clean_in_chunks(args.input, staged["csv"], args.chunksize, staged["parquet"],
+                                                      {name: staged[name] for name in bridge_paths},
+                                                      (staged["cube"], staged["people_cube"]), store,
+                                                      staged["neighbors"], raw_manifest_path)
+            entries = describe_files(outputs, manifest_path)
+            if store:
+                store.version = dataset_version(entries)
+        metrics.inc("clean_rows_total", total_in, result="read")
+        metrics.inc("clean_rows_total", total_out, result="kept")
+        print(f"\n✅ {total_in} films lus, {total_out} films valides après nettoyage.")
+        print(f"\n💾 Fichier nettoyé sauvegardé: {args.output} (+ {args.parquet.name})")
+        with metrics.stage("manifest"):
+            manifest = write_manifest(outputs, total_out, manifest_path, entries)
+        print(f"📜 Version du jeu de données : {manifest['version']}")
+        return
+
     try:
-        df = pd.read_json(INPUT_FILE)
+        # convert_dates=False : sinon "Run_time" / "Release_date" peuvent être lus comme des dates
+        with metrics.stage("load"):
+            df = pd.read_json(args.input, lines=args.input.suffix == ".ndjson", convert_dates=False)
         print(f"\n✅ {len(df)} films chargés depuis TMDb")
     except Exception as e:
         print(f"❌ Erreur lors du chargement: {e}")
         return
 
-    df_clean = clean_movie_data(df)
+    if args.check:
+        sys.exit(0 if check_equivalence(df) else 1)
+
+    with metrics.stage("clean"):
+        df_clean, raw_manifest = clean_incremental(df, args.output, raw_manifest_path, full=args.full)
+    metrics.inc("clean_rows_total", len(df), result="read")
+    metrics.inc("clean_rows_total", len(df_clean), result="kept")
     display_statistics(df_clean)
-    df_clean.to_csv(OUTPUT_FILE, index=False, encoding="utf-8-sig")
-    print(f"\n💾 Fichier nettoyé sauvegardé: {OUTPUT_FILE}")
+    with staged_outputs(files) as staged:
+        with metrics.stage("write_csv"):
+            df_clean.to_csv(staged["csv"], index=False, encoding="utf-8-sig")
+        with metrics.stage("write_parquet"):
+            write_parquet(df_clean, staged["parquet"])
+        with metrics.stage("bridges"):
+            bridges = write_bridge_tables(df_clean, {name: staged[name] for name in bridge_paths})
+        with metrics.stage("cubes"):
+            write_cube_files(build_cube(df_clean, bridges["Genre"]), build_people_cube(df_clean, bridges),
+                             staged["cube"], staged["people_cube"])
+        # Voisins de chaque film : calculés ici plutôt qu'au chargement du dashboard
+        with metrics.stage("neighbors"):
+            write_neighbors(df_clean, bridges, staged["neighbors"])
+    # La base porte la version formée par les fichiers publiés (cf. store.store_version)
+    entries = describe_files(outputs, manifest_path)
+    if store_path:
+        with metrics.stage("store"):
+            print_store_counts(write_store(df_clean, bridges, store_path, version=dataset_version(entries)))
+    with metrics.stage("raw_manifest"):
+        write_raw_manifest(raw_manifest, df.columns, args.output, raw_manifest_path)
+    print(f"\n💾 Fichier nettoyé sauvegardé: {args.output} (+ {args.parquet.name})")
+    with metrics.stage("manifest"):
+        manifest = write_manifest(outputs, len(df_clean), manifest_path, entries)
+    print(f"📜 Version du jeu de données : {manifest['version']}")
 
 if __name__ == "__main__":
     main()
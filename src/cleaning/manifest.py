@@ -0,0 +1,132 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import io
+import json
+import os
+
+# ===============================
+# 📁 CONFIGURATION DES CHEMINS
+# ===============================
+PROCESSED_DIR = Path(__file__).resolve().parents[2] / "data"
+MANIFEST_FILE = PROCESSED_DIR / "dataset_manifest.json"
+
+# ===============================
+# 📜 MANIFESTE DU JEU DE DONNÉES
+# ===============================
+# Le manifeste est écrit en dernier, une fois tous les fichiers complets :
+# le dashboard ne bascule vers une version qu'à sa publication. La version
+# est un hash du contenu des fichiers (un nettoyage qui ne change rien ne
+# publie pas de nouvelle version) ; les chemins sont relatifs au manifeste.
+# La base SQLite, mise à jour sur place et reconstruite à la demande depuis
+# les Parquet, n'entre pas dans la version (ni dans git) : seul son chemin
+# est publié, et la base garde elle-même la version de son contenu (table
+# meta, cf. store.store_version).
+LOCAL_ROLES = {"store"}
+
+
+class StaleFileError(Exception):
+    """Fichier remplacé depuis la publication de son manifeste (nettoyage en cours)."""
+
+
+def file_sha256(path, block_size=1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dataset_version(files: dict) -> str:
+    """Version du jeu de données : hash des hashs de ses fichiers (par rôle)."""
+    digest = hashlib.sha256()
+    for role in sorted(files):
+        if "sha256" not in files[role]:
+            continue
+        digest.update(f"{role}:{files[role]['sha256']}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def describe_files(paths: dict, path=MANIFEST_FILE) -> dict:
+    """Entrées du manifeste `path` pour les fichiers `paths` (rôle -> chemin) : chemin relatif et sha256."""
+    files = {}
+    for role, file in paths.items():
+        files[role] = {"path": Path(os.path.relpath(file, Path(path).parent)).as_posix()}
+        if role not in LOCAL_ROLES:
+            files[role]["sha256"] = file_sha256(file)
+    return files
+
+
+def write_manifest(paths: dict, rows: int, path=MANIFEST_FILE, files=None) -> dict:
+    """Publie le manifeste des fichiers `paths` (rôle -> chemin) et retourne son contenu.
+
+    `files` : entrées déjà calculées par describe_files (fichiers non rehashés).
+    Si la version n'a pas changé, le manifeste existant est conservé tel quel.
+    """
+    path = Path(path)
+    files = files if files is not None else describe_files(paths, path)
+    version = dataset_version(files)
+    previous = read_manifest(path)
+    if previous is not None and previous.get("version") == version:
+        return previous
+
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": int(rows),
+        "files": files,
+    }
+    # Écriture atomique : un lecteur voit l'ancien manifeste ou le nouveau, jamais un fichier tronqué
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return manifest
+
+
+@contextmanager
+def staged_outputs(paths: dict):
+    """Chemins temporaires (`<nom>.tmp`) où écrire les fichiers `paths` (rôle -> chemin).
+
+    En sortie sans erreur, chaque fichier remplace l'ancien d'un coup
+    (os.replace) : un lecteur ne voit jamais un fichier à moitié écrit. En cas
+    d'erreur, les fichiers temporaires sont supprimés et les anciens restent.
+    """
+    staged = {role: Path(path).with_name(Path(path).name + ".tmp") for role, path in paths.items()}
+    try:
+        yield staged
+    except BaseException:
+        for tmp in staged.values():
+            tmp.unlink(missing_ok=True)
+        raise
+    for role, tmp in staged.items():
+        os.replace(tmp, paths[role])
+
+
+def read_published(path, entry=None) -> io.BytesIO:
+    """Contenu de `path` lu en mémoire et vérifié contre le sha256 de son entrée du manifeste.
+
+    Le fichier est lu une seule fois : ce qui est vérifié est ce qui est
+    chargé. Un fichier réécrit par un nettoyage plus récent lève
+    StaleFileError ; une entrée sans sha256 (base locale, données antérieures
+    au manifeste) n'est pas vérifiée.
+    """
+    data = Path(path).read_bytes()
+    expected = (entry or {}).get("sha256")
+    if expected is not None and hashlib.sha256(data).hexdigest() != expected:
+        raise StaleFileError(f"{Path(path).name} ne correspond plus au manifeste")
+    return io.BytesIO(data)
+
+
+def read_manifest(path=MANIFEST_FILE):
+    """Contenu du manifeste, ou None s'il n'existe pas (données antérieures au manifeste)."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def manifest_file(manifest: dict, role, root=PROCESSED_DIR):
+    """Chemin absolu du fichier `role` du manifeste, ou None s'il n'en fait pas partie."""
+    entry = manifest["files"].get(role)
+    return Path(root) / entry["path"] if entry else None
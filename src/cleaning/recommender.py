@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+# ===============================
+# 📁 CONFIGURATION DES CHEMINS
+# ===============================
+PROCESSED_DIR = Path(__file__).resolve().parents[2] / "data"
+NEIGHBORS_FILE = PROCESSED_DIR / "movies_neighbors.parquet"
+
+# ===============================
+# 🎯 INDEX DE SIMILARITÉ
+# ===============================
+# Poids de chaque bloc de caractéristiques dans la similarité cosinus
+WEIGHTS = {"Genre": 1.0, "Actor": 0.8, "Director": 0.6, "Overview": 1.0, "Runtime": 0.3}
+RUNTIME_BUCKET = 30     # minutes : durées comparées par tranche
+TOP_K = 20              # voisins conservés par film
+# Recherche des voisins par candidats : deux films sont comparés s'ils
+# partagent une valeur (genre, acteur, réalisateur, mot du résumé, tranche de
+# durée) portée par au plus MAX_POSTING films. Les valeurs plus fréquentes
+# (« Drama », mots courants) comptent dans la similarité, pas dans le choix
+# des candidats. Jusqu'à MAX_POSTING films, toutes les valeurs servent et le
+# résultat est exact.
+MAX_POSTING = 1000
+BLOCK_PAIRS = 1 << 22   # couples candidats (au plus) par bloc de films
+SCORE_BATCH = 1 << 16   # couples dont la similarité est calculée à la fois
+DENSE_SHARE = 4         # bloc dont les candidats couvrent 1/DENSE_SHARE des couples : tous scorés d'un coup
+# Colonnes des films utilisées (avec les tables de liaison) : seules relues en mode par blocs
+NEIGHBOR_COLUMNS = ["Movie_id", "Overview", "Runtime_minutes", "Rating"]
+
+
+def _multi_hot(positions, values, n_rows):
+    """Matrice creuse (film × valeur) à 1 pour chaque couple (position, valeur)."""
+    codes, uniques = pd.factorize(values)
+    keep = (positions >= 0) & (codes >= 0)
+    data = np.ones(keep.sum(), dtype=np.float32)
+    matrix = sparse.csr_matrix((data, (positions[keep], codes[keep])), shape=(n_rows, len(uniques)))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+    return matrix
+
+
+def build_features(df: pd.DataFrame, bridges: dict):
+    """Matrice creuse des films : genres, acteurs et réalisateur (multi-hot),
+    TF-IDF du résumé et tranche de durée, chaque bloc normalisé puis pondéré."""
+    n = len(df)
+    index = pd.Index(df["Movie_id"])
+    blocks = []
+    for name in ["Genre", "Actor", "Director"]:
+        bridge = bridges[name]
+        positions = index.get_indexer(bridge["Movie_id"])
+        blocks.append((name, _multi_hot(positions, bridge[name].to_numpy(), n)))
+
+    overview = df["Overview"].astype(object).fillna("").astype(str).replace("N/A", "")
+    try:
+        tfidf = TfidfVectorizer(sublinear_tf=True, min_df=2, max_df=0.5, dtype=np.float32).fit_transform(overview)
+    except ValueError:
+        # Aucun mot assez fréquent (très petit catalogue)
+        tfidf = sparse.csr_matrix((n, 0), dtype=np.float32)
+    blocks.append(("Overview", tfidf))
+
+    # Durée inconnue : aucune tranche (et non une tranche commune à tous ces films)
+    runtime = pd.to_numeric(df["Runtime_minutes"], errors="coerce").astype("float64").to_numpy()
+    blocks.append(("Runtime", _multi_hot(np.arange(n), runtime // RUNTIME_BUCKET, n)))
+
+    # Bloc sans aucune valeur (très petit catalogue) : ignoré, normalize refuse une matrice vide
+    blocks = [normalize(block) * WEIGHTS[name] for name, block in blocks if block.shape[1]]
+    if not blocks:
+        return sparse.csr_matrix((n, 0), dtype=np.float32)
+    return normalize(sparse.hstack(blocks, format="csr", dtype=np.float32))
+
+
+class SimilarityIndex:
+    """Les TOP_K films les plus proches de chaque film, calculés une fois.
+
+    La recommandation n'est ensuite qu'une lecture de ligne : son coût ne
+    dépend pas de la taille du catalogue. Le calcul (cf. _top_k) est fait
+    par le nettoyage, qui publie la table des voisins (cf. write_neighbors) ;
+    `neighbors` la reprend sans rien recalculer.
+    """
+
+    def __init__(self, df: pd.DataFrame, bridges: dict = None, k=TOP_K, neighbors: pd.DataFrame = None):
+        self.positions = {movie_id: pos for pos, movie_id in enumerate(df["Movie_id"].to_numpy())}
+        self.ratings = pd.to_numeric(df["Rating"], errors="coerce").to_numpy(dtype=float)
+        if neighbors is not None:
+            self.neighbors, self.scores = self._from_table(df, neighbors)
+        else:
+            self.neighbors, self.scores = self._top_k(build_features(df, bridges), k)
+
+    @staticmethod
+    def _from_table(df, neighbors):
+        """Tableaux (film × rang) de positions et de similarités, depuis la table des voisins."""
+        ids = pd.Index(df["Movie_id"])
+        rows = ids.get_indexer(neighbors["Movie_id"])
+        cols = ids.get_indexer(neighbors["Neighbor_id"])
+        k = int(neighbors["Rank"].max()) + 1 if len(neighbors) else 0
+        positions = np.zeros((len(df), k), dtype=np.int32)
+        scores = np.zeros((len(df), k), dtype=np.float32)
+        # Un voisin inconnu de `df` garde une similarité nulle : il n'est jamais recommandé
+        keep = (rows >= 0) & (cols >= 0)
+        ranks = neighbors["Rank"].to_numpy()[keep]
+        positions[rows[keep], ranks] = cols[keep]
+        scores[rows[keep], ranks] = neighbors["Score"].to_numpy(dtype=np.float32)[keep]
+        return positions, scores
+
+    def table(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Table des voisins (Movie_id, Rank, Neighbor_id, Score) des films de `df`, à publier avec le jeu de données."""
+        n, k = self.neighbors.shape
+        ids = df["Movie_id"].to_numpy()
+        return pd.DataFrame({
+            "Movie_id": np.repeat(ids, k),
+            "Rank": np.tile(np.arange(k, dtype=np.int16), n),
+            "Neighbor_id": ids[self.neighbors.ravel()] if n else ids[:0],
+            "Score": self.scores.ravel(),
+        })
+
+    @staticmethod
+    def _top_k(features, k, max_posting=MAX_POSTING):
+        """Les `k` films les plus proches de chaque film, parmi ses candidats (cf. MAX_POSTING).
+
+        Le coût suit le nombre de couples candidats : au plus MAX_POSTING par
+        valeur du film, soit ~ films × valeurs par film × MAX_POSTING, et non
+        plus le carré du catalogue. Un film sans assez de candidats garde des
+        voisins de similarité nulle (jamais recommandés).
+        """
+        n = features.shape[0]
+        k = min(k, max(n - 1, 0))
+        neighbors = np.repeat(np.arange(n, dtype=np.int32)[:, None], k, axis=1)
+        scores = np.zeros((n, k), dtype=np.float32)
+        if not k:
+            return neighbors, scores
+
+        incidence = features.copy()
+        incidence.data[:] = 1.0
+        posting = np.bincount(incidence.indices, minlength=incidence.shape[1])
+        incidence = (incidence @ sparse.diags((posting <= max_posting).astype(np.float32))).tocsr()
+        incidence.eliminate_zeros()
+        transposed = incidence.T.tocsr()
+        features_t = features.T.tocsr()
+        # Blocs de films dont les couples candidats (au plus la somme des postings) tiennent dans BLOCK_PAIRS
+        bound = np.cumsum(incidence @ posting.astype(np.float64))
+        edges = np.flatnonzero(np.diff(bound // BLOCK_PAIRS)) + 1
+
+        for start, stop in zip(np.r_[0, edges], np.r_[edges, n]):
+            # Jusqu'à MAX_POSTING films, tout film partageant une valeur est candidat : inutile de les lister
+            pairs = (incidence[start:stop] @ transposed).tocoo() if n > max_posting else None
+            if pairs is None or pairs.nnz * DENSE_SHARE >= (stop - start) * n:
+                # Candidats denses (petit catalogue) : tous les couples du bloc, par produit matriciel
+                sims = (features[start:stop] @ features_t).toarray()
+                sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf   # pas le film lui-même
+                top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+                top_scores = np.take_along_axis(sims, top, axis=1)
+                order = np.lexsort((top, -top_scores), axis=1)
+                neighbors[start:stop] = np.take_along_axis(top, order, axis=1)
+                scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+                continue
+            rows, cols = pairs.row.astype(np.int64) + start, pairs.col.astype(np.int64)
+            rows, cols = rows[rows != cols], cols[rows != cols]
+            sims = np.empty(len(rows), dtype=np.float32)
+            for batch in range(0, len(rows), SCORE_BATCH):
+                part = slice(batch, batch + SCORE_BATCH)
+                sims[part] = np.asarray(features[rows[part]].multiply(features[cols[part]]).sum(axis=1)).ravel()
+            # Par film, par similarité décroissante puis par position
+            order = np.lexsort((cols, -sims, rows))
+            rows, cols, sims = rows[order], cols[order], sims[order]
+            rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+            top = rank < k
+            neighbors[rows[top], rank[top]] = cols[top]
+            scores[rows[top], rank[top]] = sims[top]
+        return neighbors, scores
+
+    def recommend(self, movie_id, n=5, by_rating=False):
+        """Positions (dans le DataFrame d'origine) et similarités des `n` films les plus proches.
+
+        Avec `by_rating`, les TOP_K plus proches sont reclassés par note.
+        """
+        pos = self.positions.get(movie_id)
+        if pos is None:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        related = self.scores[pos] > 0
+        neighbors, scores = self.neighbors[pos][related], self.scores[pos][related]
+        if by_rating:
+            order = np.argsort(-np.nan_to_num(self.ratings[neighbors], nan=-np.inf), kind="stable")
+            neighbors, scores = neighbors[order], scores[order]
+        return neighbors[:n], scores[:n]
+
+# ===============================
+# 💾 TABLE DES VOISINS
+# ===============================
+NEIGHBORS_SCHEMA = pa.schema([
+    ('Movie_id', pa.int64()), ('Rank', pa.int16()), ('Neighbor_id', pa.int64()), ('Score', pa.float32()),
+])
+
+
+def write_neighbors(df: pd.DataFrame, bridges: dict, path=NEIGHBORS_FILE):
+    """Calcule les TOP_K voisins de chaque film de `df` et les écrit (lus par le dashboard)."""
+    table = SimilarityIndex(df, bridges).table(df)
+    pq.write_table(pa.Table.from_pandas(table, schema=NEIGHBORS_SCHEMA, preserve_index=False), path,
+                   compression="zstd")
+    return table
@@ -0,0 +1,187 @@
+from pathlib import Path
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from aggregates import diffusion_column
+from textfold import FIELDS, fold
+
+# ===============================
+# 📁 CONFIGURATION DES CHEMINS
+# ===============================
+PROCESSED_DIR = Path(__file__).resolve().parents[2] / "data"
+STORE_FILE = PROCESSED_DIR / "movies.sqlite"
+
+# ===============================
+# 🗄️ SCHÉMA DE LA BASE SQLITE
+# ===============================
+# Une ligne par film, identifiée par Movie_id (stable d'un run à l'autre) ;
+# Position garde l'ordre du fichier nettoyé et Row_hash le contenu de la
+# ligne : un film inchangé n'est pas réécrit. Les tables de liaison et
+# l'index plein texte (FTS5, même texte replié que search.SearchIndex)
+# sont réécrits pour les seuls films ajoutés ou modifiés. La table meta
+# garde la version du jeu de données (cf. manifest.dataset_version) écrite
+# dans la même transaction : un lecteur sait toujours quelle version il lit.
+MOVIE_COLUMNS = {
+    "Movie_id": "INTEGER PRIMARY KEY",
+    "Movie_name": "TEXT", "Original_Title": "TEXT", "Release_date": "TEXT",
+    "Release_year": "INTEGER", "Release_decade": "TEXT", "Genre": "TEXT", "Runtime_minutes": "INTEGER",
+    "Director": "TEXT", "Top_Actors": "TEXT", "Actor_count": "INTEGER", "Overview": "TEXT",
+    "Budget": "REAL", "Budget_category": "TEXT", "Revenue": "REAL", "Profit": "REAL", "ROI": "REAL",
+    "Is_profitable": "INTEGER", "Rating": "REAL", "Rating_category": "TEXT", "Poster_URL": "TEXT",
+    "Source": "TEXT", "Diffusion": "TEXT",
+    "Position": "INTEGER", "Row_hash": "INTEGER",
+}
+# Table de liaison -> colonne de valeur (cf. clean_movie.build_bridge_tables)
+BRIDGE_TABLES = {"Genre": "movie_genres", "Actor": "movie_actors", "Director": "movie_directors"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS movies ({", ".join(f'{name} {kind}' for name, kind in MOVIE_COLUMNS.items())});
+CREATE INDEX IF NOT EXISTS movies_year ON movies (Release_year);
+CREATE INDEX IF NOT EXISTS movies_rating ON movies (Rating);
+CREATE INDEX IF NOT EXISTS movies_decade ON movies (Release_decade);
+CREATE INDEX IF NOT EXISTS movies_position ON movies (Position);
+{"".join(f'''
+CREATE TABLE IF NOT EXISTS {table} (Movie_id INTEGER NOT NULL, {name} TEXT NOT NULL, PRIMARY KEY ({name}, Movie_id)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS {table}_movie ON {table} (Movie_id);''' for name, table in BRIDGE_TABLES.items())}
+CREATE TABLE IF NOT EXISTS meta (Key TEXT PRIMARY KEY, Value TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5 ({", ".join(FIELDS)}, tokenize = "unicode61 remove_diacritics 2");
+"""
+
+
+def connect(path=STORE_FILE, readonly=False) -> sqlite3.Connection:
+    if readonly:
+        conn = sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.executescript(SCHEMA)
+    return conn
+
+
+def store_version(conn: sqlite3.Connection):
+    """Version du jeu de données contenue dans la base, ou None (base antérieure à la table meta)."""
+    try:
+        row = conn.execute("SELECT Value FROM meta WHERE Key = 'version'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash (int64) du contenu de chaque ligne, hors Movie_id s'il est présent."""
+    values = df.drop(columns="Movie_id", errors="ignore").astype(str)
+    return (pd.util.hash_pandas_object(values, index=False).to_numpy() & np.uint64(0x7FFF_FFFF_FFFF_FFFF)).astype("int64")
+
+
+def _records(df: pd.DataFrame):
+    """Lignes en types Python (NaN / NA -> NULL), dans l'ordre des colonnes de `df`."""
+    columns = [df[col].astype(object).where(df[col].notna(), None).to_numpy() for col in df.columns]
+    return zip(*(
+        [v.item() if isinstance(v, np.generic) else v for v in values] for values in columns
+    ))
+
+# ===============================
+# 🔄 MISE À JOUR INCRÉMENTALE
+# ===============================
+class MovieStore:
+    """Base SQLite des films nettoyés, mise à jour par upsert sur Movie_id.
+
+    Toutes les écritures d'un run se font dans une seule transaction,
+    validée par `close()` avec la version `version` du jeu de données : un
+    lecteur (dashboard) voit l'ancienne ou la nouvelle version, jamais un
+    état intermédiaire. La version peut n'être connue qu'en fin de run
+    (hash des fichiers publiés) : elle est alors affectée avant la sortie.
+
+        with MovieStore(path) as store:
+            store.upsert(df_clean, bridges)
+            store.prune()       # retire les films absents de ce run
+            store.version = version
+    """
+
+    def __init__(self, path=STORE_FILE, version=None):
+        self.path = Path(path)
+        self.version = version
+        self.conn = None
+        self.position = 0       # rang du prochain film dans le fichier nettoyé
+        self.counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+    def __enter__(self):
+        self.conn = connect(self.path)
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("CREATE TEMP TABLE seen (Movie_id INTEGER PRIMARY KEY)")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+    def close(self, commit=True):
+        if commit and self.version is not None:
+            self.conn.execute("INSERT OR REPLACE INTO meta (Key, Value) VALUES ('version', ?)", (self.version,))
+        self.conn.execute("COMMIT" if commit else "ROLLBACK")
+        self.conn.close()
+
+    def upsert(self, df: pd.DataFrame, bridges: dict):
+        """Ajoute ou met à jour les films de `df` (nettoyés, avec Movie_id) et leurs tables de liaison."""
+        df = df.assign(Diffusion=diffusion_column(df))
+        hashes = row_hashes(df)
+        df = df.assign(Position=np.arange(self.position, self.position + len(df)), Row_hash=hashes)
+        self.position += len(df)
+        self.conn.executemany("INSERT OR IGNORE INTO temp.seen VALUES (?)", ((int(i),) for i in df["Movie_id"]))
+
+        stored = pd.read_sql_query(
+            "SELECT m.Movie_id, m.Row_hash, m.Position FROM movies m JOIN temp.seen s USING (Movie_id)", self.conn
+        ).set_index("Movie_id")
+        new = ~df["Movie_id"].isin(stored.index).to_numpy()
+        known_hash = stored["Row_hash"].reindex(df["Movie_id"], fill_value=-1).to_numpy()
+        known_position = stored["Position"].reindex(df["Movie_id"], fill_value=-1).to_numpy()
+        changed = ~new & (known_hash != hashes)
+        moved = ~new & ~changed & (known_position != df["Position"].to_numpy())
+        self.counts["inserted"] += int(new.sum())
+        self.counts["updated"] += int(changed.sum())
+        self.counts["unchanged"] += int((~new & ~changed).sum())
+
+        # Films nouveaux ou modifiés : ligne, liaisons et texte indexé réécrits
+        rows = df[new | changed]
+        columns = [col for col in MOVIE_COLUMNS if col in rows.columns]
+        updates = ", ".join(f"{col} = excluded.{col}" for col in columns if col != "Movie_id")
+        self.conn.executemany(
+            f"INSERT INTO movies ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT (Movie_id) DO UPDATE SET {updates}",
+            _records(rows[columns]))
+        ids = [(int(i),) for i in rows["Movie_id"]]
+        self._delete_dependents(ids)
+        for name, table in BRIDGE_TABLES.items():
+            bridge = bridges[name][bridges[name]["Movie_id"].isin(rows["Movie_id"])]
+            self.conn.executemany(f"INSERT OR IGNORE INTO {table} (Movie_id, {name}) VALUES (?, ?)",
+                                  _records(bridge[["Movie_id", name]].astype({name: str})))
+        text = rows[["Movie_id", *FIELDS]].copy()
+        for field in FIELDS:
+            text[field] = text[field].astype(str).where(text[field].ne("N/A"), "").map(fold)
+        self.conn.executemany(f"INSERT INTO movies_fts (rowid, {', '.join(FIELDS)}) VALUES (?{', ?' * len(FIELDS)})",
+                              _records(text))
+
+        # Films inchangés mais déplacés dans le fichier : seule Position change
+        self.conn.executemany("UPDATE movies SET Position = ? WHERE Movie_id = ?",
+                              _records(df.loc[moved, ["Position", "Movie_id"]]))
+
+    def _delete_dependents(self, ids):
+        for table in BRIDGE_TABLES.values():
+            self.conn.executemany(f"DELETE FROM {table} WHERE Movie_id = ?", ids)
+        self.conn.executemany("DELETE FROM movies_fts WHERE rowid = ?", ids)
+
+    def prune(self):
+        """Supprime les films qui ne figurent pas dans ce run (retirés du catalogue)."""
+        ids = [row for row in self.conn.execute(
+            "SELECT Movie_id FROM movies WHERE Movie_id NOT IN (SELECT Movie_id FROM temp.seen)")]
+        self._delete_dependents(ids)
+        self.conn.executemany("DELETE FROM movies WHERE Movie_id = ?", ids)
+        self.counts["deleted"] += len(ids)
+
+
+def write_store(df: pd.DataFrame, bridges: dict, path=STORE_FILE, version=None) -> dict:
+    """Aligne la base sur `df` (catalogue complet, version `version`) ; retourne les comptes ajoutés / modifiés / inchangés / supprimés."""
+    with MovieStore(path, version) as store:
+        store.upsert(df, bridges)
+        store.prune()
+    return store.counts
@@ -0,0 +1,24 @@
+import re
+import unicodedata
+
+# ===============================
+# 🔤 NORMALISATION DU TEXTE
+# ===============================
+# Partagée par l'index FTS de la base SQLite (store.py) et l'index de
+# recherche du dashboard (search.py) : les deux doivent découper pareil.
+
+# Champs indexés et poids : un mot du titre pèse plus qu'un mot du résumé
+FIELDS = {"Movie_name": 5.0, "Original_Title": 4.0, "Director": 3.0, "Top_Actors": 2.0, "Overview": 1.0}
+
+TOKEN = re.compile(r"\w+")
+LIGATURES = str.maketrans({"œ": "oe", "æ": "ae"})
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents : « Amélie » et « amelie » donnent le même mot."""
+    text = unicodedata.normalize("NFKD", text.casefold().translate(LIGATURES))
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> list:
+    return TOKEN.findall(fold(text))
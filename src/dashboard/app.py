@@ -2,6 +2,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "cleaning"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scraper"))
+from aggregates import DIFFUSION_CINEMA, DIFFUSION_STREAMING
+from dataset import POLL_INTERVAL, DatasetWatcher
+from derived import DerivedCache
+from posters import POSTER_DIR, PosterCache, placeholder
+from sql_query import movie_query, open_dataset
 
 # ===============================
 # ⚙️ Configuration de la page
@@ -12,26 +22,67 @@ st.title("🎬 PopcornData")
 # ===============================
 # 📁 Chargement des données
 # ===============================
-DATA_PATH = Path("data") / "movies_clean.csv"
-
-@st.cache_data
-def load_data():
-    df = pd.read_csv(DATA_PATH)
-    df = df.drop_duplicates(subset=["Movie_name", "Source"])
-    df = df[df["Rating"].notna()]
-    df["Rating"] = pd.to_numeric(df["Rating"], errors="coerce")
-    df["Release_year"] = pd.to_numeric(df["Release_year"], errors="coerce")
-    df = df.dropna(subset=["Release_year"])
-    df["Release_year"] = df["Release_year"].astype(int)
-    df["Genre"] = df["Genre"].fillna("Autre")
-
-    for col in ["ROI", "Profit", "Budget", "Revenue"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    
-    return df
-
-df = load_data()
+# Chaque version du jeu de données est chargée une fois (cf. query.Dataset et
+# dataset.DatasetWatcher) : une nouvelle version est préparée en arrière-plan,
+# puis seuls les caches de l'ancienne sont libérés. Un gros catalogue est
+# interrogé en SQL dans la base du nettoyage (cf. sql_query.SqlDataset).
+# Tout est lu au chargement : une session ne relit jamais un fichier que le
+# nettoyage suivant aurait déjà remplacé.
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+@st.cache_resource(max_entries=2)
+def load_dataset(version):
+    """Films, tables de liaison, cubes et index d'une version, tous construits d'avance."""
+    watcher = dataset_watcher()
+    return open_dataset(version, lambda role: watcher.path(version, role), watcher.manifest(version)).warm()
+
+def warm_version(version):
+    """Charge une nouvelle version (hors de toute session) avant la bascule."""
+    load_dataset(version)
+
+def retire_version(version):
+    """Libère les données, index et résultats dérivés d'une ancienne version, et eux seuls."""
+    load_dataset.clear(version)
+    derived_cache().drop_version(version)
+
+@st.cache_resource
+def derived_cache():
+    """Résultats dérivés (recherches, sélections, agrégats) partagés par toutes les sessions."""
+    return DerivedCache()
+
+@st.cache_resource
+def dataset_watcher():
+    return DatasetWatcher(DATA_DIR, warm=warm_version, retire=retire_version)
+
+@st.cache_resource
+def load_poster_cache(index_mtime):
+    """Miniatures locales des affiches (cf. src/scraper/posters.py), relues quand leur index change."""
+    return PosterCache(DATA_DIR / POSTER_DIR.name)
+
+@st.cache_resource
+def poster_placeholder():
+    return placeholder()
+
+def poster(url):
+    """Miniature locale de l'affiche, ou placeholder : aucune image n'est chargée depuis TMDb."""
+    path = poster_cache.path(url) if pd.notna(url) and url != "N/A" else None
+    return str(path) if path else poster_placeholder()
+
+poster_index = DATA_DIR / POSTER_DIR.name / "index.json"
+poster_cache = load_poster_cache(poster_index.stat().st_mtime_ns if poster_index.exists() else None)
+
+# Version lue une fois par exécution : toute la page est calculée sur la même.
+# Filtres, recherche, agrégats et recommandations : cf. query.MovieQuery
+# (ou sql_query.SqlMovieQuery, même interface)
+version = dataset_watcher().version()
+dataset = load_dataset(version)
+if not dataset.is_current():
+    # Base SQLite déjà alignée sur le nettoyage suivant : on attend que sa version soit chargée
+    dataset_watcher().refresh()
+    st.info("🔄 Mise à jour des données en cours…")
+    time.sleep(1)
+    st.rerun()
+movies = movie_query(dataset, derived_cache())
 
 # ===============================
 # 📦 Sidebar structurée
@@ -39,16 +90,6 @@ df = load_data()
 st.sidebar.title("🎛️ Panneau de configuration")
 st.sidebar.markdown("Filtrez et explorez les films selon vos préférences.")
 
-max_films = len(df)
-nb_films = st.sidebar.slider(
-    "🎬 Nombre de films à charger :",
-    min_value=50,
-    max_value=max_films,
-    step=50,
-    value=min(500, max_films)
-)
-df = df.head(nb_films)
-
 # Initialiser un compteur de réinitialisation
 if 'reset_counter' not in st.session_state:
     st.session_state.reset_counter = 0
@@ -57,30 +98,44 @@ if st.sidebar.button("♻️ Réinitialiser les filtres"):
     st.session_state.reset_counter += 1  # Incrémenter pour forcer la réinitialisation
     st.rerun()
 
+@st.fragment(run_every=POLL_INTERVAL)
+def dataset_status():
+    """Version affichée ; la page est recalculée dès qu'une nouvelle version est prête."""
+    if dataset_watcher().version() != version:
+        st.rerun()
+    rows = dataset_watcher().manifest(version)["rows"]
+    st.caption(f"🗂️ Données : version {version[:8]}" + (f" · {rows} films" if rows is not None else ""))
+
+with st.sidebar:
+    dataset_status()
+
 st.sidebar.divider()
 
 st.sidebar.subheader("🔎 Rechercher un film")
 search_query = st.sidebar.text_input(
-    "Nom du film (ex : Inception) :",
+    "Titre, réalisateur, acteur ou mot du résumé (ex : Inception) :",
     key=f"search_input_{st.session_state.reset_counter}"  # Clé dynamique
 )
 
+# Films trouvés par la recherche, du plus pertinent au moins pertinent
 if search_query:
-    df = df[df["Movie_name"].str.contains(search_query, case=False, na=False)]
-    st.sidebar.success(f"{len(df)} film(s) trouvé(s) correspondant à '{search_query}'")
+    ranked, _ = movies.search(search_query)
+    st.sidebar.success(f"{len(ranked)} film(s) trouvé(s) correspondant à '{search_query}'")
 
 # ===============================
 # 🎭 Filtres dynamiques
 # ===============================
+options = movies.options(search_query)
+
 col1, col2, col3 = st.columns(3)
 with col1:
-    all_genres = sorted({g.strip() for sublist in df["Genre"].dropna().str.split(',') for g in sublist})
+    all_genres = options["Genre"]
     genre_filter = st.selectbox("🎭 Genre :", ["Tous"] + all_genres)
 with col2:
-    source_filter = st.selectbox("📊 Source :", ["Toutes"] + sorted(df["Source"].unique()))
+    source_filter = st.selectbox("📊 Source :", ["Toutes"] + options["Source"])
 with col3:
-    if "Release_decade" in df.columns:
-        decade_filter = st.selectbox("🕰️ Décennie :", ["Toutes"] + sorted(df["Release_decade"].dropna().unique().tolist()))
+    if "Release_decade" in options:
+        decade_filter = st.selectbox("🕰️ Décennie :", ["Toutes"] + options["Release_decade"])
     else:
         decade_filter = "Toutes"
 
@@ -93,60 +148,71 @@ distribution_filter = st.radio(
 # ===============================
 # 🔍 Application des filtres
 # ===============================
-filtered_df = df.copy()
+# Valeur retenue par filtre (None : pas de filtre)
+filters = {
+    "query": search_query,
+    "genre": None if genre_filter == "Tous" else genre_filter,
+    "source": None if source_filter == "Toutes" else source_filter,
+    "decade": None if decade_filter == "Toutes" else decade_filter,
+    "diffusion": {"Cinéma uniquement": DIFFUSION_CINEMA, "Streaming uniquement": DIFFUSION_STREAMING}.get(distribution_filter),
+}
+
+# Films retenus et agrégats : une même combinaison de filtres n'est calculée
+# qu'une fois, toutes sessions confondues
+view = movies.view(filters)
+filtered_positions, stats = view["positions"], view["stats"]
+
+st.write(f"**{len(filtered_positions)} films affichés** après filtrage")
 
-if distribution_filter == "Cinéma uniquement":
-    filtered_df = filtered_df[(filtered_df["Budget"].notna()) | (filtered_df["Revenue"].notna())]
-elif distribution_filter == "Streaming uniquement":
-    filtered_df = filtered_df[(filtered_df["Budget"].isna()) & (filtered_df["Revenue"].isna())]
-
-if source_filter != "Toutes":
-    filtered_df = filtered_df[filtered_df["Source"] == source_filter]
-if genre_filter != "Tous":
-    filtered_df = filtered_df[filtered_df["Genre"].str.contains(genre_filter, na=False)]
-if decade_filter != "Toutes":
-    filtered_df = filtered_df[filtered_df["Release_decade"] == decade_filter]
-
-st.write(f"**{len(filtered_df)} films affichés** après filtrage")
+# ===============================
+# 📄 Pagination
+# ===============================
+# Les vues de résultats ne matérialisent que la page visible ; la page
+# revient à 1 dès que les filtres changent (clé liée aux filtres).
+PAGE_SIZE = 25
+filters_key = "|".join(map(str, [
+    st.session_state.reset_counter, search_query, genre_filter, source_filter, decade_filter, distribution_filter,
+]))
+
+def page_bounds(total, key, page_size=PAGE_SIZE):
+    """Affiche le sélecteur de page et retourne les bornes [début, fin) de la page visible."""
+    pages = max(1, -(-total // page_size))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (sur {pages})", min_value=1, max_value=pages, value=1, step=1,
+                               key=f"{key}_{filters_key}")
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total)
 
 # ===============================
 # 🧭 Métriques principales
 # ===============================
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("🎞️ Total Films", len(filtered_df))
+    st.metric("🎞️ Total Films", stats["count"])
 with col2:
-    st.metric("⭐ Note moyenne", f"{filtered_df['Rating'].mean():.1f}/10" if len(filtered_df)>0 else "N/A")
+    st.metric("⭐ Note moyenne", f"{stats['rating']:.1f}/10" if stats["count"] > 0 else "N/A")
 with col3:
-    if len(filtered_df) > 0:
-        st.metric("📆 Période", f"{filtered_df['Release_year'].min()} - {filtered_df['Release_year'].max()}")
+    if stats["count"] > 0:
+        st.metric("📆 Période", f"{stats['year_min']} - {stats['year_max']}")
     else:
         st.metric("📆 Période", "N/A")
 
 col4, col5, col6 = st.columns(3)
-if "ROI" in filtered_df.columns and filtered_df["ROI"].notna().any():
-    col4.metric("💰 ROI moyen", f"{filtered_df['ROI'].mean():.2f}x")
-if "Is_profitable" in filtered_df.columns and filtered_df["Is_profitable"].notna().any():
-    profitable_rate = filtered_df["Is_profitable"].mean() * 100
-    col5.metric("📈 % Films rentables", f"{profitable_rate:.1f}%")
-if "Profit" in filtered_df.columns and filtered_df["Profit"].notna().any():
-    col6.metric("💵 Profit moyen", f"{filtered_df['Profit'].mean():,.0f}")
+if pd.notna(stats["roi"]):
+    col4.metric("💰 ROI moyen", f"{stats['roi']:.2f}x")
+if pd.notna(stats["profitable_rate"]):
+    col5.metric("📈 % Films rentables", f"{stats['profitable_rate'] * 100:.1f}%")
+if pd.notna(stats["profit"]):
+    col6.metric("💵 Profit moyen", f"{stats['profit']:,.0f}")
 
 # ===============================
 # 📊 KPI : Pertinence des genres
 # ===============================
 st.subheader("📈 Pertinence des genres sur les 5 dernières années")
-kpi_df = filtered_df.copy()
-recent_years = kpi_df[kpi_df["Release_year"] >= kpi_df["Release_year"].max() - 5]
-
-if not recent_years.empty:
-    genre_perf = (
-        recent_years.assign(Genre=recent_years["Genre"].str.split(",")) 
-        .explode("Genre")
-        .groupby("Genre")["Rating"]
-        .mean()
-        .sort_values(ascending=False)
-    )
+genre_perf = view["genre_perf"]
+
+if not genre_perf.empty:
     colA, colB = st.columns(2)
     with colA:
         st.success(f"🏆 **Genre le plus pertinent : {genre_perf.index[0]} ({genre_perf.iloc[0]:.1f}/10)**")
@@ -155,53 +221,64 @@ if not recent_years.empty:
 else:
     st.info("Pas assez de données récentes pour calculer les tendances.")
 
+# ===============================
+# 🧾 Films filtrés (page par page)
+# ===============================
+st.subheader("🧾 Films filtrés")
+start, stop = page_bounds(len(filtered_positions), "results_page")
+page_df = movies.movies(filtered_positions[start:stop])
+st.dataframe(page_df, use_container_width=True, hide_index=True)
+if len(filtered_positions):
+    st.caption(f"Films {start + 1} à {stop} sur {len(filtered_positions)}")
+
 # ===============================
 # 🎯 Recommandation de films similaires
 # ===============================
 st.subheader("🎯 Recommandation de films similaires")
+RECO_CHOICES = 50       # films proposés dans le sélecteur
+
+if len(filtered_positions):
+    # Choix parmi tous les films filtrés : la recherche s'ajoute à celle de la
+    # barre latérale (mots tous requis) ; sans recherche, les mieux notés
+    reco_query = st.text_input("Rechercher le film de référence (titre, réalisateur, acteur) :",
+                               key=f"reco_search_{st.session_state.reset_counter}")
+    if reco_query:
+        candidates = movies.positions({**filters, "query": f"{search_query} {reco_query}".strip()})
+        found = len(candidates)
+    else:
+        candidates, found = movies.top_rated(filtered_positions, RECO_CHOICES), len(filtered_positions)
+    choices = movies.movies(candidates[:RECO_CHOICES], ["Movie_id", "Movie_name", "Release_year"])
+    if found > RECO_CHOICES:
+        st.caption(f"{found} films correspondent : les {RECO_CHOICES} premiers sont proposés, affinez la recherche.")
 
-if not filtered_df.empty:
-    selected_movie = st.selectbox("Choisissez un film :", filtered_df["Movie_name"].unique())
-    
-    def recommend_movies(title, df, n=5):
-        try:
-            genres = df[df['Movie_name'] == title]['Genre'].iloc[0].split(',')
-            mask = df['Genre'].apply(lambda g: any(genre.strip() in g for genre in genres))
-            recos = df[mask & (df["Movie_name"] != title)].sort_values(by="Rating", ascending=False).head(n)
-            return recos[["Movie_name", "Genre", "Rating", "Release_year"]]
-        except Exception:
-            return pd.DataFrame()
-    
-    recos = recommend_movies(selected_movie, df)
-    if not recos.empty:
-        st.dataframe(recos, use_container_width=True, hide_index=True)
+    if choices.empty:
+        st.info("Aucun film filtré ne correspond à cette recherche.")
     else:
-        st.info("Aucune recommandation disponible pour ce film.")
+        movie_names = {row.Movie_id: f"{row.Movie_name} ({row.Release_year})" for row in choices.itertuples()}
+        selected_movie = st.selectbox("Choisissez un film :", list(movie_names), format_func=movie_names.get)
+        by_rating = st.checkbox("Privilégier les films les mieux notés parmi les plus proches", value=True)
 
-# ===============================
-# 🧾 Aperçu des données
-# ===============================
-with st.expander("🔍 Aperçu du jeu de données filtré"):
-    st.dataframe(filtered_df.head(15), use_container_width=True, hide_index=True)
+        recos = movies.recommend(selected_movie, by_rating=by_rating).drop(columns="Movie_id")
+        if not recos.empty:
+            st.dataframe(recos, use_container_width=True, hide_index=True)
+        else:
+            st.info("Aucune recommandation disponible pour ce film.")
 
 # ===============================
 # 🎯 Affichage conditionnel
 # ===============================
-if len(filtered_df) == 0:
+if len(filtered_positions) == 0:
     st.warning("🔍 Aucun film ne correspond à votre recherche. Veuillez modifier vos critères de filtrage.")
 
-elif len(filtered_df) == 1:
+elif len(filtered_positions) == 1:
     st.info("🔍 Un seul film trouvé : affichage détaillé.")
 
-    film = filtered_df.iloc[0]
+    film = movies.movies(filtered_positions[0])
 
     # --- Affichage du poster et des infos principales ---
     col1, col2 = st.columns([1, 3])
     with col1:
-        if pd.notna(film.get("Poster_URL")) and film["Poster_URL"] != "N/A":
-            st.image(film["Poster_URL"], width=250)
-        else:
-            st.image("https://via.placeholder.com/250x350?text=No+Image", width=250)
+        st.image(poster(film.get("Poster_URL")), width=250)
 
     with col2:
         st.markdown(f"### 🎬 {film['Movie_name']} ({film['Release_year']})")
@@ -215,51 +292,34 @@ elif len(filtered_df) == 1:
 
     st.divider()
 
-else:  # len(filtered_df) > 1
+else:  # len(filtered_positions) > 1
     # --- Graphiques & stats ---
     st.subheader("📊 Répartition par type de diffusion")
 
-    def diffusion_type(row):
-        return "Cinéma" if pd.notna(row["Budget"]) or pd.notna(row["Revenue"]) else "Streaming"
-
-    filtered_df["Diffusion"] = filtered_df.apply(diffusion_type, axis=1)
-    diff_counts = filtered_df["Diffusion"].value_counts().reset_index()
-    diff_counts.columns = ["Type de diffusion", "Nombre"]
+    diff_counts = view["diff_counts"]
 
     fig_diff = px.pie(diff_counts, values="Nombre", names="Type de diffusion", hole=0.4)
     st.plotly_chart(fig_diff, use_container_width=True)
 
     st.subheader("📈 Note moyenne par année de sortie")
-    yearly = filtered_df.groupby("Release_year")["Rating"].mean().reset_index()
+    yearly = view["yearly"]
     fig2 = px.line(yearly, x="Release_year", y="Rating", markers=True)
     st.plotly_chart(fig2, use_container_width=True)
 
     st.subheader("🎭 Top 10 Genres (note moyenne)")
-    genre_ratings = (
-        filtered_df.assign(Genre=filtered_df["Genre"].str.split(","))
-        .explode("Genre")
-        .groupby("Genre")["Rating"]
-        .mean()
-        .sort_values(ascending=False)
-        .head(10)
-        .reset_index()
-    )
+    genre_ratings = view["genre_ratings"]
     st.plotly_chart(px.bar(genre_ratings, x="Genre", y="Rating", color="Rating"), use_container_width=True)
 
-    # Remplacez la section "TOP 10 FILMS AVEC IMAGES" par :
-
-    # --- TOP 10 FILMS AVEC IMAGES ---
-    st.subheader("🏆 Top 10 Films selon le filtre")
+    # --- MEILLEURS FILMS AVEC IMAGES (10 par page) ---
+    st.subheader("🏆 Meilleurs films selon le filtre")
     cols_to_show = ["Poster_URL", "Movie_name", "Release_year", "Genre", "Director", "Rating", "Overview"]
-    top_movies = filtered_df.nlargest(10, "Rating")[cols_to_show]
+    start, stop = page_bounds(len(filtered_positions), "top_page", page_size=10)
+    top_movies = movies.movies(movies.top_rated(filtered_positions, stop)[start:], cols_to_show)
 
-    for _, row in top_movies.iterrows():
+    for row in top_movies.to_dict("records"):
         col1, col2 = st.columns([1, 5])  # Augmenté de [1, 4] à [1, 5] pour plus d'espace texte
         with col1:
-            if pd.notna(row["Poster_URL"]) and row["Poster_URL"] != "N/A":
-                st.image(row["Poster_URL"], width=120)  # Augmenté de 110 à 120
-            else:
-                st.image("https://via.placeholder.com/100x150?text=No+Image", width=120)
+            st.image(poster(row["Poster_URL"]), width=120)  # Augmenté de 110 à 120
         with col2:
             st.markdown(f"**{row['Movie_name']}** ({row['Release_year']})")
             st.markdown(f"🎭 *{row['Genre']}*")
@@ -279,36 +339,23 @@ else:  # len(filtered_df) > 1
 # ===============================
 # 🎬 Réalisateurs et Acteurs les plus rentables
 # ===============================
-if len(filtered_df) > 0:
+if stats["count"] > 0:
     st.subheader("🏆 Réalisateurs et Acteurs les plus rentables")
 
-    if "Director" in filtered_df.columns and "Profit" in filtered_df.columns:
-        director_profit = (
-            filtered_df.dropna(subset=["Director", "Profit"])
-            .groupby("Director")["Profit"]
-            .agg(['mean', 'median', 'count'])
-            .sort_values(by='mean', ascending=False)
-            .head(10)
-            .reset_index()
-        )
-        if not director_profit.empty:
-            st.markdown("**🎬 Top 10 Réalisateurs par profit moyen**")
-            st.dataframe(director_profit.style.format({'mean': '{:,.0f}', 'median': '{:,.0f}', 'count': '{:d}'}), use_container_width=True)
-
-    if "Top_Actors" in filtered_df.columns and "Profit" in filtered_df.columns:
-        actors_df = (
-            filtered_df.dropna(subset=["Top_Actors", "Profit"])
-            .assign(Actor=filtered_df["Top_Actors"].str.split(","))
-            .explode("Actor")
-        )
-        actors_df["Actor"] = actors_df["Actor"].str.strip()
-        actor_profit = (
-            actors_df.groupby("Actor")["Profit"]
-            .agg(['mean', 'median', 'count'])
-            .sort_values(by='mean', ascending=False)
-            .head(10)
-            .reset_index()
-        )
-        if not actor_profit.empty:
-            st.markdown("**⭐ Top 10 Acteurs par profit moyen**")
-            st.dataframe(actor_profit.style.format({'mean': '{:,.0f}', 'median': '{:,.0f}', 'count': '{:d}'}), use_container_width=True)
\ No newline at end of file
+    director_profit = view["directors"]
+    if not director_profit.empty:
+        st.markdown("**🎬 Top 10 Réalisateurs par profit moyen**")
+        st.dataframe(director_profit.style.format({'mean': '{:,.0f}', 'median': '{:,.0f}', 'count': '{:d}'}), use_container_width=True)
+
+    actor_profit = view["actors"]
+    if not actor_profit.empty:
+        st.markdown("**⭐ Top 10 Acteurs par profit moyen**")
+        st.dataframe(actor_profit.style.format({'mean': '{:,.0f}', 'median': '{:,.0f}', 'count': '{:d}'}), use_container_width=True)
+
+# ===============================
+# 🧠 Cache partagé
+# ===============================
+cache_stats = derived_cache().stats()
+with st.sidebar.expander("🧠 Cache partagé"):
+    st.caption(f"{cache_stats['entries']} résultats · {cache_stats['bytes'] / 2**20:.1f} / {cache_stats['max_bytes'] / 2**20:.0f} Mo")
+    st.caption(f"✅ {cache_stats['hits']} hits · ❌ {cache_stats['misses']} misses · 🗑️ {cache_stats['evictions']} évictions")
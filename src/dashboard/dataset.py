@@ -0,0 +1,131 @@
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+from manifest import LOCAL_ROLES, MANIFEST_FILE, manifest_file, read_manifest
+
+# ===============================
+# 🔄 VERSIONS DU JEU DE DONNÉES
+# ===============================
+POLL_INTERVAL = 30      # secondes entre deux lectures du manifeste
+RETIRE_DELAY = 60       # délai avant d'oublier l'ancienne version (exécutions en cours)
+
+# Fichiers lus quand le nettoyage n'a pas encore publié de manifeste
+LEGACY_FILES = {
+    "csv": "movies_clean.csv",
+    "parquet": "movies_clean.parquet",
+    "Genre": "movies_genres.parquet",
+    "Actor": "movies_actors.parquet",
+    "Director": "movies_directors.parquet",
+    "cube": "movies_cube.parquet",
+    "people_cube": "movies_people_cube.parquet",
+    "neighbors": "movies_neighbors.parquet",
+}
+
+
+def legacy_manifest(data_dir: Path) -> dict:
+    """Manifeste déduit des fichiers présents ; version tirée de leur taille et de leur date.
+
+    Sans manifeste publié, aucune nouvelle version n'est détectée en cours d'exécution.
+    """
+    files, digest = {}, hashlib.sha256()
+    for role, name in LEGACY_FILES.items():
+        path = data_dir / name
+        if path.exists():
+            stat = path.stat()
+            files[role] = {"path": name}
+            digest.update(f"{role}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return {"version": digest.hexdigest()[:16], "rows": None, "files": files}
+
+
+class DatasetWatcher:
+    """Suit le manifeste publié par le nettoyage et bascule de version sans interruption.
+
+    Les chargements du dashboard sont mis en cache par version. Quand le
+    manifeste annonce une nouvelle version, `warm(version)` la charge dans un
+    thread (données, index, agrégats) pendant que les sessions continuent de
+    lire l'ancienne ; la bascule n'a lieu qu'une fois tout prêt, puis
+    `retire(version)` libère les caches de l'ancienne version.
+    """
+
+    def __init__(self, data_dir: Path, warm, retire, poll_interval=POLL_INTERVAL, retire_delay=RETIRE_DELAY):
+        self.data_dir = Path(data_dir)
+        self.manifest_path = self.data_dir / MANIFEST_FILE.name
+        self.warm, self.retire = warm, retire
+        self.poll_interval, self.retire_delay = poll_interval, retire_delay
+        self.lock = threading.Lock()
+        manifest = self._read()
+        self.manifests = {manifest["version"]: manifest}
+        self.current = manifest["version"]
+        self.pending = None
+        self.checked_at = time.monotonic()
+        self.mtime = self._mtime()
+        self.swaps = 0
+
+    def _mtime(self):
+        return self.manifest_path.stat().st_mtime_ns if self.manifest_path.exists() else None
+
+    def _read(self) -> dict:
+        return read_manifest(self.manifest_path) or legacy_manifest(self.data_dir)
+
+    def manifest(self, version) -> dict:
+        return self.manifests[version]
+
+    def path(self, version, role):
+        """Chemin du fichier `role` de la version, ou None s'il n'existe pas.
+
+        La base locale (LOCAL_ROLES) a toujours son chemin : elle est
+        construite au premier chargement si elle manque (cf. sql_query.ensure_store).
+        """
+        path = manifest_file(self.manifests[version], role, self.data_dir)
+        return path if path is not None and (role in LOCAL_ROLES or path.exists()) else None
+
+    def refresh(self):
+        """Relit le manifeste au prochain appel de `version()` (données servies devenues périmées)."""
+        with self.lock:
+            self.checked_at = float("-inf")
+            self.mtime = None
+
+    def version(self) -> str:
+        """Version à servir ; lance au besoin la préparation d'une version plus récente."""
+        with self.lock:
+            now = time.monotonic()
+            if self.pending is None and now - self.checked_at >= self.poll_interval:
+                self.checked_at = now
+                mtime = self._mtime()
+                # Manifeste inchangé (date du fichier) : rien à relire
+                if mtime != self.mtime:
+                    self.mtime = mtime
+                    manifest = self._read()
+                    if manifest["version"] not in self.manifests:
+                        self.pending = manifest["version"]
+                        self.manifests[self.pending] = manifest
+                        threading.Thread(target=self._swap, args=(self.pending,), daemon=True).start()
+            return self.current
+
+    def _swap(self, version):
+        try:
+            self.warm(version)
+        except Exception as e:
+            # Version illisible (fichiers incomplets...) : on reste sur l'actuelle
+            print(f"⚠️ Version {version} ignorée : {e}")
+            with self.lock:
+                self.manifests.pop(version, None)
+                self.pending = None
+                self.mtime = None       # nouvel essai à la prochaine lecture
+            return
+        with self.lock:
+            old, self.current, self.pending = self.current, version, None
+            self.swaps += 1
+        print(f"🔄 Jeu de données : version {old} -> {version}")
+        timer = threading.Timer(self.retire_delay, self._retire, args=(old,))
+        timer.daemon = True
+        timer.start()
+
+    def _retire(self, version):
+        with self.lock:
+            if version == self.current:
+                return
+            self.manifests.pop(version, None)
+        self.retire(version)
@@ -0,0 +1,112 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ===============================
+# 🧠 CACHE PARTAGÉ DES RÉSULTATS DÉRIVÉS
+# ===============================
+MAX_BYTES = 256 * 1024 * 1024   # plafond mémoire du cache (toutes sessions confondues)
+
+
+def estimate_size(value) -> int:
+    """Taille approximative en mémoire (octets) d'un résultat mis en cache."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Tableaux numpy en lecture seule : un résultat partagé ne doit pas être modifié par une session."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _freeze(v)
+    return value
+
+
+class DerivedCache:
+    """Cache LRU des résultats dérivés (sélections, agrégats...), commun à toutes les sessions.
+
+    Une entrée est identifiée par (version du jeu de données, nature du
+    résultat, signature des filtres). Les moins récemment lues sont évincées
+    dès que la taille estimée dépasse `max_bytes` ; les compteurs
+    hits / misses / evictions servent à dimensionner ce plafond.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    # clé -> (valeur, taille)
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, version, kind, signature, compute):
+        """Résultat en cache pour la clé, sinon `compute()` (calculé hors verrou, puis gardé)."""
+        key = (version, kind, signature)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = _freeze(compute())
+        size = estimate_size(value)
+        with self.lock:
+            if key in self.entries:
+                # Calculé entre-temps par une autre session : on garde le premier
+                return self.entries[key][0]
+            if size > self.max_bytes:
+                return value
+            self.entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+        return value
+
+    def peek(self, version, kind, signature):
+        """Résultat en cache pour la clé, ou None (sans compter de miss : voir `get`)."""
+        key = (version, kind, signature)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def drop_version(self, version):
+        """Oublie les résultats d'une version du jeu de données (et eux seuls)."""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == version]:
+                self.size -= self.entries.pop(key)[1]
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else float("nan"),
+            }
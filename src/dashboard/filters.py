@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import DIFFUSION_CINEMA, DIFFUSION_STREAMING, diffusion_column
+
+# ===============================
+# 🧮 INDEX DE FILTRES (BITMAPS)
+# ===============================
+
+
+def _pack(bits):
+    return np.packbits(bits)
+
+
+class FilterIndex:
+    """Un bitmap par valeur de Genre, Release_decade, Source et Diffusion.
+
+    Calculé une fois au chargement des données : une combinaison de filtres
+    se résout ensuite par ET bit à bit des bitmaps, sans parcourir les
+    colonnes. Le genre est comparé exactement (table de liaison film ↔
+    genre), et non plus par sous-chaîne.
+    """
+
+    def __init__(self, df: pd.DataFrame, genres: pd.DataFrame):
+        self.size = len(df)
+        self.bitmaps = {}
+
+        # Genre : positions des films de chaque couple (Movie_id, Genre)
+        positions = pd.Index(df["Movie_id"]).get_indexer(genres["Movie_id"])
+        known = positions >= 0
+        self.bitmaps["Genre"] = self._from_codes(
+            *pd.factorize(genres["Genre"].to_numpy()[known]), positions[known])
+
+        for column in ["Release_decade", "Source"]:
+            if column in df.columns:
+                self.bitmaps[column] = self._from_codes(*pd.factorize(df[column].to_numpy()))
+
+        cinema = diffusion_column(df) == DIFFUSION_CINEMA
+        self.bitmaps["Diffusion"] = {DIFFUSION_CINEMA: _pack(cinema), DIFFUSION_STREAMING: _pack(~cinema)}
+
+    def _from_codes(self, codes, uniques, positions=None):
+        """Bitmaps {valeur: bits} ; `positions` donne la ligne de chaque code (par défaut, son rang)."""
+        if positions is None:
+            positions = np.arange(len(codes))
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        bitmaps = {}
+        for code, value in enumerate(uniques):
+            bits = np.zeros(self.size, dtype=bool)
+            bits[positions[order[bounds[code]:bounds[code + 1]]]] = True
+            bitmaps[value] = _pack(bits)
+        return bitmaps
+
+    def _unpack(self, packed):
+        return np.unpackbits(packed, count=self.size).view(bool)
+
+    def mask(self, within=None, **selected) -> np.ndarray:
+        """Masque booléen des films qui ont chacune des valeurs `selected`.
+
+        `within` restreint le résultat à un masque existant ; une valeur
+        None ne filtre pas sa dimension, une valeur inconnue ne garde rien.
+        """
+        packed = [] if within is None else [_pack(within)]
+        for dimension, value in selected.items():
+            if value is None:
+                continue
+            bits = self.bitmaps[dimension].get(value)
+            if bits is None:
+                return np.zeros(self.size, dtype=bool)
+            packed.append(bits)
+        if not packed:
+            return np.ones(self.size, dtype=bool)
+        return self._unpack(np.bitwise_and.reduce(packed))
+
+    def values(self, dimension, within=None) -> list:
+        """Valeurs de `dimension` présentes dans au moins un film de `within`, triées."""
+        within = None if within is None else _pack(within)
+        return sorted(
+            value for value, bits in self.bitmaps[dimension].items()
+            if within is None or np.bitwise_and(bits, within).any()
+        )
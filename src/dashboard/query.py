@@ -0,0 +1,275 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import build_cube, build_people_cube, count_by, mean_by, slice_cube, summary, top_people
+from clean_movie import add_movie_ids, build_bridge_tables
+from derived import DerivedCache
+from filters import FilterIndex
+from manifest import read_published
+from recommender import SimilarityIndex
+from search import SearchIndex
+from textfold import tokenize
+
+# ===============================
+# 🗃️ JEU DE DONNÉES CHARGÉ
+# ===============================
+BRIDGE_NAMES = ["Genre", "Actor", "Director"]
+# Filtres d'une requête ; None (ou "" pour la recherche) : pas de filtre
+FILTER_KEYS = ["query", "genre", "source", "decade", "diffusion"]
+
+
+def read_movies(parquet_path=None, csv_path=None) -> pd.DataFrame:
+    """Films nettoyés, dédoublonnés et filtrés comme les affiche le dashboard."""
+    if parquet_path is not None:
+        # Types déjà fixés à l'écriture (catégories, Int16, booléens) : aucune conversion
+        df = pd.read_parquet(parquet_path)
+        df = df.drop_duplicates(subset=["Movie_name", "Source"])
+        return df.dropna(subset=["Rating", "Release_year"])
+
+    df = pd.read_csv(csv_path)
+    if "Movie_id" not in df.columns:
+        df = add_movie_ids(df)
+    df = df.drop_duplicates(subset=["Movie_name", "Source"])
+    df = df[df["Rating"].notna()]
+    df["Rating"] = pd.to_numeric(df["Rating"], errors="coerce")
+    df["Release_year"] = pd.to_numeric(df["Release_year"], errors="coerce")
+    df = df.dropna(subset=["Release_year"])
+    df["Release_year"] = df["Release_year"].astype(int)
+    df["Genre"] = df["Genre"].fillna("Autre")
+
+    for col in ["ROI", "Profit", "Budget", "Revenue"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    return df
+
+
+class Dataset:
+    """Une version du jeu de données : films, tables de liaison, cubes et index.
+
+    `path(role)` donne le fichier d'un rôle du manifeste (ou None), `files`
+    les entrées du manifeste. Chaque élément est construit au premier accès,
+    une seule fois même si plusieurs threads le demandent ; `warm()` les
+    construit tous d'avance. Chaque fichier lu est vérifié contre le sha256
+    du manifeste : un fichier déjà remplacé par la version suivante lève
+    manifest.StaleFileError au lieu de mêler deux versions.
+    """
+
+    def __init__(self, version, path, files=None):
+        self.version = version
+        self.path = path
+        self.files = files or {}
+        self._built = {}
+        self._lock = threading.RLock()
+
+    def _read(self, role):
+        """Contenu vérifié du fichier `role` (cf. manifest.read_published)."""
+        return read_published(self.path(role), self.files.get(role))
+
+    def _get(self, name, build):
+        if name not in self._built:
+            with self._lock:
+                if name not in self._built:
+                    self._built[name] = build()
+        return self._built[name]
+
+    @property
+    def df(self) -> pd.DataFrame:
+        def build():
+            if self.path("parquet") is not None:
+                return read_movies(self._read("parquet"))
+            return read_movies(csv_path=self._read("csv"))
+        return self._get("df", build)
+
+    @property
+    def bridges(self) -> dict:
+        """Tables de liaison Movie_id ↔ Genre / Actor / Director produites par le nettoyage."""
+        def build():
+            paths = {name: self.path(name) for name in BRIDGE_NAMES}
+            if all(path is not None for path in paths.values()):
+                return {name: pd.read_parquet(self._read(name)) for name in paths}
+            return build_bridge_tables(self.df)
+        return self._get("bridges", build)
+
+    @property
+    def cubes(self) -> tuple:
+        """Cubes d'agrégats (films, puis réalisateurs et acteurs) produits par le nettoyage."""
+        def build():
+            roles = ["cube", "people_cube"]
+            if all(self.path(role) is not None for role in roles):
+                return tuple(pd.read_parquet(self._read(role)) for role in roles)
+            return build_cube(self.df, self.bridges["Genre"]), build_people_cube(self.df, self.bridges)
+        return self._get("cubes", build)
+
+    @property
+    def filter_index(self) -> FilterIndex:
+        return self._get("filter_index", lambda: FilterIndex(self.df, self.bridges["Genre"]))
+
+    @property
+    def search_index(self) -> SearchIndex:
+        return self._get("search_index", lambda: SearchIndex(self.df))
+
+    @property
+    def similarity_index(self) -> SimilarityIndex:
+        """Voisins publiés par le nettoyage ; calculés ici seulement s'ils manquent (jeu antérieur)."""
+        def build():
+            if self.path("neighbors") is not None:
+                return SimilarityIndex(self.df, neighbors=pd.read_parquet(self._read("neighbors")))
+            return SimilarityIndex(self.df, self.bridges)
+        return self._get("similarity_index", build)
+
+    @property
+    def ratings(self) -> np.ndarray:
+        return self._get("ratings", lambda: self.df["Rating"].to_numpy(dtype=float))
+
+    @property
+    def ids(self) -> pd.Index:
+        """Movie_id -> position dans `df`."""
+        return self._get("ids", lambda: pd.Index(self.df["Movie_id"]))
+
+    def warm(self):
+        for name in ["df", "bridges", "cubes", "filter_index", "search_index", "similarity_index", "ratings", "ids"]:
+            getattr(self, name)
+        return self
+
+    def is_current(self) -> bool:
+        """Toujours vrai : une version chargée (cf. warm) ne relit plus ses fichiers."""
+        return True
+
+# ===============================
+# 🔎 REQUÊTES
+# ===============================
+def top_order(ratings, stop) -> np.ndarray:
+    """Indices des `stop` plus grandes valeurs de `ratings`, par valeur décroissante puis par rang.
+
+    Tri partiel : seules les `stop` meilleures sont triées, pas toute la sélection.
+    """
+    if stop < len(ratings):
+        kth = np.partition(ratings, len(ratings) - stop)[len(ratings) - stop]
+        above = np.flatnonzero(ratings > kth)
+        ties = np.flatnonzero(ratings == kth)[:stop - len(above)]
+        keep = np.concatenate([above, ties])
+    else:
+        keep = np.arange(len(ratings))
+    return keep[np.lexsort((keep, -ratings[keep]))]
+
+
+def filter_signature(filters: dict) -> tuple:
+    """Clé de cache des filtres : la recherche ne compte que par ses mots (« Amélie » = « amelie »)."""
+    query = filters.get("query") or ""
+    return (tuple(tokenize(query)) if query else None, *(filters.get(key) for key in FILTER_KEYS[1:]))
+
+
+class MovieQuery:
+    """Filtres, recherche, agrégats et recommandations sur une version du jeu de données.
+
+    Utilisé tel quel par le dashboard et par l'API HTTP. Les résultats sont
+    gardés dans `cache` (partagé, cf. derived.DerivedCache) sous la version
+    du jeu de données et la signature des filtres ; les tableaux et
+    DataFrames retournés sont partagés et ne doivent pas être modifiés.
+    """
+
+    def __init__(self, dataset: Dataset, cache: DerivedCache = None):
+        self.dataset = dataset
+        self.cache = cache if cache is not None else DerivedCache()
+
+    def _cached(self, kind, signature, compute):
+        return self.cache.get(self.dataset.version, kind, signature, compute)
+
+    def search(self, query):
+        """(positions du plus pertinent au moins pertinent, masque des films trouvés), ou (None, None) sans recherche."""
+        if not query:
+            return None, None
+
+        def compute():
+            ranked = self.dataset.search_index.search(query)
+            selection = np.zeros(len(self.dataset.df), dtype=bool)
+            selection[ranked] = True
+            return ranked, selection
+        return self._cached("search", tuple(tokenize(query)), compute)
+
+    def options(self, query=None) -> dict:
+        """Valeurs proposées pour chaque filtre (restreintes aux films trouvés par la recherche)."""
+        _, selection = self.search(query)
+        index = self.dataset.filter_index
+        return self._cached("options", tuple(tokenize(query)) if query else None, lambda: {
+            dimension: index.values(dimension, within=selection)
+            for dimension in ["Genre", "Source", "Release_decade"] if dimension in index.bitmaps
+        })
+
+    def positions(self, filters: dict) -> np.ndarray:
+        """Positions des films retenus : par pertinence pour une recherche, sinon dans l'ordre du fichier."""
+        return self.view(filters)["positions"]
+
+    def view(self, filters: dict) -> dict:
+        """Films retenus et tous les agrégats affichés pour cette combinaison de filtres."""
+        return self._cached("view", filter_signature(filters), lambda: self._compute_view(filters))
+
+    def _compute_view(self, filters):
+        ranked, selection = self.search(filters.get("query"))
+        genre = filters.get("genre")
+        dimensions = {
+            "Source": filters.get("source"),
+            "Release_decade": filters.get("decade"),
+            "Diffusion": filters.get("diffusion"),
+        }
+
+        # ET bit à bit des bitmaps précalculés ; les lignes ne sont extraites qu'à la fin
+        mask = self.dataset.filter_index.mask(within=selection, Genre=genre, **dimensions)
+        positions = np.flatnonzero(mask) if ranked is None else ranked[mask[ranked]]
+
+        # Métriques et graphiques sont lus dans le cube précalculé ; une recherche
+        # libre n'est pas une dimension du cube : on agrège alors ses seules lignes.
+        if selection is None:
+            cube, people_cube = self.dataset.cubes
+        else:
+            found_df = self.dataset.df.iloc[positions]
+            bridges = self.dataset.bridges
+            cube, people_cube = build_cube(found_df, bridges["Genre"]), build_people_cube(found_df, bridges)
+        cells = slice_cube(cube, genre, **dimensions)
+        people_cells = slice_cube(people_cube, genre, **dimensions)
+        stats = summary(cells)
+
+        recent_years = cells[cells["Release_year"] >= stats["year_max"] - 5] if stats["count"] > 0 else cells.iloc[:0]
+        view = {
+            "positions": positions,
+            "stats": stats,
+            "genre_perf": mean_by(recent_years, "Genre").sort_values(ascending=False, kind="stable"),
+        }
+        if len(positions) > 1:
+            diff_counts = count_by(cells, "Diffusion").reset_index()
+            diff_counts.columns = ["Type de diffusion", "Nombre"]
+            view["diff_counts"] = diff_counts
+            view["yearly"] = mean_by(cells, "Release_year").reset_index()
+            view["genre_ratings"] = mean_by(cells, "Genre").sort_values(ascending=False, kind="stable").head(10).reset_index()
+        if stats["count"] > 0:
+            view["directors"] = top_people(people_cells, "Director")
+            view["actors"] = top_people(people_cells, "Actor")
+        return view
+
+    def top_rated(self, positions, stop) -> np.ndarray:
+        """Les `stop` premières positions par note décroissante (comme nlargest : à égalité, ordre du fichier)."""
+        return positions[top_order(self.dataset.ratings[positions], stop)]
+
+    def position(self, movie_id):
+        """Position du film `movie_id`, ou None s'il n'existe pas dans cette version."""
+        position = self.dataset.ids.get_indexer([movie_id])[0]
+        return None if position < 0 else int(position)
+
+    @property
+    def columns(self) -> list:
+        return list(self.dataset.df.columns)
+
+    def movies(self, positions, columns=None) -> pd.DataFrame:
+        df = self.dataset.df
+        return df.iloc[positions] if columns is None else df.iloc[positions][columns]
+
+    def recommend(self, movie_id, n=5, by_rating=False) -> pd.DataFrame:
+        """Films proches de `movie_id` : genres, casting, réalisateur, résumé et durée (cf. recommender.SimilarityIndex)."""
+        def compute():
+            positions, scores = self.dataset.similarity_index.recommend(movie_id, n, by_rating=by_rating)
+            recos = self.dataset.df.iloc[positions][["Movie_id", "Movie_name", "Genre", "Rating", "Release_year"]]
+            return recos.assign(Similarity=scores.astype(np.float64).round(2))
+        return self._cached("recommend", (int(movie_id), n, by_rating), compute)
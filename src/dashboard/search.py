@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from textfold import FIELDS, tokenize
+
+# ===============================
+# 🔎 INDEX DE RECHERCHE PLEIN TEXTE
+# ===============================
+# Champs indexés et poids (FIELDS) et découpage en mots : cf. textfold.py
+PREFIX_WEIGHT = 0.8     # un mot complété (saisie en cours) compte un peu moins qu'un mot exact
+MAX_EXPANSIONS = 64     # mots du vocabulaire retenus au plus pour un préfixe
+
+
+class SearchIndex:
+    """Index inversé mot -> films sur les champs de FIELDS.
+
+    Construit une fois au chargement. Chaque mot de la requête est cherché
+    comme préfixe (recherche pendant la saisie) ; un film doit contenir tous
+    les mots, et son score cumule, mot par mot, le poids du meilleur champ
+    multiplié par l'IDF du mot. Le coût d'une requête dépend de la taille
+    des listes de films des mots cherchés, pas d'un parcours du catalogue.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        token_ids = {}
+        keys, weights = [], []
+        for field, weight in FIELDS.items():
+            if field not in df.columns:
+                continue
+            values = df[field].astype(object).where(df[field].notna() & df[field].ne("N/A"), "")
+            # Un même texte (réalisateur, acteur...) n'est découpé qu'une fois
+            codes, uniques = pd.factorize(values.to_numpy())
+            words = [[token_ids.setdefault(token, len(token_ids)) for token in dict.fromkeys(tokenize(str(text)))]
+                     for text in uniques]
+            lengths = np.array([len(w) for w in words], dtype=np.int64)
+            flat = np.fromiter((t for w in words for t in w), dtype=np.int64, count=lengths.sum())
+            # Mots de chaque film : on recopie ceux de son texte (sans boucle sur les films)
+            row_lengths = lengths[codes]
+            row_starts = np.repeat((np.cumsum(lengths) - lengths)[codes], row_lengths)
+            within = np.arange(row_lengths.sum()) - np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+            tokens = flat[row_starts + within]
+            keys.append(tokens * n + np.repeat(np.arange(n), row_lengths))
+            weights.append(np.full(len(tokens), weight))
+
+        # Vocabulaire trié (pour les préfixes), puis un couple (mot, film) par ligne
+        vocab = np.array(list(token_ids), dtype=str)
+        rank = np.empty(len(vocab), dtype=np.int64)
+        rank[np.argsort(vocab, kind="stable")] = np.arange(len(vocab))
+        keys, weights = np.concatenate(keys or [np.empty(0, np.int64)]), np.concatenate(weights or [np.empty(0)])
+        keys = rank[keys // max(n, 1)] * n + keys % max(n, 1)
+        order = np.lexsort((-weights, keys))
+        keys, weights = keys[order], weights[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]           # le meilleur champ du film l'emporte
+        keys, weights = keys[first], weights[first]
+
+        self.vocab = np.sort(vocab)
+        counts = np.bincount(keys // max(n, 1), minlength=len(vocab))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.positions = keys % max(n, 1)
+        idf = np.log1p(n / np.maximum(counts, 1))
+        self.scores = weights * np.repeat(idf, counts)
+
+    def _term(self, term):
+        """Positions et scores des films contenant `term` ou un mot qui commence par `term`."""
+        lo = np.searchsorted(self.vocab, term, side="left")
+        hi = np.searchsorted(self.vocab, term + "\uffff", side="left")
+        if lo == hi:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        words = np.arange(lo, hi)
+        if len(words) > MAX_EXPANSIONS:
+            # Préfixe très court : on garde les mots les plus fréquents
+            sizes = self.offsets[words + 1] - self.offsets[words]
+            words = np.sort(words[np.argsort(-sizes, kind="stable")[:MAX_EXPANSIONS]])
+        positions, scores = [], []
+        for word in words:
+            span = slice(self.offsets[word], self.offsets[word + 1])
+            positions.append(self.positions[span])
+            scores.append(self.scores[span] * (1.0 if self.vocab[word] == term else PREFIX_WEIGHT))
+        positions, scores = np.concatenate(positions), np.concatenate(scores)
+        if len(words) == 1:
+            return positions, scores
+        # Un film trouvé par plusieurs complétions garde la meilleure
+        order = np.lexsort((-scores, positions))
+        positions, scores = positions[order], scores[order]
+        first = np.ones(len(positions), dtype=bool)
+        first[1:] = positions[1:] != positions[:-1]
+        return positions[first], scores[first]
+
+    def search(self, query: str) -> np.ndarray:
+        """Positions (dans le DataFrame indexé) des films trouvés, du plus pertinent au moins pertinent."""
+        terms = tokenize(query)
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+        positions, scores = self._term(terms[0])
+        for term in terms[1:]:
+            other_positions, other_scores = self._term(term)
+            positions, mine, theirs = np.intersect1d(positions, other_positions, assume_unique=True, return_indices=True)
+            scores = scores[mine] + other_scores[theirs]
+        return positions[np.lexsort((positions, -scores))]
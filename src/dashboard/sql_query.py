@@ -0,0 +1,372 @@
+import contextlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from clean_movie import PARQUET_DTYPES
+from derived import DerivedCache
+from manifest import StaleFileError, read_published
+from query import Dataset, MovieQuery, filter_signature, top_order
+from recommender import TOP_K, WEIGHTS
+from textfold import FIELDS, tokenize
+from store import BRIDGE_TABLES, MOVIE_COLUMNS, connect, store_version, write_store
+
+# ===============================
+# 🗄️ JEU DE DONNÉES SQLITE
+# ===============================
+# "memory" : tout en pandas (query.Dataset) ; "sql" : requêtes sur la base
+# SQLite du nettoyage ; "auto" : SQL au-delà de MEMORY_MAX_ROWS films
+BACKEND = os.environ.get("POPCORN_BACKEND", "auto")
+MEMORY_MAX_ROWS = int(os.environ.get("POPCORN_MEMORY_MAX_ROWS", 500_000))
+# Colonnes internes à la base, jamais renvoyées
+HIDDEN_COLUMNS = {"Diffusion", "Position", "Row_hash"}
+# Types des colonnes lues, comme dans le Parquet (hors catégories)
+SQL_DTYPES = {col: dtype for col, dtype in PARQUET_DTYPES.items() if dtype != "category"}
+IN_BATCH = 500          # identifiants par clause IN (limite de variables SQLite)
+_build_lock = threading.Lock()
+
+
+class SqlDataset:
+    """Une version du jeu de données servie par la base SQLite (cf. store.MovieStore).
+
+    Seuls l'identifiant, la note et le rang de chaque film sont gardés en
+    mémoire (pour trier une sélection par note) ; filtres, agrégats et
+    recherche sont exécutés par SQLite. Une connexion en lecture seule est
+    ouverte par thread.
+
+    La base est mise à jour sur place par le nettoyage suivant : chaque
+    requête lit, dans la même transaction, la version de la base (table
+    meta) et lève manifest.StaleFileError si ce n'est plus `version`, au
+    lieu de servir les films d'une autre version.
+    """
+
+    def __init__(self, version, path):
+        self.version = version
+        self.path = path
+        self._local = threading.local()
+        self._built = {}
+        self._lock = threading.Lock()
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path("store"), readonly=True)
+        return conn
+
+    def _read(self, read):
+        """`read(conn)` dans une transaction de lecture, si la base contient encore cette version."""
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            stored = store_version(conn)
+            if stored != self.version:
+                raise StaleFileError(f"base SQLite en version {stored}, et non {self.version}")
+            return read(conn)
+        finally:
+            conn.execute("COMMIT")
+
+    def query(self, sql, params=()) -> pd.DataFrame:
+        return self._read(lambda conn: pd.read_sql_query(sql, conn, params=list(params)))
+
+    def scalar_rows(self, sql, params=()) -> list:
+        return self._read(lambda conn: conn.execute(sql, list(params)).fetchall())
+
+    def is_current(self) -> bool:
+        """Vrai tant que la base contient cette version (faux dès qu'un nettoyage l'a mise à jour)."""
+        return store_version(self.connection()) == self.version
+
+    def _keys(self):
+        if "keys" not in self._built:
+            with self._lock:
+                if "keys" not in self._built:
+                    keys = self.query("SELECT Movie_id, Rating FROM movies ORDER BY Position")
+                    self._built["keys"] = (pd.Index(keys["Movie_id"].to_numpy()),
+                                           keys["Rating"].to_numpy(dtype=float))
+        return self._built["keys"]
+
+    @property
+    def ids(self) -> pd.Index:
+        """Movie_id -> rang dans le fichier nettoyé."""
+        return self._keys()[0]
+
+    @property
+    def ratings(self) -> np.ndarray:
+        return self._keys()[1]
+
+    @property
+    def columns(self) -> list:
+        return [col for col in MOVIE_COLUMNS if col not in HIDDEN_COLUMNS]
+
+    def ratings_of(self, ids) -> np.ndarray:
+        """Notes des films `ids` ; NaN pour un film absent des clés de cette version."""
+        indexer = self.ids.get_indexer(ids)
+        return np.where(indexer >= 0, self.ratings[indexer], np.nan)
+
+    def warm(self):
+        self._keys()
+        return self
+
+
+def use_store(manifest, backend=BACKEND) -> bool:
+    """Vrai si la version décrite par `manifest` doit être servie par la base SQLite."""
+    if backend == "memory" or "store" not in manifest.get("files", {}):
+        return False
+    rows = manifest.get("rows")
+    return backend == "sql" or (rows is not None and rows > MEMORY_MAX_ROWS)
+
+
+def _stored_version(store):
+    with contextlib.closing(connect(store, readonly=True)) as conn:
+        return store_version(conn)
+
+
+def ensure_store(path, manifest):
+    """Met la base SQLite à la version du manifeste, depuis ses Parquet, si elle est absente ou autre.
+
+    La base n'est pas versionnée dans git : un clone neuf (ou un autre
+    emplacement que celui du nettoyage) la construit au premier chargement,
+    et une base d'une autre version (nettoyage sans --store...) est alignée
+    par upsert. Les Parquet sont vérifiés contre les entrées du manifeste :
+    s'ils appartiennent déjà à une version plus récente, StaleFileError est
+    levée et la base n'est pas ramenée en arrière.
+    """
+    files = manifest.get("files", {})
+    store = path("store")
+    with _build_lock:
+        if not store.exists() or _stored_version(store) != manifest["version"]:
+            df = pd.read_parquet(read_published(path("parquet"), files.get("parquet")))
+            bridges = {name: pd.read_parquet(read_published(path(name), files.get(name))) for name in BRIDGE_TABLES}
+            write_store(df, bridges, store, version=manifest["version"])
+    return store
+
+
+def open_dataset(version, path, manifest, backend=BACKEND):
+    """query.Dataset (pandas) ou SqlDataset selon `backend` et la taille du catalogue."""
+    if not use_store(manifest, backend):
+        return Dataset(version, path, manifest.get("files"))
+    ensure_store(path, manifest)
+    return SqlDataset(version, path)
+
+
+def movie_query(dataset, cache: DerivedCache = None):
+    """Requêtes adaptées au jeu de données : SqlMovieQuery ou query.MovieQuery."""
+    return SqlMovieQuery(dataset, cache) if isinstance(dataset, SqlDataset) else MovieQuery(dataset, cache)
+
+# ===============================
+# 🔎 REQUÊTES SQL
+# ===============================
+def _match(query) -> str:
+    """Requête FTS5 : chaque mot comme préfixe, tous requis (comme search.SearchIndex)."""
+    return " ".join(f'"{term}"*' for term in tokenize(query))
+
+
+# Score BM25 pondéré par champ, avec les poids de textfold.FIELDS (plus petit = plus pertinent)
+RANK = f"bm25(movies_fts, {', '.join(str(weight) for weight in FIELDS.values())})"
+
+
+class SqlMovieQuery:
+    """Même interface que query.MovieQuery, calculée en SQL sur une SqlDataset.
+
+    Les « positions » sont ici des Movie_id : `view`, `top_rated`, `movies`
+    et `position` les manipulent de la même façon. Les résultats sont gardés
+    dans le même cache partagé (cf. derived.DerivedCache).
+    """
+
+    def __init__(self, dataset: SqlDataset, cache: DerivedCache = None):
+        self.dataset = dataset
+        self.cache = cache if cache is not None else DerivedCache()
+
+    def _cached(self, kind, signature, compute):
+        return self.cache.get(self.dataset.version, kind, signature, compute)
+
+    @property
+    def columns(self) -> list:
+        return self.dataset.columns
+
+    @staticmethod
+    def _where(filters) -> tuple:
+        """Clause WHERE (sur `movies m`) et paramètres des filtres ; la recherche est jointe à part."""
+        clauses, params = ["1"], []
+        if filters.get("genre") is not None:
+            clauses.append("m.Movie_id IN (SELECT Movie_id FROM movie_genres WHERE Genre = ?)")
+            params.append(filters["genre"])
+        for key, column in [("source", "Source"), ("decade", "Release_decade"), ("diffusion", "Diffusion")]:
+            if filters.get(key) is not None:
+                clauses.append(f"m.{column} = ?")
+                params.append(filters[key])
+        if filters.get("query"):
+            # Une recherche sans aucun mot ne trouve rien (comme search.SearchIndex)
+            if tokenize(filters["query"]):
+                clauses.append("m.Movie_id IN (SELECT rowid FROM movies_fts WHERE movies_fts MATCH ?)")
+                params.append(_match(filters["query"]))
+            else:
+                clauses.append("0")
+        return " AND ".join(clauses), params
+
+    def _ids(self, sql, params) -> np.ndarray:
+        rows = self.dataset.scalar_rows(sql, params)
+        return np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+
+    def search(self, query):
+        """(Movie_id du plus pertinent au moins pertinent, les mêmes triés), ou (None, None) sans recherche."""
+        if not query:
+            return None, None
+
+        def compute():
+            if not tokenize(query):
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+            ranked = self._ids(
+                f"SELECT f.rowid FROM movies_fts f JOIN movies m ON m.Movie_id = f.rowid "
+                f"WHERE movies_fts MATCH ? ORDER BY {RANK}, m.Position", [_match(query)])
+            return ranked, np.sort(ranked)
+        return self._cached("search", tuple(tokenize(query)), compute)
+
+    def options(self, query=None) -> dict:
+        """Valeurs proposées pour chaque filtre (restreintes aux films trouvés par la recherche)."""
+        def compute():
+            where, params = self._where({"query": query})
+            genres = self.dataset.scalar_rows(
+                f"SELECT DISTINCT g.Genre FROM movie_genres g JOIN movies m USING (Movie_id) WHERE {where} ORDER BY 1", params)
+            options = {"Genre": [row[0] for row in genres]}
+            for column in ["Source", "Release_decade"]:
+                values = self.dataset.scalar_rows(
+                    f"SELECT DISTINCT m.{column} FROM movies m WHERE {where} AND m.{column} IS NOT NULL ORDER BY 1", params)
+                options[column] = [row[0] for row in values]
+            return options
+        return self._cached("options", tuple(tokenize(query)) if query else None, compute)
+
+    def positions(self, filters: dict) -> np.ndarray:
+        return self.view(filters)["positions"]
+
+    def view(self, filters: dict) -> dict:
+        """Films retenus et agrégats, avec les mêmes clés que query.MovieQuery.view."""
+        return self._cached("view", filter_signature(filters), lambda: self._compute_view(filters))
+
+    def _compute_view(self, filters):
+        where, params = self._where(filters)
+        if filters.get("query"):
+            ranked, _ = self.search(filters["query"])
+            kept = set(self._ids(f"SELECT m.Movie_id FROM movies m WHERE {where}", params).tolist())
+            ids = np.array([movie_id for movie_id in ranked.tolist() if movie_id in kept], dtype=np.int64)
+        else:
+            ids = self._ids(f"SELECT m.Movie_id FROM movies m WHERE {where} ORDER BY m.Position", params)
+
+        count, rating, year_min, year_max, roi, profitable, profit = self.dataset.scalar_rows(
+            f"SELECT COUNT(*), AVG(m.Rating), MIN(m.Release_year), MAX(m.Release_year), AVG(m.ROI), "
+            f"AVG(m.Is_profitable), AVG(m.Profit) FROM movies m WHERE {where}", params)[0]
+        nan = float("nan")
+        stats = {
+            "count": count,
+            "rating": nan if rating is None else rating,
+            "year_min": nan if year_min is None else year_min,
+            "year_max": nan if year_max is None else year_max,
+            "roi": nan if roi is None else roi,
+            "profitable_rate": nan if profitable is None else profitable,
+            "profit": nan if profit is None else profit,
+        }
+
+        def by_genre(extra="", extra_params=()):
+            return self.dataset.query(
+                f"SELECT g.Genre, AVG(m.Rating) AS Rating FROM movies m JOIN movie_genres g USING (Movie_id) "
+                f"WHERE {where}{extra} GROUP BY g.Genre HAVING COUNT(m.Rating) > 0 ORDER BY Rating DESC, g.Genre",
+                [*params, *extra_params]).astype({"Rating": "float64"})
+
+        genre_perf = (by_genre(" AND m.Release_year >= ?", [year_max - 5]) if count else by_genre(" AND 0"))
+        view = {
+            "positions": ids,
+            "stats": stats,
+            "genre_perf": genre_perf.set_index("Genre")["Rating"],
+        }
+        if len(ids) > 1:
+            view["diff_counts"] = self.dataset.query(
+                f'SELECT m.Diffusion AS "Type de diffusion", COUNT(*) AS Nombre FROM movies m WHERE {where} '
+                f"GROUP BY m.Diffusion ORDER BY Nombre DESC", params)
+            view["yearly"] = self.dataset.query(
+                f"SELECT m.Release_year, AVG(m.Rating) AS Rating FROM movies m WHERE {where} "
+                f"GROUP BY m.Release_year HAVING COUNT(m.Rating) > 0 ORDER BY m.Release_year", params)
+            view["genre_ratings"] = by_genre().head(10)
+        if count > 0:
+            view["directors"] = self._top_people("Director", where, params)
+            view["actors"] = self._top_people("Actor", where, params)
+        return view
+
+    def _top_people(self, role, where, params, n=10) -> pd.DataFrame:
+        """Comme aggregates.top_people : profit moyen, médian et nombre de films des `n` meilleurs."""
+        table = BRIDGE_TABLES[role]
+        top = self.dataset.query(
+            f"SELECT p.{role}, AVG(m.Profit) AS mean, COUNT(m.Profit) AS count FROM movies m "
+            f"JOIN {table} p USING (Movie_id) WHERE {where} AND m.Profit IS NOT NULL "
+            f"GROUP BY p.{role} ORDER BY mean DESC, p.{role} LIMIT ?", [*params, n])
+        if top.empty:
+            return pd.DataFrame({role: [], "mean": [], "median": [], "count": pd.Series([], dtype="int64")})
+        names = top[role].tolist()
+        profits = self.dataset.query(
+            f"SELECT p.{role}, m.Profit FROM movies m JOIN {table} p USING (Movie_id) "
+            f"WHERE {where} AND m.Profit IS NOT NULL AND p.{role} IN ({', '.join('?' * len(names))})",
+            [*params, *names])
+        medians = profits.groupby(role)["Profit"].median()
+        return pd.DataFrame({
+            role: top[role].to_numpy(),
+            "mean": top["mean"].to_numpy(dtype=float),
+            "median": medians.reindex(names).to_numpy(dtype=float),
+            "count": top["count"].astype("int64").to_numpy(),
+        })
+
+    def top_rated(self, ids, stop) -> np.ndarray:
+        """Les `stop` premiers Movie_id par note décroissante (à égalité, dans l'ordre de `ids`).
+
+        Les films inconnus des clés de cette version sont écartés.
+        """
+        ratings = self.dataset.ratings_of(ids)
+        known = ~np.isnan(ratings)
+        return np.asarray(ids)[known][top_order(ratings[known], stop)]
+
+    def position(self, movie_id):
+        """`movie_id` s'il existe dans cette version, sinon None."""
+        return int(movie_id) if self.dataset.ids.get_indexer([movie_id])[0] >= 0 else None
+
+    def movies(self, ids, columns=None):
+        """Films `ids` dans cet ordre (DataFrame), ou un seul film (Series) pour un identifiant seul."""
+        single = np.ndim(ids) == 0
+        ids = [int(i) for i in np.atleast_1d(ids)]
+        columns = columns or self.columns
+        select = ", ".join(dict.fromkeys(["Movie_id", *columns]))
+        parts = [self.dataset.query(f"SELECT {select} FROM movies WHERE Movie_id IN ({', '.join('?' * len(batch))})",
+                                    batch)
+                 for batch in (ids[i:i + IN_BATCH] for i in range(0, len(ids), IN_BATCH))]
+        rows = pd.concat(parts) if parts else self.dataset.query(f"SELECT {select} FROM movies WHERE 0")
+        # Réordonné par rang et non par Movie_id : un Index de grands entiers peut
+        # être converti en intervalle par pandas et déborder
+        order = pd.Index(rows["Movie_id"].to_numpy()).get_indexer(ids)
+        rows = rows.reset_index(drop=True).reindex(order)[columns].reset_index(drop=True)
+        rows = rows.astype({col: dtype for col, dtype in SQL_DTYPES.items() if col in rows.columns})
+        return rows.iloc[0] if single else rows
+
+    def recommend(self, movie_id, n=5, by_rating=False) -> pd.DataFrame:
+        """Films qui partagent le plus de genres, d'acteurs et de réalisateur avec `movie_id`.
+
+        Approximation SQL de recommender.SimilarityIndex (mêmes poids par bloc,
+        sans le résumé ni la durée) : part des valeurs du film retrouvées chez
+        chaque candidat. Avec `by_rating`, les TOP_K plus proches sont reclassés par note.
+        """
+        def compute():
+            blocks = " UNION ALL ".join(
+                f"SELECT b.Movie_id, {WEIGHTS[name]} * 1.0 / (SELECT COUNT(*) FROM {table} WHERE Movie_id = :id) AS w "
+                f"FROM {table} a JOIN {table} b ON b.{name} = a.{name} WHERE a.Movie_id = :id AND b.Movie_id != :id"
+                for name, table in BRIDGE_TABLES.items())
+            total = " + ".join(
+                f"(CASE WHEN EXISTS (SELECT 1 FROM {table} WHERE Movie_id = :id) THEN {WEIGHTS[name]} ELSE 0 END)"
+                for name, table in BRIDGE_TABLES.items())
+            sql = (f"SELECT s.Movie_id, SUM(s.w) / ({total}) AS Similarity FROM ({blocks}) s "
+                   f"JOIN movies m USING (Movie_id) GROUP BY s.Movie_id ORDER BY Similarity DESC, m.Position LIMIT :k")
+            scores = pd.read_sql_query(sql, self.dataset.connection(), params={"id": int(movie_id), "k": TOP_K})
+            ratings = self.dataset.ratings_of(scores["Movie_id"])
+            scores = scores[~np.isnan(ratings)]
+            if by_rating:
+                scores = scores.iloc[np.argsort(-ratings[~np.isnan(ratings)], kind="stable")]
+            scores = scores.head(n)
+            recos = self.movies(scores["Movie_id"].to_numpy(), ["Movie_id", "Movie_name", "Genre", "Rating", "Release_year"])
+            return recos.assign(Similarity=scores["Similarity"].astype(np.float64).round(2).to_numpy())
+        return self._cached("recommend", (int(movie_id), n, by_rating), compute)
@@ -0,0 +1,278 @@
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+import bisect
+import cProfile
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+
+try:
+    import resource     # absent sous Windows : pas de pic RSS
+except ImportError:
+    resource = None
+
+# ===============================
+# 📏 HISTOGRAMMES ET COMPTEURS
+# ===============================
+# Bornes supérieures des classes (secondes), comme les histogrammes Prometheus
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+_NO_OP = nullcontext()
+
+
+def peak_rss_bytes(children=False):
+    """Pic de mémoire résidente du processus (ou de ses processus fils terminés), en octets."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Kio sous Linux, octets sous macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)     # dernière classe : +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Borne supérieure de la classe contenant le quantile `q` (estimation à la Prometheus)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "buckets": {str(b): n for b, n in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+# ===============================
+# 📊 REGISTRE DES MÉTRIQUES D'UN RUN
+# ===============================
+class Metrics:
+    """Métriques d'un run (scraping, nettoyage) : durées par étape, compteurs, histogrammes.
+
+    Désactivé par défaut : chaque appel sort alors immédiatement (un test de
+    booléen) et `timer` / `stage` rendent un contexte vide partagé. Les
+    séries sont identifiées par leur nom et leurs étiquettes :
+
+        metrics.enable()
+        with metrics.stage("clean"):
+            with metrics.timer("clean_column_seconds", column="Genre"):
+                ...
+            metrics.inc("clean_rows_dropped_total", 12, filter="duplicates")
+        metrics.write_report("run.json", prometheus_path="run.prom")
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.stages = {}        # nom -> {"seconds", "peak_rss_bytes"}
+        self.counters = {}      # nom -> {étiquettes -> valeur}
+        self.histograms = {}    # nom -> {étiquettes -> Histogram}
+        self.info = {}
+
+    def enable(self, **info):
+        """Active l'enregistrement ; `info` (commande, options...) est repris tel quel dans le rapport."""
+        self.reset()
+        self.enabled = True
+        self.info = info
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _labels_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        key = _labels_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    def timer(self, name, buckets=FAST_BUCKETS, **labels):
+        """Contexte qui observe sa durée (secondes) dans l'histogramme `name`."""
+        if not self.enabled:
+            return _NO_OP
+        return self._timer(name, buckets, labels)
+
+    @contextmanager
+    def _timer(self, name, buckets, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, buckets, **labels)
+
+    def stage(self, name):
+        """Contexte d'une étape du run : durée et pic RSS atteint à sa fin."""
+        if not self.enabled:
+            return _NO_OP
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                stage = self.stages.setdefault(name, {"seconds": 0.0})
+                stage["seconds"] = round(stage["seconds"] + seconds, 6)
+                stage["peak_rss_bytes"] = peak_rss_bytes()
+
+    # ===============================
+    # 📤 EXPORT
+    # ===============================
+    def report(self) -> dict:
+        """Rapport JSON du run."""
+        with self.lock:
+            return {
+                "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+                "duration_seconds": round(time.time() - self.started, 3),
+                "python": platform.python_version(),
+                "pid": os.getpid(),
+                **self.info,
+                "peak_rss_bytes": peak_rss_bytes(),
+                "peak_rss_children_bytes": peak_rss_bytes(children=True),
+                "stages": dict(self.stages),
+                "counters": {name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                             for name, series in self.counters.items()},
+                "histograms": {name: [{"labels": dict(key), **hist.to_dict()} for key, hist in series.items()]
+                               for name, series in self.histograms.items()},
+            }
+
+    def prometheus(self, prefix="popcorn_") -> str:
+        """Mêmes métriques au format texte Prometheus (pour un node_exporter textfile ou un pushgateway)."""
+        lines = []
+
+        def sample(name, labels, value):
+            body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{prefix}{name}{{{body}}} {value}" if body else f"{prefix}{name} {value}")
+
+        report = self.report()
+        lines.append(f"# TYPE {prefix}stage_seconds gauge")
+        for stage, values in report["stages"].items():
+            sample("stage_seconds", [("stage", stage)], values["seconds"])
+        for name in ["peak_rss_bytes", "peak_rss_children_bytes"]:
+            if report[name] is not None:
+                lines.append(f"# TYPE {prefix}{name} gauge")
+                sample(name, [], report[name])
+
+        with self.lock:
+            for name, series in self.counters.items():
+                lines.append(f"# TYPE {prefix}{name} counter")
+                for key, value in series.items():
+                    sample(name, key, value)
+            for name, series in self.histograms.items():
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for key, hist in series.items():
+                    seen = 0
+                    for bound, n in zip(hist.buckets + (math.inf,), hist.counts):
+                        seen += n
+                        sample(f"{name}_bucket", key + (("le", "+Inf" if bound == math.inf else str(bound)),), seen)
+                    sample(f"{name}_sum", key, round(hist.sum, 6))
+                    sample(f"{name}_count", key, hist.count)
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path=None, prometheus_path=None):
+        """Écrit le rapport JSON dans `path` et/ou le texte Prometheus dans `prometheus_path`."""
+        for target, render in [(path, lambda: json.dumps(self.report(), ensure_ascii=False, indent=2) + "\n"),
+                               (prometheus_path, self.prometheus)]:
+            if target:
+                Path(target).parent.mkdir(parents=True, exist_ok=True)
+                Path(target).write_text(render(), encoding="utf-8")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Registre du processus, partagé par le scraper et le nettoyage
+metrics = Metrics()
+
+# ===============================
+# 🔬 PROFILAGE (OPTIONNEL)
+# ===============================
+@contextmanager
+def profiled(path=None):
+    """Profil cProfile du bloc, écrit dans `path` (format pstats : snakeviz, gprof2dot...).
+
+    Sans `path`, ne fait rien. Pour un profil par échantillonnage sans
+    modifier le code, lancer plutôt la commande sous py-spy
+    (`py-spy record -o profil.svg -- python ...`).
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+
+# ===============================
+# 🧰 LIGNE DE COMMANDE
+# ===============================
+def add_arguments(parser):
+    """Options --metrics / --prometheus / --profile, communes au scraper et au nettoyage."""
+    group = parser.add_argument_group("instrumentation (désactivée par défaut)")
+    group.add_argument("--metrics", type=Path, metavar="JSON",
+                       help="rapport JSON du run : durées par étape, compteurs, histogrammes, pic RSS")
+    group.add_argument("--prometheus", type=Path, metavar="PROM", help="mêmes métriques au format texte Prometheus")
+    group.add_argument("--profile", type=Path, metavar="PROF", help="profil cProfile du run (format pstats)")
+
+
+@contextmanager
+def instrumented(args, command):
+    """Active les métriques si --metrics ou --prometheus est donné et écrit le rapport à la fin, même après une erreur."""
+    if args.metrics or args.prometheus:
+        metrics.enable(command=command, argv=sys.argv[1:])
+    try:
+        with profiled(args.profile):
+            yield
+    finally:
+        if metrics.enabled:
+            metrics.write_report(args.metrics, args.prometheus)
+            print(f"📈 Métriques du run : {', '.join(str(p) for p in [args.metrics, args.prometheus] if p)}")
@@ -0,0 +1,334 @@
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+import sys
+import time
+from pathlib import Path
+
+# ===============================
+# 🎭 LISTE DES GENRES COMMUNS
+# ===============================
+COMMON_GENRES = {
+    "Action": ["Action"],
+    "Adventure": ["Adventure", "Aventure"],
+    "Animation": ["Animation"],
+    "Comedy": ["Comedy", "Comédie"],
+    "Crime": ["Crime", "Policier"],
+    "Documentary": ["Documentary", "Documentaire"],
+    "Drama": ["Drama", "Drame"],
+    "Family": ["Family", "Famille"],
+    "Fantasy": ["Fantasy", "Fantastique"],
+    "History": ["History", "Historique"],
+    "Horror": ["Horror", "Horreur"],
+    "Music": ["Music", "Musique"],
+    "Mystery": ["Mystery", "Mystère"],
+    "Romance": ["Romance", "Romantique"],
+    "Science Fiction": ["Science Fiction", "Science-Fiction", "Sci-Fi"],
+    "TV Movie": ["TV Movie", "Téléfilm"],
+    "Thriller": ["Thriller", "Suspense"],
+    "War": ["War", "Guerre"],
+    "Western": ["Western"]
+}
+
+def normalize_genres(genre_str):
+    if not genre_str or genre_str == "N/A":
+        return "N/A"
+    normalized = set()
+    for genre in genre_str.split(','):
+        genre_clean = genre.strip().capitalize()
+        for common, variants in COMMON_GENRES.items():
+            if genre_clean in variants:
+                normalized.add(common)
+    return ', '.join(sorted(normalized)) if normalized else "N/A"
+
+# ===============================
+# 💰 PARSE MONEY & ROI
+# ===============================
+def parse_money(value_str):
+    """Transforme $60,000,000.00 en int 60000000"""
+    if not value_str or "N/A" in value_str or "-" in value_str:
+        return 0
+    digits = ''.join(c for c in value_str if c.isdigit())
+    return int(digits) if digits else 0
+
+# ===============================
+# 🔎 EXTRACTION DES PAGES DÉTAIL
+# ===============================
+def parse_detail_soup(html):
+    """Extraction de référence : arbre BeautifulSoup complet."""
+    detail_soup = BeautifulSoup(html, 'lxml')
+
+    # --- Original Title ---
+    original_title_tag = detail_soup.find('h2', class_='original_title')
+    if original_title_tag and original_title_tag.text.strip():
+        original_title = original_title_tag.text.strip()
+    else:
+        original_title = None
+
+    # --- Rating Numeric ---
+    rating_div = detail_soup.find('div', 'user_score_chart')
+    rating_numeric = float(rating_div["data-percent"]) if rating_div else "N/A"
+
+    # --- Genres ---
+    genre_spans = detail_soup.find_all('span', class_='genres')
+    genres_list = []
+    for g in genre_spans:
+        genres_list.extend([a.text.strip() for a in g.find_all('a')])
+    genres = normalize_genres(', '.join(genres_list))
+
+    # --- Run Time ---
+    run_time_tag = detail_soup.find('span', class_='runtime')
+    run_time = run_time_tag.text.strip() if run_time_tag else "N/A"
+
+    # --- Overview ---
+    overview_tag = detail_soup.find('div', class_='overview')
+    overview = overview_tag.find('p').text.strip() if overview_tag and overview_tag.find('p') else "N/A"
+
+    # --- Director ---
+    directors = []
+    people_list = detail_soup.find('ol', class_='people no_image')
+    if people_list:
+        first_li = people_list.find('li', class_='profile')
+        if first_li:
+            a_tag = first_li.find('a')
+            if a_tag:
+                directors.append(a_tag.text.strip())
+    director = directors[0] if directors else "N/A"
+
+    # --- Top Actors ---
+    top_actors = []
+    ol_actors = detail_soup.find('ol', class_='people scroller')
+    if ol_actors:
+        actor_lis = ol_actors.find_all('li', class_='card')
+        for li in actor_lis[:5]:  # Top 5
+            img_tag = li.find('img')
+            if img_tag and img_tag.get('alt'):
+                top_actors.append(img_tag['alt'].strip())
+    top_actors_str = ', '.join(top_actors) if top_actors else "N/A"
+
+    # --- Budget & Revenue ---
+    facts_section = detail_soup.find('section', class_='facts left_column')
+    budget_tag = revenue_tag = None
+    if facts_section:
+        for p_tag in facts_section.find_all('p'):
+            strong_tag = p_tag.find('strong')
+            if strong_tag and 'Budget' in strong_tag.text:
+                budget_tag = p_tag
+            if strong_tag and ('Recette' in strong_tag.text or 'Revenue' in strong_tag.text):
+                revenue_tag = p_tag
+    budget = parse_money(budget_tag.text if budget_tag else "N/A")
+    revenue = parse_money(revenue_tag.text if revenue_tag else "N/A")
+
+    return {
+        "Original_Title": original_title,
+        "Rating_Numeric": rating_numeric,
+        "Genre": genres,
+        "Run_time": run_time,
+        "Overview": overview,
+        "Director": director,
+        "Top_Actors": top_actors_str,
+        "Budget": budget,
+        "Revenue": revenue,
+    }
+
+def _has_class(name):
+    # Équivalent XPath de `class_='name'` (un des tokens de l'attribut class)
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Sélecteurs compilés une seule fois. `class_='a b'` dans BeautifulSoup compare
+# la valeur complète de l'attribut, d'où normalize-space(@class)='a b'.
+X_ORIGINAL_TITLE = etree.XPath(f"(//h2[{_has_class('original_title')}])[1]")
+X_RATING = etree.XPath(f"(//div[{_has_class('user_score_chart')}])[1]")
+X_GENRE_SPANS = etree.XPath(f"//span[{_has_class('genres')}]")
+X_LINKS = etree.XPath(".//a")
+X_RUNTIME = etree.XPath(f"(//span[{_has_class('runtime')}])[1]")
+X_OVERVIEW = etree.XPath(f"(//div[{_has_class('overview')}])[1]")
+X_FIRST_P = etree.XPath("(.//p)[1]")
+X_DIRECTORS = etree.XPath("(//ol[normalize-space(@class)='people no_image'])[1]")
+X_FIRST_PROFILE = etree.XPath(f"(.//li[{_has_class('profile')}])[1]")
+X_FIRST_LINK = etree.XPath("(.//a)[1]")
+X_ACTORS = etree.XPath("(//ol[normalize-space(@class)='people scroller'])[1]")
+X_ACTOR_CARDS = etree.XPath(f".//li[{_has_class('card')}]")
+X_FIRST_IMG = etree.XPath("(.//img)[1]")
+X_FACTS = etree.XPath("(//section[normalize-space(@class)='facts left_column'])[1]")
+X_PARAGRAPHS = etree.XPath(".//p")
+X_FIRST_STRONG = etree.XPath("(.//strong)[1]")
+
+def _first(xpath, node):
+    found = xpath(node)
+    return found[0] if found else None
+
+def _parse_html(html):
+    if not html.strip():
+        html = "<html></html>"
+    try:
+        return lxml_html.document_fromstring(html)
+    except ValueError:
+        # Chaîne unicode avec déclaration d'encodage : on repasse en octets
+        return lxml_html.document_fromstring(html.encode("utf-8"))
+
+def _overview(root):
+    overview_tag = _first(X_OVERVIEW, root)
+    overview_p = _first(X_FIRST_P, overview_tag) if overview_tag is not None else None
+    return overview_p.text_content().strip() if overview_p is not None else "N/A"
+
+def _genre_names(root):
+    """Genres tels qu'affichés sur la page (dans sa langue)."""
+    names = []
+    for span in X_GENRE_SPANS(root):
+        names.extend(a.text_content().strip() for a in X_LINKS(span))
+    return names
+
+def parse_detail_lxml(html):
+    """Extraction rapide : XPath compilés sur l'arbre lxml, sans construire d'arbre BeautifulSoup."""
+    return _detail_lxml(_parse_html(html))
+
+def _detail_lxml(root):
+    original_title_tag = _first(X_ORIGINAL_TITLE, root)
+    original_title = original_title_tag.text_content().strip() if original_title_tag is not None else ""
+
+    rating_div = _first(X_RATING, root)
+    rating_numeric = float(rating_div.attrib["data-percent"]) if rating_div is not None else "N/A"
+
+    genres = normalize_genres(', '.join(_genre_names(root)))
+
+    run_time_tag = _first(X_RUNTIME, root)
+    run_time = run_time_tag.text_content().strip() if run_time_tag is not None else "N/A"
+
+    overview = _overview(root)
+
+    director = "N/A"
+    people_list = _first(X_DIRECTORS, root)
+    first_li = _first(X_FIRST_PROFILE, people_list) if people_list is not None else None
+    a_tag = _first(X_FIRST_LINK, first_li) if first_li is not None else None
+    if a_tag is not None:
+        director = a_tag.text_content().strip()
+
+    top_actors = []
+    ol_actors = _first(X_ACTORS, root)
+    if ol_actors is not None:
+        for li in X_ACTOR_CARDS(ol_actors)[:5]:  # Top 5
+            img_tag = _first(X_FIRST_IMG, li)
+            if img_tag is not None and img_tag.get('alt'):
+                top_actors.append(img_tag.get('alt').strip())
+    top_actors_str = ', '.join(top_actors) if top_actors else "N/A"
+
+    budget_tag = revenue_tag = None
+    facts_section = _first(X_FACTS, root)
+    if facts_section is not None:
+        for p_tag in X_PARAGRAPHS(facts_section):
+            strong_tag = _first(X_FIRST_STRONG, p_tag)
+            if strong_tag is None:
+                continue
+            strong_text = strong_tag.text_content()
+            if 'Budget' in strong_text:
+                budget_tag = p_tag
+            if 'Recette' in strong_text or 'Revenue' in strong_text:
+                revenue_tag = p_tag
+    budget = parse_money(budget_tag.text_content() if budget_tag is not None else "N/A")
+    revenue = parse_money(revenue_tag.text_content() if revenue_tag is not None else "N/A")
+
+    return {
+        "Original_Title": original_title or None,
+        "Rating_Numeric": rating_numeric,
+        "Genre": genres,
+        "Run_time": run_time,
+        "Overview": overview,
+        "Director": director,
+        "Top_Actors": top_actors_str,
+        "Budget": budget,
+        "Revenue": revenue,
+    }
+
+# ===============================
+# 🌍 CHAMPS PROPRES À LA LANGUE
+# ===============================
+# Seuls le titre, le résumé et les genres changent d'une langue à l'autre ;
+# le reste de la page (note, casting, budget...) est lu une seule fois, sur
+# la page de la langue principale.
+LOCALIZED_FIELDS = ("Title", "Overview", "Genre")
+X_TITLE = etree.XPath(f"(//section[{_has_class('header')}]//h2[not({_has_class('original_title')})]/a)[1]")
+
+def parse_localized(html):
+    """Titre, résumé et genres (tels qu'affichés, non normalisés) d'une page détail, dans sa langue."""
+    return _localized_lxml(_parse_html(html))
+
+def _localized_lxml(root):
+    title_tag = _first(X_TITLE, root)
+    title = title_tag.text_content().strip() if title_tag is not None else ""
+    return {
+        "Title": title or "N/A",
+        "Overview": _overview(root),
+        "Genre": ', '.join(_genre_names(root)) or "N/A",
+    }
+
+# ===============================
+# 🔌 CHOIX DU BACKEND
+# ===============================
+EXTRACTORS = {
+    "soup": parse_detail_soup,
+    "lxml": parse_detail_lxml,
+}
+DEFAULT_EXTRACTOR = "lxml"
+
+def parse_detail(html, backend=DEFAULT_EXTRACTOR, localized=False):
+    """Extrait les champs d'une page détail. `Original_Title` vaut None s'il est absent.
+
+    Avec `localized`, ajoute sous "Localized" les champs de parse_localized
+    (le backend lxml les lit sur le même arbre).
+    """
+    if not localized:
+        return EXTRACTORS[backend](html)
+    if backend == "lxml":
+        root = _parse_html(html)
+        return {**_detail_lxml(root), "Localized": _localized_lxml(root)}
+    return {**EXTRACTORS[backend](html), "Localized": parse_localized(html)}
+
+# ===============================
+# ✅ PARITÉ ENTRE BACKENDS
+# ===============================
+def check_parity(pages, backends=("soup", "lxml")):
+    """Compare les backends sur des pages HTML enregistrées.
+
+    Retourne (nombre de pages, écarts, durée totale par backend) ; chaque écart est
+    un tuple (nom de page, champ, valeur de référence, valeur du backend).
+    """
+    reference, *others = backends
+    timings = {backend: 0.0 for backend in backends}
+    mismatches = []
+    count = 0
+    for name, html in pages:
+        count += 1
+        results = {}
+        for backend in backends:
+            start = time.perf_counter()
+            results[backend] = EXTRACTORS[backend](html)
+            timings[backend] += time.perf_counter() - start
+        for backend in others:
+            for field, expected in results[reference].items():
+                if results[backend].get(field) != expected:
+                    mismatches.append((name, field, expected, results[backend].get(field)))
+    return count, mismatches, timings
+
+def saved_pages(path):
+    """Pages détail enregistrées : fichiers .html d'un dossier, ou le cache de pages du scraper."""
+    path = Path(path)
+    if (path / "index.json").exists():
+        from page_cache import PageCache
+        cache = PageCache(path)
+        for url, entry in cache.index.items():
+            if "/movie/" in url:
+                yield url, cache.read(entry["hash"])
+    else:
+        for file in sorted(path.glob("*.html")):
+            yield file.name, file.read_text(encoding="utf-8")
+
+if __name__ == "__main__":
+    # python src/scraper/extractors.py [dossier de pages .html | data/cache/pages]
+    default_dir = Path(__file__).resolve().parents[2] / "data" / "cache" / "pages"
+    count, mismatches, timings = check_parity(saved_pages(sys.argv[1] if len(sys.argv) > 1 else default_dir))
+    for name, field, expected, got in mismatches[:20]:
+        print(f"❌ {name} [{field}] : {expected!r} != {got!r}")
+    for backend, total in timings.items():
+        print(f"⏱️  {backend} : {total / max(count, 1) * 1000:.2f} ms/page")
+    print(f"{'✅' if not mismatches else '❌'} {count} pages comparées, {len(mismatches)} écarts")
+    sys.exit(1 if mismatches else 0)
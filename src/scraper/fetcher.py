@@ -0,0 +1,210 @@
+from pathlib import Path
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "monitoring"))
+from metrics import metrics
+
+# Statuts considérés comme transitoires : on réessaie
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Page impossible à récupérer après toutes les tentatives."""
+
+    def __init__(self, url, reason):
+        super().__init__(f"{url} : {reason}")
+        self.url = url
+        self.reason = reason
+
+
+# ===============================
+# 🪣 LIMITEUR DE DÉBIT (TOKEN BUCKET)
+# ===============================
+class TokenBucket:
+    """Autorise `rate` requêtes par seconde, avec des rafales jusqu'à `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # Le verrou sert les appelants dans l'ordre d'arrivée
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+# ===============================
+# 📊 COMPTEURS HTTP
+# ===============================
+class FetchStats:
+    """Latence de chaque requête et compteurs de tentatives / échecs."""
+
+    def __init__(self):
+        self.latencies = []     # secondes, une entrée par requête HTTP envoyée
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def record(self, latency):
+        self.requests += 1
+        self.latencies.append(latency)
+
+    def summary(self):
+        lat = sorted(self.latencies)
+
+        def pct(p):
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))], 3) if lat else None
+
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "latency_p50": pct(0.50),
+            "latency_p95": pct(0.95),
+            "latency_max": round(lat[-1], 3) if lat else None,
+        }
+
+
+def retry_after_delay(value):
+    """Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+# ===============================
+# 🌐 TÉLÉCHARGEMENT CONCURRENT
+# ===============================
+class AsyncFetcher:
+    """Télécharge des pages en parallèle, au plus `concurrency` à la fois et `rate` par seconde.
+
+    Une seule session (pool de connexions keep-alive) est partagée par toutes
+    les requêtes. Les erreurs réseau et les statuts 429/5xx sont réessayés avec
+    un backoff exponentiel qui respecte `Retry-After`. S'utilise comme contexte
+    asynchrone :
+
+        async with AsyncFetcher(concurrency=8, rate=5) as fetcher:
+            html = await fetcher.fetch(url)
+    """
+
+    def __init__(self, concurrency=8, rate=5.0, timeout=30, connect_timeout=10,
+                 max_retries=4, backoff=0.5, max_backoff=30, keepalive=30):
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate) if rate else None
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.keepalive = keepalive
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = FetchStats()
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            keepalive_timeout=self.keepalive,
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = self.backoff * (2 ** attempt)
+        return min(delay, self.max_backoff) * random.uniform(0.5, 1.0)
+
+    async def _request(self, url, headers, binary=False):
+        """Une tentative : retourne (status, texte ou octets, en-têtes de réponse)."""
+        async with self.semaphore:
+            if self.bucket:
+                await self.bucket.acquire()
+            start = time.perf_counter()
+            status = "error"
+            try:
+                async with self.session.get(url, headers=headers) as resp:
+                    status = resp.status
+                    data = await resp.read()
+                    metrics.inc("http_downloaded_bytes_total", len(data))
+                    # Décodé comme resp.text(), après avoir compté les octets reçus
+                    body = data if binary else data.decode(resp.get_encoding())
+                    return resp.status, body, resp.headers
+            finally:
+                latency = time.perf_counter() - start
+                self.stats.record(latency)
+                metrics.observe("http_request_seconds", latency, status=str(status))
+
+    async def fetch(self, url):
+        """Retourne le HTML de `url`, ou lève FetchError après `max_retries` essais."""
+        status, text, headers = await self.fetch_response(url)
+        return text
+
+    async def fetch_bytes(self, url):
+        """Comme `fetch`, pour un contenu binaire (images)."""
+        status, data, headers = await self.fetch_response(url, binary=True)
+        return data
+
+    async def fetch_response(self, url, headers=None, binary=False):
+        """Comme `fetch`, mais retourne (status, texte, en-têtes) ; utile pour les GET conditionnels."""
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                status, text, resp_headers = await self._request(url, headers, binary)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = f"{type(e).__name__}: {e}"
+            else:
+                if status < 400:
+                    return status, text, resp_headers
+                retry_after = resp_headers.get("Retry-After")
+                if status not in RETRY_STATUSES:
+                    self.stats.failures += 1
+                    metrics.inc("http_failures_total")
+                    raise FetchError(url, f"HTTP {status}")
+                reason = f"HTTP {status}"
+
+            if attempt == self.max_retries:
+                break
+            self.stats.retries += 1
+            metrics.inc("http_retries_total")
+            # Le créneau de concurrence est libéré pendant l'attente
+            await asyncio.sleep(self._backoff_delay(attempt, retry_after_delay(retry_after)))
+
+        self.stats.failures += 1
+        metrics.inc("http_failures_total")
+        raise FetchError(url, reason)
+
+    async def fetch_all(self, urls):
+        """Télécharge toutes les `urls` dans le même ordre ; une page en échec vaut FetchError."""
+        return await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
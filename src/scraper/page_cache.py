@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+
+
+class CachedPage:
+    """Page servie par `PageCache.fetch` ; le HTML n'est relu du disque qu'à la demande."""
+
+    def __init__(self, cache, url, content_hash, text=None, changed=True):
+        self._cache = cache
+        self.url = url
+        self.content_hash = content_hash
+        self.changed = changed      # False si identique à la version déjà en cache
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self._cache.read(self.content_hash)
+        return self._text
+
+
+# ===============================
+# 🗄️ CACHE DISQUE DES PAGES
+# ===============================
+class PageCache:
+    """Cache persistant des pages HTML, adressé par contenu et indexé par URL.
+
+    - `objects/<sha256>.html.gz` : corps des pages, un fichier par contenu distinct
+    - `index.json` : pour chaque URL, ETag / Last-Modified, date de récupération,
+      hash du contenu et l'enregistrement déjà extrait de ce contenu
+
+    Une entrée plus jeune que le `ttl` est servie sans requête ; sinon un GET
+    conditionnel (If-None-Match / If-Modified-Since) est envoyé et un 304
+    réutilise la page en cache.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = root / "index.json"
+        self.index = json.loads(self.index_file.read_text(encoding="utf-8")) if self.index_file.exists() else {}
+        self.hits = 0           # servies sans requête (TTL)
+        self.not_modified = 0   # revalidées par un 304
+        self.downloads = 0      # téléchargées (200)
+
+    def _object_path(self, content_hash):
+        return self.objects_dir / f"{content_hash}.html.gz"
+
+    def read(self, content_hash):
+        with gzip.open(self._object_path(content_hash), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def _write(self, text):
+        data = text.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._object_path(content_hash)
+        if not path.exists():
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(gzip.compress(data))
+            os.replace(tmp, path)
+        return content_hash
+
+    async def fetch(self, fetcher, url, ttl=0):
+        """Retourne la page `url` en passant par le cache (voir la docstring de la classe)."""
+        entry = self.index.get(url)
+        if entry and self._object_path(entry["hash"]).exists():
+            if time.time() - entry["fetched_at"] < ttl:
+                self.hits += 1
+                return CachedPage(self, url, entry["hash"], changed=False)
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        else:
+            entry, headers = None, None
+
+        status, text, resp_headers = await fetcher.fetch_response(url, headers=headers)
+        if status == 304 and entry:
+            self.not_modified += 1
+            entry["fetched_at"] = time.time()
+            return CachedPage(self, url, entry["hash"], changed=False)
+
+        self.downloads += 1
+        content_hash = self._write(text)
+        changed = not entry or entry["hash"] != content_hash
+        self.index[url] = {
+            "hash": content_hash,
+            "etag": resp_headers.get("ETag"),
+            "last_modified": resp_headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            # L'enregistrement extrait reste valable si le contenu n'a pas changé
+            "record": None if changed else entry.get("record"),
+        }
+        return CachedPage(self, url, content_hash, text=text, changed=changed)
+
+    def get_record(self, page):
+        """Enregistrement déjà extrait de cette version de la page, ou None."""
+        entry = self.index.get(page.url)
+        if entry and entry["hash"] == page.content_hash:
+            return entry.get("record")
+        return None
+
+    def set_record(self, page, record):
+        entry = self.index.get(page.url)
+        if entry and entry["hash"] == page.content_hash:
+            entry["record"] = record
+
+    def save(self):
+        """Écrit l'index et supprime les contenus qui ne sont plus référencés."""
+        tmp = self.index_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.index, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.index_file)
+
+        referenced = {entry["hash"] for entry in self.index.values()}
+        for path in self.objects_dir.glob("*.html.gz"):
+            if path.name[:-len(".html.gz")] not in referenced:
+                path.unlink()
+
+    def summary(self):
+        return {"hits": self.hits, "not_modified": self.not_modified, "downloads": self.downloads}
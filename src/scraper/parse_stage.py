@@ -0,0 +1,95 @@
+from pathlib import Path
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from extractors import parse_detail, parse_localized
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "monitoring"))
+from metrics import FAST_BUCKETS, metrics
+
+
+def extract(html, backend, detail=True, localized=False):
+    """Champs de la page détail (`detail`) et/ou champs propres à sa langue (`localized`, sous "Localized")."""
+    if not detail:
+        return {"Localized": parse_localized(html)}
+    return parse_detail(html, backend, localized)
+
+
+def timed_parse(html, backend, detail=True, localized=False):
+    """(champs extraits, durée en secondes), mesurée dans le processus d'analyse lui-même."""
+    start = time.perf_counter()
+    result = extract(html, backend, detail, localized)
+    return result, time.perf_counter() - start
+
+
+# ===============================
+# ⚙️ ÉTAPE D'ANALYSE (POOL DE PROCESSUS)
+# ===============================
+class ParseStage:
+    """Analyse les pages détail dans un pool de processus, alimenté par une file bornée.
+
+    Les tâches de téléchargement déposent le HTML dans la file puis attendent le
+    résultat ; quand l'analyse prend du retard, la file se remplit, `parse`
+    bloque et le téléchargement ralentit d'autant (backpressure), ce qui
+    garde la mémoire stable. Avec `workers=0`, l'analyse se fait dans la boucle
+    asyncio (pratique pour déboguer).
+
+        async with ParseStage(workers=4) as parser:
+            detail = await parser.parse(html)
+    """
+
+    def __init__(self, workers=None, queue_size=None, backend="lxml"):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.queue_size = queue_size or max(1, self.workers) * 4
+        self.backend = backend
+        self.queue = None
+        self.pool = None
+        self._consumers = []
+
+    async def __aenter__(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.workers > 0:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._consumers = [asyncio.ensure_future(self._consume()) for _ in range(max(1, self.workers))]
+        return self
+
+    async def __aexit__(self, *exc):
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        # Durée d'analyse par page, sans l'attente dans la file ni l'aller-retour vers le pool
+        timed = metrics.enabled
+        parse = timed_parse if timed else extract
+        while True:
+            html, detail, localized, future = await self.queue.get()
+            try:
+                if self.pool:
+                    result = await loop.run_in_executor(self.pool, parse, html, self.backend, detail, localized)
+                else:
+                    result = parse(html, self.backend, detail, localized)
+                if timed:
+                    result, seconds = result
+                    metrics.observe("parse_page_seconds", seconds, FAST_BUCKETS,
+                                    kind="detail" if detail else "localized", backend=self.backend)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.queue.task_done()
+
+    async def parse(self, html, detail=True, localized=False):
+        """Retourne les champs extraits de `html` (cf. extract)."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((html, detail, localized, future))
+        return await future
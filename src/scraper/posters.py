@@ -0,0 +1,165 @@
+from pathlib import Path
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import threading
+
+import pandas as pd
+from PIL import Image, ImageDraw, ImageOps, UnidentifiedImageError
+
+from fetcher import AsyncFetcher, FetchError
+
+# ===============================
+# 📁 CONFIGURATION ET CHEMINS
+# ===============================
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+POSTER_DIR = DATA_DIR / "posters"
+INPUT_FILE = DATA_DIR / "movies_clean.parquet"
+
+THUMB_SIZE = (250, 375)     # taille max. (largeur de l'affiche détaillée du dashboard), ratio 2:3
+THUMB_FORMAT = "WEBP"
+THUMB_QUALITY = 80
+CONCURRENCY = 8
+RATE = 10.0
+
+# ===============================
+# 🖼️ MINIATURES
+# ===============================
+def make_thumbnail(data: bytes) -> bytes:
+    """Miniature WebP d'une image (proportions conservées, jamais agrandie)."""
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        img.thumbnail(THUMB_SIZE)
+        out = io.BytesIO()
+        img.save(out, THUMB_FORMAT, quality=THUMB_QUALITY)
+        return out.getvalue()
+
+
+def placeholder(size=THUMB_SIZE, text="No Image") -> Image.Image:
+    """Affiche de remplacement, dessinée localement (plus de placeholder distant)."""
+    img = Image.new("RGB", size, (38, 39, 48))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([4, 4, size[0] - 5, size[1] - 5], outline=(90, 92, 105), width=2)
+    draw.text((size[0] / 2, size[1] / 2), text, fill=(170, 172, 185), anchor="mm")
+    return img
+
+
+# ===============================
+# 🗄️ CACHE DES AFFICHES
+# ===============================
+class PosterCache:
+    """Miniatures des affiches, adressées par contenu et indexées par URL.
+
+    - `objects/<sha256>.webp` : une miniature par image distincte (hash de
+      l'image d'origine : deux URL de la même affiche partagent le fichier)
+    - `index.json` : URL -> hash
+
+    Une URL déjà dans l'index n'est plus jamais téléchargée ; une affiche
+    modifiée sur TMDb change d'URL, et c'est cette nouvelle URL qui l'est.
+    """
+
+    def __init__(self, root=POSTER_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_file = self.root / "index.json"
+        self.index = json.loads(self.index_file.read_text(encoding="utf-8")) if self.index_file.exists() else {}
+
+    def _object_path(self, content_hash):
+        return self.objects_dir / f"{content_hash}.webp"
+
+    def path(self, url):
+        """Fichier local de la miniature de `url`, ou None si elle n'est pas en cache."""
+        content_hash = self.index.get(url)
+        if content_hash is None:
+            return None
+        path = self._object_path(content_hash)
+        return path if path.exists() else None
+
+    def missing(self, urls):
+        return [url for url in dict.fromkeys(urls) if self.path(url) is None]
+
+    def add(self, url, data: bytes):
+        """Enregistre la miniature de l'image `data` téléchargée depuis `url`."""
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._object_path(content_hash)
+        if not path.exists():
+            thumbnail = make_thumbnail(data)
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(thumbnail)
+            os.replace(tmp, path)
+        self.index[url] = content_hash
+
+    def prune(self, urls):
+        """Oublie les URL absentes de `urls` et supprime les miniatures qui ne servent plus."""
+        urls = set(urls)
+        self.index = {url: h for url, h in self.index.items() if url in urls}
+        used = set(self.index.values())
+        removed = 0
+        if self.objects_dir.exists():
+            for path in self.objects_dir.glob("*.webp"):
+                if path.stem not in used:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.index, ensure_ascii=False, indent=0, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.index_file)
+
+
+async def download_posters(cache: PosterCache, urls, concurrency=CONCURRENCY, rate=RATE):
+    """Télécharge les affiches de `urls` absentes du cache ; retourne (téléchargées, échecs)."""
+    loop = asyncio.get_running_loop()
+    todo = cache.missing(urls)
+    failures = 0
+
+    async def one(fetcher, url):
+        nonlocal failures
+        try:
+            data = await fetcher.fetch_bytes(url)
+            # Décodage et redimensionnement hors de la boucle asyncio
+            await loop.run_in_executor(None, cache.add, url, data)
+        except (FetchError, UnidentifiedImageError, OSError) as e:
+            failures += 1
+            print(f"⚠️ Affiche ignorée ({url}) : {e}")
+
+    async with AsyncFetcher(concurrency=concurrency, rate=rate) as fetcher:
+        await asyncio.gather(*(one(fetcher, url) for url in todo))
+    return len(todo) - failures, failures
+
+
+def poster_urls(path):
+    """URL des affiches du jeu de données nettoyé (Parquet ou CSV)."""
+    path = Path(path)
+    df = pd.read_parquet(path, columns=["Poster_URL"]) if path.suffix == ".parquet" else pd.read_csv(path, usecols=["Poster_URL"])
+    urls = df["Poster_URL"].dropna()
+    return urls[urls.str.startswith("http")].tolist()
+
+
+# ===============================
+# 🚀 PIPELINE PRINCIPAL
+# ===============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache local des affiches (miniatures).")
+    parser.add_argument("--input", type=Path, default=INPUT_FILE, help="données nettoyées (Parquet ou CSV)")
+    parser.add_argument("--cache", type=Path, default=POSTER_DIR, help="dossier du cache des miniatures")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="téléchargements simultanés")
+    parser.add_argument("--rate", type=float, default=RATE, help="téléchargements par seconde")
+    args = parser.parse_args(argv)
+
+    urls = poster_urls(args.input)
+    cache = PosterCache(args.cache)
+    print(f"🖼️  {len(set(urls))} affiches, {len(cache.missing(urls))} à télécharger...")
+    downloaded, failures = asyncio.run(download_posters(cache, urls, args.concurrency, args.rate))
+    removed = cache.prune(urls)
+    cache.save()
+    print(f"✅ {downloaded} miniatures ajoutées, {failures} échecs, {removed} supprimées : {args.cache}")
+
+if __name__ == "__main__":
+    main()
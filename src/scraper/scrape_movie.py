@@ -1,80 +1,59 @@
-import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 from pathlib import Path
-import time
-import re
-import json  
+from collections import deque
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from extractors import LOCALIZED_FIELDS
+from fetcher import AsyncFetcher, FetchError
+from page_cache import PageCache
+from parse_stage import ParseStage
+from sinks import NdjsonSink, iter_ndjson, ndjson_to_json
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "monitoring"))
+import metrics as instrumentation
+from metrics import FAST_BUCKETS, metrics
 
 # ===============================
 # 📁 CONFIGURATION ET CHEMINS
 # ===============================
 RAW_DIR = Path(__file__).resolve().parents[2] / "data" / "raw"
-RAW_DIR.mkdir(parents=True, exist_ok=True)
-OUT_FILE = RAW_DIR / "all_movies_datas.json"
+OUT_FILE = RAW_DIR / "all_movies_datas.json"   # le NDJSON écrit au fil du scraping est à côté
 
-all_movies = []
+# Surcharger TMDB_BASE_URL permet de viser un serveur local (pages HTML enregistrées)
+TMDB_URL = os.environ.get("TMDB_BASE_URL", "https://www.themoviedb.org")
+LISTING_URL = TMDB_URL + "/movie?page="
+PAGES = range(1, 40)  # exemple: 40 pages
+LANGUAGE = "fr-FR"    # langue des pages détail
+EXTRA_LANGUAGES = ()  # langues supplémentaires : titre, résumé et genres par langue (mode multilingue)
 
 # ===============================
-# 🎭 LISTE DES GENRES COMMUNS
+# ⚡ CONCURRENCE ET DÉBIT
 # ===============================
-COMMON_GENRES = {
-    "Action": ["Action"],
-    "Adventure": ["Adventure", "Aventure"],
-    "Animation": ["Animation"],
-    "Comedy": ["Comedy", "Comédie"],
-    "Crime": ["Crime", "Policier"],
-    "Documentary": ["Documentary", "Documentaire"],
-    "Drama": ["Drama", "Drame"],
-    "Family": ["Family", "Famille"],
-    "Fantasy": ["Fantasy", "Fantastique"],
-    "History": ["History", "Historique"],
-    "Horror": ["Horror", "Horreur"],
-    "Music": ["Music", "Musique"],
-    "Mystery": ["Mystery", "Mystère"],
-    "Romance": ["Romance", "Romantique"],
-    "Science Fiction": ["Science Fiction", "Science-Fiction", "Sci-Fi"],
-    "TV Movie": ["TV Movie", "Téléfilm"],
-    "Thriller": ["Thriller", "Suspense"],
-    "War": ["War", "Guerre"],
-    "Western": ["Western"]
-}
-
-def normalize_genres(genre_str):
-    if not genre_str or genre_str == "N/A":
-        return "N/A"
-    normalized = set()
-    for genre in genre_str.split(','):
-        genre_clean = genre.strip().capitalize()
-        for common, variants in COMMON_GENRES.items():
-            if genre_clean in variants:
-                normalized.add(common)
-    return ', '.join(sorted(normalized)) if normalized else "N/A"
+CONCURRENCY = 8     # requêtes HTTP simultanées max
+RATE = 5.0          # requêtes par seconde (remplace les time.sleep fixes)
+PAGE_WINDOW = 3     # pages de liste traitées en avance
+EXTRACTOR = "lxml"  # backend d'extraction des pages détail ("lxml" ou "soup", cf. extractors.py)
+PARSE_WORKERS = None  # processus d'analyse (None = un par cœur, 0 = dans la boucle asyncio)
 
 # ===============================
-# 💰 PARSE MONEY & ROI
+# 🗄️ CACHE DES PAGES (crawl incrémental)
 # ===============================
-def parse_money(value_str):
-    """Transforme $60,000,000.00 en int 60000000"""
-    if not value_str or "N/A" in value_str or "-" in value_str:
-        return 0
-    digits = ''.join(c for c in value_str if c.isdigit())
-    return int(digits) if digits else 0
+CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "cache" / "pages"
+LISTING_TTL = 0                 # les listes changent souvent : toujours revalider
+DETAIL_TTL = 3 * 24 * 3600      # pages détail servies sans requête pendant 3 jours
 
 # ===============================
-# 🎬 SCRAPING TMDb
+# 🔎 EXTRACTION HTML
 # ===============================
-print("📡 Scraping TMDb...")
-
-base_url = 'https://www.themoviedb.org/movie?page='
-
-for page_num in range(1, 40):  # exemple: 40 pages
-    print(f"📄 Scraping page {page_num}...")
-    resp = requests.get(base_url + str(page_num)).text
-    soup = BeautifulSoup(resp, 'lxml')
-    all_div = soup.find_all('div', class_='card style_1')
-
-    for item in all_div:
+def parse_listing(html):
+    """Retourne les cartes films d'une page de liste TMDb."""
+    soup = BeautifulSoup(html, 'lxml')
+    cards = []
+    for item in soup.find_all('div', class_='card style_1'):
         inner_div = item.find('div', class_='content')
         if not inner_div:
             continue
@@ -82,7 +61,6 @@ for page_num in range(1, 40):  # exemple: 40 pages
         movie_name = inner_div.find('h2').text.strip() if inner_div.find('h2') else "N/A"
         release_date = inner_div.find('p').text.strip() if inner_div.find('p') else "N/A"
         inner_link = inner_div.find('a')['href']
-        full_link = 'https://www.themoviedb.org' + inner_link + "?language=fr-FR"
 
         # --- Image du film (poster) ---
         img_tag = item.find('img')
@@ -92,104 +70,291 @@ for page_num in range(1, 40):  # exemple: 40 pages
         else:
             poster_url = "N/A"
 
-        # --- Page détail ---
-        detail_resp = requests.get(full_link).text
-        detail_soup = BeautifulSoup(detail_resp, 'lxml')
+        cards.append({
+            "movie_name": movie_name,
+            "release_date": release_date,
+            "link": inner_link,
+            "poster_url": poster_url,
+        })
+    return cards
 
-        # --- Original Title ---
-        original_title_tag = detail_soup.find('h2', class_='original_title')
-        if original_title_tag and original_title_tag.text.strip():
-            original_title = original_title_tag.text.strip()
-        else:
-            original_title = movie_name
-
-        # --- Rating Numeric ---
-        rating_div = detail_soup.find('div', 'user_score_chart')
-        rating_numeric = float(rating_div["data-percent"]) if rating_div else "N/A"
-
-        # --- Genres ---
-        genre_spans = detail_soup.find_all('span', class_='genres')
-        genres_list = []
-        for g in genre_spans:
-            genres_list.extend([a.text.strip() for a in g.find_all('a')])
-        genres = normalize_genres(', '.join(genres_list))
-
-        # --- Run Time ---
-        run_time_tag = detail_soup.find('span', class_='runtime')
-        run_time = run_time_tag.text.strip() if run_time_tag else "N/A"
-
-        # --- Overview ---
-        overview_tag = detail_soup.find('div', class_='overview')
-        overview = overview_tag.find('p').text.strip() if overview_tag and overview_tag.find('p') else "N/A"
-
-        # --- Director ---
-        directors = []
-        people_list = detail_soup.find('ol', class_='people no_image')
-        if people_list:
-            first_li = people_list.find('li', class_='profile')
-            if first_li:
-                a_tag = first_li.find('a')
-                if a_tag:
-                    directors.append(a_tag.text.strip())
-        director = directors[0] if directors else "N/A"
-
-        # --- Top Actors ---
-        top_actors = []
-        ol_actors = detail_soup.find('ol', class_='people scroller')
-        if ol_actors:
-            actor_lis = ol_actors.find_all('li', class_='card')
-            for li in actor_lis[:5]:  # Top 5
-                img_tag = li.find('img')
-                if img_tag and img_tag.get('alt'):
-                    top_actors.append(img_tag['alt'].strip())
-        top_actors_str = ', '.join(top_actors) if top_actors else "N/A"
-
-        # --- Budget & Revenue ---
-        facts_section = detail_soup.find('section', class_='facts left_column')
-        budget_tag = revenue_tag = None
-        if facts_section:
-            for p_tag in facts_section.find_all('p'):
-                strong_tag = p_tag.find('strong')
-                if strong_tag and 'Budget' in strong_tag.text:
-                    budget_tag = p_tag
-                if strong_tag and ('Recette' in strong_tag.text or 'Revenue' in strong_tag.text):
-                    revenue_tag = p_tag
-        budget = parse_money(budget_tag.text if budget_tag else "N/A")
-        revenue = parse_money(revenue_tag.text if revenue_tag else "N/A")
-        roi = round((revenue - budget) / budget, 2) if budget > 0 and revenue > 0 else None
-
-        # --- Dictionnaire final du film ---
-        movie_data = {
-            "Movie_name": movie_name,
-            "Original_Title": original_title,
-            "Release_date": release_date,
-            "Rating_Numeric": rating_numeric,
-            "Genre": genres,
-            "Run_time": run_time,
-            "Overview": overview,
-            "Director": director,
-            "Top_Actors": top_actors_str,
-            "Budget": budget,
-            "Revenue": revenue,
-            "ROI": roi,
-            "Poster_URL": poster_url,
-            "Source": "TMDb"
-        }
-
-        all_movies.append(movie_data)
-        time.sleep(0.3)
-
-    time.sleep(1)
+def build_movie_data(card, detail):
+    """Assemble la carte de la liste et la page détail en un enregistrement final."""
+    budget, revenue = detail["Budget"], detail["Revenue"]
+    roi = round((revenue - budget) / budget, 2) if budget > 0 and revenue > 0 else None
+
+    # --- Dictionnaire final du film ---
+    return {
+        "Movie_name": card["movie_name"],
+        "Original_Title": detail["Original_Title"] or card["movie_name"],
+        "Release_date": card["release_date"],
+        "Rating_Numeric": detail["Rating_Numeric"],
+        "Genre": detail["Genre"],
+        "Run_time": detail["Run_time"],
+        "Overview": detail["Overview"],
+        "Director": detail["Director"],
+        "Top_Actors": detail["Top_Actors"],
+        "Budget": budget,
+        "Revenue": revenue,
+        "ROI": roi,
+        "Poster_URL": card["poster_url"],
+        "Source": "TMDb",
+        # Mode multilingue : Title_<langue>, Overview_<langue>, Genre_<langue>
+        **{f"{field}_{language}": value
+           for language, fields in detail.get("Localized", {}).items() for field, value in fields.items()},
+    }
 
 # ===============================
-# 💾 SAUVEGARDE FINALE
+# 🎬 SCRAPING TMDb
 # ===============================
-df = pd.DataFrame(all_movies)
+async def fetch_page(fetcher, cache, url, ttl):
+    if cache is None:
+        return await fetcher.fetch(url)
+    return (await cache.fetch(fetcher, url, ttl=ttl)).text
+
+async def fetch_detail(fetcher, cache, parser, card, language, detail=True, localized=False):
+    """Retourne les champs de la page détail d'une carte (cf. ParseStage.parse pour `detail` / `localized`).
+
+    Avec le cache, une page inchangée depuis le dernier run n'est pas ré-analysée :
+    on réutilise l'enregistrement extrait de cette même version de la page,
+    s'il contient les champs demandés.
+    """
+    url = TMDB_URL + card["link"] + "?language=" + language
+    if cache is None:
+        return await parser.parse(await fetcher.fetch(url), detail, localized)
+    page = await cache.fetch(fetcher, url, ttl=DETAIL_TTL)
+    record = cache.get_record(page)
+    if record is None or (detail and "Top_Actors" not in record) or (localized and "Localized" not in record):
+        record = await parser.parse(page.text, detail, localized)
+        cache.set_record(page, record)
+    else:
+        metrics.inc("scrape_detail_reused_total")
+    return record
+
+async def fetch_movie(fetcher, cache, parser, card, language, extra_languages=()):
+    """Page détail dans `language` et, en parallèle sur les mêmes connexions, dans chaque `extra_languages`.
+
+    Seule la page de `language` est analysée en entier ; les autres langues
+    n'apportent que leurs champs localisés, réunis sous "Localized" (langue ->
+    champs). Une langue supplémentaire en échec laisse ses champs à "N/A".
+    """
+    if not extra_languages:
+        return await fetch_detail(fetcher, cache, parser, card, language)
+    detail, *others = await asyncio.gather(
+        fetch_detail(fetcher, cache, parser, card, language, localized=True),
+        *(fetch_detail(fetcher, cache, parser, card, other, detail=False, localized=True) for other in extra_languages),
+        return_exceptions=True)
+    if isinstance(detail, BaseException):
+        raise detail
+    localized = {language: detail["Localized"]}
+    for other, result in zip(extra_languages, others):
+        if isinstance(result, FetchError):
+            print(f"   ⚠️  {card['movie_name']} [{other}] : champs localisés absents ({result.reason})")
+            metrics.inc("scrape_pages_total", kind="localized", result="failed")
+            localized[other] = dict.fromkeys(LOCALIZED_FIELDS, "N/A")
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        metrics.inc("scrape_pages_total", kind="localized", result="ok")
+        localized[other] = result["Localized"]
+    return {**detail, "Localized": localized}
+
+async def scrape_page(fetcher, cache, parser, page_num, language, extra_languages=()):
+    """Scrape une page de liste puis toutes ses pages détail en parallèle."""
+    print(f"📄 Scraping page {page_num}...")
+    try:
+        html = await fetch_page(fetcher, cache, LISTING_URL + str(page_num), LISTING_TTL)
+    except FetchError as e:
+        print(f"   ⚠️  Page {page_num} ignorée ({e.reason})")
+        metrics.inc("scrape_pages_total", kind="listing", result="failed")
+        return []
+    with metrics.timer("parse_page_seconds", FAST_BUCKETS, kind="listing"):
+        cards = parse_listing(html)
+    metrics.inc("scrape_pages_total", kind="listing", result="ok")
+    details = await asyncio.gather(*(fetch_movie(fetcher, cache, parser, card, language, extra_languages)
+                                     for card in cards), return_exceptions=True)
+
+    movies = []
+    for card, detail in zip(cards, details):
+        if isinstance(detail, FetchError):
+            print(f"   ⚠️  Film ignoré : {card['movie_name']} ({detail.reason})")
+            metrics.inc("scrape_pages_total", kind="detail", result="failed")
+            continue
+        if isinstance(detail, BaseException):
+            raise detail
+        movies.append(build_movie_data(card, detail))
+    metrics.inc("scrape_pages_total", len(movies), kind="detail", result="ok")
+    return movies
+
+async def crawl(pages, language=LANGUAGE, concurrency=CONCURRENCY, rate=RATE, cache_dir=CACHE_DIR,
+                workers=PARSE_WORKERS, extra_languages=EXTRA_LANGUAGES):
+    """Scrape `pages` et produit `(numéro de page, films)` dans l'ordre des pages.
+
+    Générateur asynchrone : chaque page est rendue dès qu'elle est complète,
+    rien n'est accumulé. Quelques pages sont traitées en avance (`PAGE_WINDOW`)
+    pour garder le pool de requêtes occupé ; le débit est borné par
+    `concurrency` et `rate`. Les pages détail sont analysées par `workers`
+    processus (cf. ParseStage). `cache_dir=None` désactive le cache disque.
+    Les `extra_languages` passent par le même pool de connexions et la même
+    limite de débit que la langue principale (cf. fetch_movie).
+    """
+    extra_languages = [other for other in dict.fromkeys(extra_languages) if other != language]
+    cache = PageCache(cache_dir) if cache_dir else None
+    try:
+        async with AsyncFetcher(concurrency=concurrency, rate=rate) as fetcher, \
+                ParseStage(workers=workers, backend=EXTRACTOR) as parser:
+            pending = deque()
+            try:
+                for page_num in pages:
+                    pending.append((page_num, asyncio.ensure_future(
+                        scrape_page(fetcher, cache, parser, page_num, language, extra_languages))))
+                    if len(pending) >= PAGE_WINDOW:
+                        page_num, task = pending.popleft()
+                        yield page_num, await task
+                while pending:
+                    page_num, task = pending.popleft()
+                    yield page_num, await task
+            finally:
+                for _, task in pending:
+                    task.cancel()
+    finally:
+        if cache:
+            cache.save()
+    stats = fetcher.stats.summary()
+    print(f"📊 HTTP : {stats['requests']} requêtes, {stats['retries']} réessais, {stats['failures']} échecs, "
+          f"latence p50={stats['latency_p50']}s p95={stats['latency_p95']}s")
+    if cache:
+        cached = cache.summary()
+        for result in ["hits", "not_modified", "downloads"]:
+            metrics.inc("page_cache_total", cached[result], result=result)
+        print(f"🗄️  Cache : {cached['hits']} servies (TTL), {cached['not_modified']} inchangées (304), "
+              f"{cached['downloads']} téléchargées")
+
+# ===============================
+# 🧩 API
+# ===============================
+def scrape(pages=PAGES, language=LANGUAGE, concurrency=CONCURRENCY, rate=RATE, workers=PARSE_WORKERS,
+           cache_dir=CACHE_DIR, sink=None, extra_languages=EXTRA_LANGUAGES):
+    """Scrape les `pages` de liste TMDb et produit les films un par un.
+
+    Le générateur est paresseux : le crawl n'avance que lorsqu'on consomme les
+    films. Si `sink` (cf. NdjsonSink) est fourni, chaque page terminée y est
+    écrite avant que ses films soient produits, et les pages déjà terminées
+    d'après son checkpoint sont sautées.
+
+        for movie in scrape(pages=range(1, 5), concurrency=4):
+            ...
+
+    Avec `extra_languages` (ex. ["en-US"]), chaque film porte aussi ses
+    colonnes Title_<langue>, Overview_<langue> et Genre_<langue>, pour la
+    langue principale et chacune des langues supplémentaires.
+    """
+    if sink is not None and sink.done_pages:
+        pages = [p for p in pages if p not in sink.done_pages]
+
+    loop = asyncio.new_event_loop()
+    pages_iter = crawl(pages, language=language, concurrency=concurrency, rate=rate,
+                       cache_dir=cache_dir, workers=workers, extra_languages=extra_languages)
+    try:
+        while True:
+            try:
+                page_num, movies = loop.run_until_complete(pages_iter.__anext__())
+            except StopAsyncIteration:
+                break
+            if sink is not None:
+                sink.write_page(page_num, movies)
+            yield from movies
+    finally:
+        loop.run_until_complete(pages_iter.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+def parse_pages(spec):
+    """'1-39' ou '1-10,15,20-25' -> liste de numéros de page."""
+    pages = []
+    for part in spec.split(','):
+        start, _, end = part.strip().partition('-')
+        pages.extend(range(int(start), int(end or start) + 1))
+    return pages
+
+def parse_languages(spec):
+    """'en-US,de-DE' -> ['en-US', 'de-DE']."""
+    return [language.strip() for language in spec.split(',') if language.strip()]
+
+def merge_shards(ndjson_files, out_file):
+    """Fusionne les NDJSON de plusieurs shards en un seul JSON (doublons Movie_name/Source retirés)."""
+    ndjson_out = out_file.with_suffix(".ndjson")
+    seen = set()
+    with open(ndjson_out, "w", encoding="utf-8") as out:
+        for path in ndjson_files:
+            for movie in iter_ndjson(path):
+                key = (movie.get("Movie_name"), movie.get("Source"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                out.write(json.dumps(movie, ensure_ascii=False) + "\n")
+    return ndjson_to_json(ndjson_out, out_file)
+
+# ===============================
+# 🚀 LIGNE DE COMMANDE
+# ===============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scraping des films TMDb.")
+    parser.add_argument("--pages", type=parse_pages, default=list(PAGES),
+                        help="pages de liste à scraper, ex. 1-39 ou 1-10,20-25 (défaut : 1-39)")
+    parser.add_argument("--language", default=LANGUAGE, help="langue des pages détail (défaut : fr-FR)")
+    parser.add_argument("--extra-languages", type=parse_languages, default=list(EXTRA_LANGUAGES),
+                        help="autres langues récupérées en parallèle, ex. en-US,de-DE : titre, résumé et genres "
+                             "par langue (colonnes Title_<langue>...), le reste n'est lu qu'une fois")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="requêtes HTTP simultanées")
+    parser.add_argument("--rate", type=float, default=RATE, help="requêtes par seconde")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS,
+                        help="processus d'analyse (défaut : un par cœur)")
+    parser.add_argument("--out", type=Path, default=OUT_FILE, help="fichier JSON de sortie")
+    parser.add_argument("--no-cache", action="store_true", help="désactive le cache disque des pages")
+    parser.add_argument("--fresh", action="store_true", help="ignore le checkpoint d'un run interrompu")
+    parser.add_argument("--merge", nargs="+", type=Path, metavar="NDJSON",
+                        help="fusionne les NDJSON de plusieurs shards dans --out, sans scraper")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args(argv)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+
+    with instrumentation.instrumented(args, "scrape"):
+        run(args)
+
+def run(args):
+    if args.merge:
+        total = merge_shards(args.merge, args.out)
+        print(f"✅ {total} films fusionnés dans : {args.out}")
+        return
+
+    print("📡 Scraping TMDb...")
+    sink = NdjsonSink(args.out.with_suffix(".ndjson"))
+    done_pages = sink.open(resume=not args.fresh)
+    if done_pages:
+        print(f"♻️  Reprise : {len(done_pages)} pages déjà terminées ({sink.count} films déjà enregistrés)")
+
+    try:
+        with metrics.stage("scrape"):
+            for _ in scrape(pages=args.pages, language=args.language, concurrency=args.concurrency,
+                            rate=args.rate, workers=args.workers,
+                            cache_dir=None if args.no_cache else CACHE_DIR, sink=sink,
+                            extra_languages=args.extra_languages):
+                pass
+    except BaseException:
+        sink.close(completed=False)
+        raise
+
+    # ===============================
+    # 💾 SAUVEGARDE FINALE
+    # ===============================
+    # ✅ Écriture JSON propre sans \/, en flux depuis le NDJSON
+    with metrics.stage("write"):
+        total = ndjson_to_json(sink.path, args.out)
+    sink.close(completed=True)
+    metrics.inc("scrape_movies_total", total)
 
-# ✅ Écriture JSON propre sans \/
-OUT_FILE.write_text(
-    json.dumps(json.loads(df.to_json(orient="records")), indent=2, ensure_ascii=False),
-    encoding="utf-8"
-)
+    print(f"✅ Total : {total} films sauvegardés dans : {args.out}")
 
-print(f"✅ Total : {len(all_movies)} films sauvegardés dans : {OUT_FILE}")
+if __name__ == "__main__":
+    main()
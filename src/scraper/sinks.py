@@ -0,0 +1,85 @@
+import json
+import os
+
+
+def iter_ndjson(path):
+    """Lit un fichier NDJSON ligne par ligne, sans le charger entièrement."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def ndjson_to_json(ndjson_path, json_path):
+    """Convertit un NDJSON en tableau JSON indenté, film par film (mémoire constante).
+
+    Le résultat est identique à `json.dumps(films, indent=2, ensure_ascii=False)`.
+    """
+    tmp = json_path.with_suffix(".tmp")
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as out:
+        for record in iter_ndjson(ndjson_path):
+            out.write("[\n  " if count == 0 else ",\n  ")
+            out.write(json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+            count += 1
+        out.write("\n]" if count else "[]")
+    os.replace(tmp, json_path)
+    return count
+
+
+# ===============================
+# 💾 SORTIE NDJSON + CHECKPOINT
+# ===============================
+class NdjsonSink:
+    """Écrit les films au fil du scraping dans un NDJSON en ajout seul.
+
+    Après chaque page terminée, le fichier est synchronisé sur disque et le
+    checkpoint enregistre les pages terminées et la taille du fichier. Un run
+    interrompu puis relancé tronque le NDJSON à cette taille (lignes d'une
+    page incomplète) et ne saute que les pages déjà terminées, quel que soit
+    l'ordre des pages demandées.
+    """
+
+    def __init__(self, path, checkpoint_path=None):
+        self.path = path
+        self.checkpoint_path = checkpoint_path or path.with_suffix(".checkpoint.json")
+        self.done_pages = set()
+        self.count = 0
+        self._file = None
+
+    def open(self, resume=True):
+        """Ouvre le fichier ; retourne les pages déjà écrites (ensemble vide si nouveau run)."""
+        checkpoint = None
+        if resume and self.checkpoint_path.exists() and self.path.exists():
+            checkpoint = json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+
+        self._file = open(self.path, "r+b" if checkpoint else "wb")
+        if checkpoint:
+            self._file.truncate(checkpoint["offset"])
+            self._file.seek(checkpoint["offset"])
+            self.done_pages = set(checkpoint["pages"])
+            self.count = checkpoint["count"]
+        else:
+            self.checkpoint_path.unlink(missing_ok=True)
+        return self.done_pages
+
+    def write_page(self, page_num, records):
+        for record in records:
+            self._file.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.count += len(records)
+        self.done_pages.add(page_num)
+
+        checkpoint = {"pages": sorted(self.done_pages), "offset": self._file.tell(), "count": self.count}
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(checkpoint), encoding="utf-8")
+        os.replace(tmp, self.checkpoint_path)
+
+    def close(self, completed=True):
+        """Ferme le fichier ; un run terminé supprime son checkpoint."""
+        if self._file:
+            self._file.close()
+            self._file = None
+        if completed:
+            self.checkpoint_path.unlink(missing_ok=True)
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Les modules du projet s'importent par dossier, comme dans les scripts (cf. sys.path.insert)
+SRC = Path(__file__).resolve().parents[1] / "src"
+for package in ["monitoring", "scraper", "cleaning", "dashboard", "benchmarks", "api"]:
+    sys.path.insert(0, str(SRC / package))
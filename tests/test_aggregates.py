@@ -0,0 +1,110 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import (PROFIT_ACCURACY, bin_values, build_cube, build_people_cube, diffusion_column, mean_by,
+                        merge_cubes, profit_bins, slice_cube, summary, top_people)
+from clean_movie import add_movie_ids, build_bridge_tables, clean_movie_data
+from synthetic import synthetic_movies
+
+
+@pytest.fixture(scope="module")
+def movies():
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = add_movie_ids(clean_movie_data(synthetic_movies(400, seed=11)))
+    return df, build_bridge_tables(df)
+
+
+def raw_rows(df, bridges, genre=None, **dimensions):
+    """Films de `df` retenus par les filtres, sans passer par le cube."""
+    rows = df.assign(Diffusion=diffusion_column(df), Release_decade=df["Release_decade"].astype(str),
+                     Source=df["Source"].astype(str), Budget_category=df["Budget_category"].astype(str))
+    if genre is not None:
+        rows = rows[rows["Movie_id"].isin(bridges["Genre"].loc[bridges["Genre"]["Genre"] == genre, "Movie_id"])]
+    for column, value in dimensions.items():
+        rows = rows[rows[column] == value]
+    return rows
+
+
+SELECTIONS = [{}, {"genre": "Drama"}, {"Release_decade": "2010s"}, {"genre": "Action", "Diffusion": "Cinéma"}]
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_cube_matches_groupby_on_raw_rows(movies, selection):
+    df, bridges = movies
+    cells = slice_cube(build_cube(df, bridges["Genre"]), **selection)
+    rows = raw_rows(df, bridges, **selection)
+    assert len(rows) > 0
+
+    metrics = summary(cells)
+    assert metrics["count"] == len(rows)
+    assert metrics["rating"] == pytest.approx(rows["Rating"].astype(float).mean())
+    assert metrics["profit"] == pytest.approx(rows["Profit"].astype(float).mean())
+    assert metrics["year_min"] == rows["Release_year"].min()
+
+    expected = rows.groupby("Release_decade")["Rating"].mean().dropna()
+    pd.testing.assert_series_equal(mean_by(cells, "Release_decade"), expected.astype(float),
+                                   check_names=False, check_index_type=False)
+    # Par genre, un film compte pour chacun de ses genres
+    by_genre = bridges["Genre"].merge(rows[["Movie_id", "Rating"]], on="Movie_id")
+    expected = by_genre.groupby(by_genre["Genre"].astype(str))["Rating"].mean().dropna()
+    pd.testing.assert_series_equal(mean_by(cells, "Genre"), expected.astype(float),
+                                   check_names=False, check_index_type=False)
+
+
+def test_people_cube_matches_groupby_on_raw_rows(movies):
+    df, bridges = movies
+    people_cells = slice_cube(build_people_cube(df, bridges), genre="Drama")
+    rows = raw_rows(df, bridges, genre="Drama").dropna(subset=["Profit"])
+    directors = bridges["Director"].merge(rows[["Movie_id", "Profit"]], on="Movie_id")
+    expected = directors.groupby(directors["Director"].astype(str))["Profit"].agg(["mean", "median", "count"])
+
+    top = top_people(people_cells, "Director", n=5).set_index("Director")
+    assert top["mean"].is_monotonic_decreasing
+    expected = expected.loc[top.index]
+    np.testing.assert_allclose(top["mean"], expected["mean"])
+    np.testing.assert_array_equal(top["count"], expected["count"])
+    np.testing.assert_allclose(top["median"], expected["median"], rtol=PROFIT_ACCURACY)
+
+
+def test_people_cube_size_does_not_follow_rows(movies):
+    df, bridges = movies
+    # Même réalisateur, mêmes dimensions : 100 fois les mêmes films ne donnent que des comptes plus grands
+    one = df.iloc[:1]
+    copies = pd.concat([one.assign(Movie_id=i) for i in range(100)], ignore_index=True)
+    cube = build_people_cube(copies, build_bridge_tables(copies))
+    assert len(cube) == len(build_people_cube(one, build_bridge_tables(one)))
+    assert all(len(bins) == 1 for bins in cube["Profit_bins"])
+    assert (cube["Profit_count"] == 100).all()
+
+
+def test_merged_sketches_equal_sketch_of_all_rows(movies):
+    df, bridges = movies
+    parts = [df.iloc[:150], df.iloc[150:]]
+    merged = merge_cubes([build_people_cube(part, build_bridge_tables(part)) for part in parts])
+    whole = build_people_cube(df, bridges)
+    keys = ["Role", "Name", "Genre_filter", "Release_decade", "Source", "Diffusion"]
+    merged, whole = (cube.sort_values(keys).reset_index(drop=True) for cube in (merged, whole))
+    pd.testing.assert_frame_equal(merged[keys], whole[keys])
+    assert [list(b) for b in merged["Profit_bins"]] == [list(b) for b in whole["Profit_bins"]]
+    assert [list(c) for c in merged["Profit_bin_counts"]] == [list(c) for c in whole["Profit_bin_counts"]]
+
+
+def test_profit_bins_keep_order_and_accuracy():
+    profits = np.array([-2e9, -5e4, -1.5, -0.3, 0.0, 0.7, 1.0, 3.0, 12_345.0, 2.7e9])
+    bins = profit_bins(profits)
+    assert (np.diff(bins) >= 0).all()
+    large = np.abs(profits) >= 1
+    np.testing.assert_allclose(bin_values(bins)[large], profits[large], rtol=PROFIT_ACCURACY)
+    assert (bin_values(bins)[~large] == 0).all()
+
+
+def test_people_cube_without_profits_is_empty(movies):
+    df, bridges = movies
+    empty = df.iloc[:20].assign(Profit=np.nan)
+    cube = build_people_cube(empty, build_bridge_tables(empty))
+    assert cube.empty and {"Profit_bins", "Profit_bin_counts"} <= set(cube.columns)
+    assert top_people(merge_cubes([cube, cube]), "Director").empty
@@ -0,0 +1,104 @@
+import asyncio
+import contextlib
+import io
+import json
+
+import pandas as pd
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+import sql_query
+from clean_movie import add_movie_ids, build_bridge_tables, clean_movie_data, main
+from server import QueryService, make_app
+from store import write_store
+from synthetic import synthetic_movies
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    """Jeu de données publié par le nettoyage (manifeste, Parquet, cubes, voisins, base SQLite)."""
+    data = tmp_path_factory.mktemp("data")
+    source = data / "raw.json"
+    source.write_text(synthetic_movies(150, seed=6).to_json(orient="records", force_ascii=False), encoding="utf-8")
+    with contextlib.redirect_stdout(io.StringIO()):
+        main(["--input", str(source), "--output", str(data / "movies_clean.csv"),
+              "--parquet", str(data / "movies_clean.parquet"), "--store", str(data / "movies.sqlite")])
+    return data
+
+
+def fetch(data_dir, *requests):
+    """(statut, en-têtes, JSON) de chaque requête (chemin, en-têtes), servies dans l'ordre par la même API."""
+    async def run():
+        responses = []
+        async with TestClient(TestServer(make_app(QueryService(data_dir)))) as client:
+            for path, headers in requests:
+                response = await client.get(path, headers=headers)
+                body = await response.read()
+                responses.append((response.status, response.headers, json.loads(body) if body else None))
+        return responses
+    return asyncio.run(run())
+
+
+def movie_ids(data_dir):
+    return pd.read_parquet(data_dir / "movies_clean.parquet", columns=["Movie_id"])["Movie_id"].tolist()
+
+
+def test_movies_page_and_etag(data_dir):
+    (status, headers, body), = fetch(data_dir, ("/movies?page_size=10&sort=rating", {}))
+    assert status == 200 and len(body["movies"]) == 10
+    ratings = [movie["Rating"] for movie in body["movies"]]
+    assert ratings == sorted(ratings, reverse=True)
+    version = json.loads((data_dir / "dataset_manifest.json").read_text())["version"]
+    assert body["version"] == headers["X-Dataset-Version"] == version
+
+    etag = headers["ETag"]
+    first, second, other = fetch(data_dir, ("/movies?page_size=10&sort=rating", {"If-None-Match": etag}),
+                                 ("/movies?page_size=10&sort=rating", {"If-None-Match": f'W/{etag}, "autre"'}),
+                                 ("/movies?page_size=5", {"If-None-Match": etag}))
+    assert first[0] == second[0] == 304 and first[2] is None
+    assert first[1]["ETag"] == etag
+    assert other[0] == 200 and other[1]["ETag"] != etag
+
+
+def test_movie_and_recommendations(data_dir):
+    movie_id = movie_ids(data_dir)[0]
+    (status, _, body), (rec_status, _, recs) = fetch(
+        data_dir, (f"/movies/{movie_id}", {}), (f"/movies/{movie_id}/recommendations?n=3", {}))
+    assert status == 200 and body["movie"]["Movie_id"] == movie_id
+    assert rec_status == 200 and recs["movie_id"] == movie_id and len(recs["recommendations"]) <= 3
+
+
+@pytest.mark.parametrize("path, status", [
+    ("/movies?page=0", 400),
+    ("/movies?page_size=1000", 400),
+    ("/movies?page=deux", 400),
+    ("/movies?sort=year", 400),
+    ("/movies?diffusion=VHS", 400),
+    ("/movies/abc", 400),
+    ("/movies/5", 404),
+    ("/movies/5/recommendations", 404),
+])
+def test_invalid_requests(data_dir, path, status):
+    (got, headers, body), = fetch(data_dir, (path, {}))
+    assert got == status
+    assert headers["Content-Type"].startswith("application/json") and body["error"]
+
+
+def test_store_updated_by_next_cleaning_answers_503(data_dir, tmp_path, monkeypatch):
+    # Catalogue servi en SQL ; la base passe à la version suivante avant que son manifeste soit publié
+    monkeypatch.setattr(sql_query, "MEMORY_MAX_ROWS", 0)
+    for path in data_dir.iterdir():
+        (tmp_path / path.name).write_bytes(path.read_bytes())
+
+    async def run():
+        async with TestClient(TestServer(make_app(QueryService(tmp_path)))) as client:
+            ok = await client.get("/movies?page_size=5")
+            with contextlib.redirect_stdout(io.StringIO()):
+                df = add_movie_ids(clean_movie_data(synthetic_movies(80, seed=7)))
+            write_store(df, build_bridge_tables(df), tmp_path / "movies.sqlite", version="suivante")
+            stale = await client.get("/movies?page_size=6")
+            return ok.status, stale.status, stale.headers, await stale.json()
+
+    ok, status, headers, body = asyncio.run(run())
+    assert ok == 200
+    assert status == 503 and int(headers["Retry-After"]) > 0 and body["error"]
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import CUBE_DIMENSIONS, PEOPLE_DIMENSIONS
+from clean_movie import main
+from synthetic import synthetic_movies
+
+CHUNKSIZE = 50
+TABLES = ["movies_clean.parquet", "movies_genres.parquet", "movies_actors.parquet", "movies_directors.parquet",
+          "movies_neighbors.parquet", "raw_manifest.parquet"]
+
+
+def raw_records(n=180, seed=5):
+    """Catalogue brut avec un doublon à cheval sur deux blocs et des types qui varient d'un bloc à l'autre."""
+    records = synthetic_movies(n, seed=seed, duplicates=0).to_dict("records")
+    # Notes entières comme dans les données TMDb, aucune manquante : Rating s'écrit "67", pas "67.0"
+    for record in records:
+        record["Rating_Numeric"] = int(record["Rating_Numeric"]) if isinstance(record["Rating_Numeric"], float) else 50
+    # Même (Movie_name, Source) que le film 3, deux blocs plus loin : le premier est gardé
+    records.insert(130, {**records[3], "Overview": "Doublon tardif", "Rating_Numeric": 12})
+    # Montant manquant dans un seul bloc : entier dans les autres, flottant dans celui-ci
+    records[70]["Budget"] = None
+    return records
+
+
+def clean(tmp_path, name, records, *options):
+    out = tmp_path / name
+    out.mkdir(exist_ok=True)
+    source = tmp_path / "raw.json"
+    source.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        main(["--input", str(source), "--output", str(out / "movies_clean.csv"),
+              "--parquet", str(out / "movies_clean.parquet"), "--no-store", *options])
+    return out, log.getvalue()
+
+
+def read_table(path) -> pd.DataFrame:
+    """Table Parquet, catégories en valeurs : le dictionnaire d'un Parquet écrit par blocs suit l'ordre d'apparition."""
+    df = pd.read_parquet(path)
+    return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+def sorted_cube(path, dimensions):
+    return read_table(path).sort_values(dimensions).reset_index(drop=True)
+
+
+@pytest.fixture
+def outputs(tmp_path):
+    records = raw_records()
+    full, _ = clean(tmp_path, "full", records)
+    chunked, _ = clean(tmp_path, "chunked", records, "--chunksize", str(CHUNKSIZE))
+    return records, full, chunked
+
+
+def test_chunked_clean_writes_same_files_as_full_clean(outputs):
+    _, full, chunked = outputs
+    assert (chunked / "movies_clean.csv").read_bytes() == (full / "movies_clean.csv").read_bytes()
+    df = pd.read_csv(full / "movies_clean.csv")
+    assert df["Rating"].dtype == np.int64
+    assert (df["Overview"] != "Doublon tardif").all()
+    for name in TABLES:
+        pd.testing.assert_frame_equal(read_table(chunked / name), read_table(full / name), obj=name)
+    # Cubes fusionnés bloc par bloc : mêmes cellules, sommes aux arrondis près
+    for name, dimensions in [("movies_cube.parquet", CUBE_DIMENSIONS), ("movies_people_cube.parquet", PEOPLE_DIMENSIONS)]:
+        pd.testing.assert_frame_equal(sorted_cube(chunked / name, dimensions), sorted_cube(full / name, dimensions),
+                                      check_exact=False, obj=name)
+    manifest = json.loads((chunked / "dataset_manifest.json").read_text())
+    assert "neighbors" in manifest["files"]
+
+
+def test_run_after_chunked_clean_is_incremental(outputs, tmp_path):
+    records, _, chunked = outputs
+    before = (chunked / "movies_clean.csv").read_bytes()
+    _, log = clean(tmp_path, "chunked", records)
+    assert "0 nouveaux, 0 modifiés, 0 supprimés" in log
+    assert (chunked / "movies_clean.csv").read_bytes() == before
@@ -0,0 +1,107 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from clean_movie import check_equivalence, clean_movie_data, clean_movie_data_rowwise
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+GENRES = ["Action", "Drama", "Comedy", "Science Fiction", "Horror", "Documentary", "Romance"]
+NAMES = ["Emma Smith", "Hugo Martin", "Jean Dubois", "Anna Rossi", "Yuki Tanaka", "Léa Müller", "Ivan Petrov"]
+
+
+def raw_movies(n, seed):
+    """`n` films bruts au format du scraper (data/raw/all_movies_datas.json), tous complets."""
+    rng = np.random.default_rng(seed)
+
+    def joined(pool, low, high):
+        return [", ".join(rng.choice(pool, rng.integers(low, high + 1), replace=False)) for _ in range(n)]
+
+    minutes = rng.integers(60, 200, n)
+    known = rng.random(n) < 0.6
+    budget = np.where(known, rng.integers(1, 300, n) * 1_000_000, 0)
+    revenue = np.where(known, (budget * rng.lognormal(0.5, 1.0, n)).astype(np.int64), 0)
+    roi = [round((r - b) / b, 2) if b else None for b, r in zip(budget, revenue)]
+    return pd.DataFrame({
+        "Movie_name": [f"Film {i}" for i in range(n)],
+        "Original_Title": [f"FILM {i}" for i in range(n)],
+        "Release_date": [f"{MONTHS[m]} {d}, {y}" for m, d, y in
+                         zip(rng.integers(0, 12, n), rng.integers(1, 29, n), rng.integers(1920, 2021, n))],
+        "Rating_Numeric": rng.integers(0, 101, n).astype(float),
+        "Genre": joined(GENRES, 1, 3),
+        "Run_time": [f"{m // 60}h {m % 60}m" if m % 60 else f"{m // 60}h" for m in minutes],
+        "Overview": [f"Résumé du film {i}." for i in range(n)],
+        "Director": rng.choice(NAMES, n),
+        "Top_Actors": joined(NAMES, 1, 4),
+        "Budget": budget,
+        "Revenue": revenue,
+        "ROI": roi,
+        "Poster_URL": [f"https://media.themoviedb.org/t/p/w220_and_h330_face/{i}.jpg" for i in range(n)],
+        "Source": "TMDb",
+    })
+
+
+def degraded_movies(n, seed, years=True):
+    """Catalogue synthétique abîmé comme les pages TMDb : manquants, "N/A", listes, montants à 0."""
+    rng = np.random.default_rng(seed)
+    df = raw_movies(n, seed).astype(object)
+
+    def pick(fraction):
+        return rng.random(n) < fraction
+
+    for column in ["Genre", "Director", "Top_Actors", "Overview", "Original_Title", "Run_time", "Poster_URL"]:
+        df.loc[pick(0.1), column] = "N/A"
+        df.loc[pick(0.05), column] = np.nan
+    df.loc[pick(0.05), "Genre"] = ""
+    df.loc[pick(0.05), "Genre"] = "Drama, N/A, Drama"
+    # Listes Python (sortie brute de certains extracteurs) et chaînes « liste »
+    for i in np.flatnonzero(pick(0.1)):
+        df.at[df.index[i], "Top_Actors"] = [" Emma Smith", "Hugo Martin "]
+    df.loc[pick(0.05), "Director"] = "['Jean Dubois', 'Anna Rossi']"
+    for column in ["Budget", "Revenue"]:
+        df.loc[pick(0.15), column] = 0
+        df.loc[pick(0.05), column] = np.nan
+        df.loc[pick(0.05), column] = "N/A"
+    df.loc[pick(0.05), "Rating_Numeric"] = np.nan
+    if not years:
+        # Toutes les années valides : Release_year reste entier dans les deux versions
+        year = pd.to_numeric(df["Release_date"].astype(str).str.extract(r"(\d{4})", expand=False), errors="coerce")
+        df.loc[~year.between(1888, 2020), "Release_date"] = "Jan 1, 2000"
+    else:
+        # Années hors de 1888-2030 ou dans le futur : la ligne est écartée
+        df.loc[pick(0.03), "Release_date"] = "Jan 1, 1850"
+        df.loc[pick(0.03), "Release_date"] = "Dec 31, 2029"
+        df.loc[pick(0.03), "Release_date"] = "N/A"
+        df.loc[pick(0.02), "Release_date"] = np.nan
+    return df
+
+
+def both(df):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return clean_movie_data(df.copy()), clean_movie_data_rowwise(df.copy())
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_vectorised_matches_rowwise(seed):
+    result, expected = both(degraded_movies(400, seed, years=False))
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_vectorised_matches_rowwise_with_bad_years(seed):
+    # Une année manquante rend Release_year flottant : la décennie reste "2020s" des deux côtés
+    result, expected = both(degraded_movies(400, seed))
+    assert result["Release_decade"].str.fullmatch(r"\d{4}s").all()
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_check_equivalence_reports_a_difference(monkeypatch):
+    df = degraded_movies(100, seed=3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert check_equivalence(df)
+        rowwise = clean_movie_data_rowwise
+        monkeypatch.setattr("clean_movie.clean_movie_data_rowwise",
+                            lambda df: rowwise(df).assign(Release_decade=lambda d: d["Release_decade"] + "!"))
+        assert not check_equivalence(df)
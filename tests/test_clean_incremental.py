@@ -0,0 +1,88 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from clean_movie import clean_incremental, write_raw_manifest
+from synthetic import synthetic_movies
+
+
+def catalogue():
+    """Catalogue du premier run, sans doublons : chaque enregistrement brut donne au plus une ligne."""
+    return synthetic_movies(300, seed=7, duplicates=0)
+
+
+class Runs:
+    """Nettoyages successifs dans un même dossier, comme les runs hebdomadaires (CSV + manifeste brut)."""
+
+    def __init__(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.csv = tmp_path / "movies_clean.csv"
+        self.manifest = tmp_path / "raw_manifest.parquet"
+
+    def clean(self, raw, full=False):
+        """CSV écrit par le run et sa sortie console."""
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            df_clean, manifest = clean_incremental(raw, self.csv, self.manifest, full=full)
+        df_clean.to_csv(self.csv, index=False, encoding="utf-8-sig")
+        write_raw_manifest(manifest, raw.columns, self.csv, self.manifest)
+        return self.csv.read_bytes(), log.getvalue()
+
+    def expected(self, raw):
+        """CSV d'un nettoyage complet de `raw`, dans un autre dossier."""
+        reference = Runs(self.tmp_path / "reference")
+        reference.tmp_path.mkdir(exist_ok=True)
+        return reference.clean(raw, full=True)[0]
+
+
+@pytest.fixture
+def runs(tmp_path):
+    runs = Runs(tmp_path)
+    runs.clean(catalogue())
+    return runs
+
+
+def test_new_record_is_the_only_one_cleaned(runs):
+    raw = catalogue()
+    new = synthetic_movies(301, seed=8, duplicates=0).iloc[[300]].assign(Movie_name="Un film tout neuf")
+    raw = pd.concat([raw.iloc[:120], new, raw.iloc[120:]], ignore_index=True)
+    csv, log = runs.clean(raw)
+    assert "1 nouveaux, 0 modifiés, 0 supprimés" in log
+    assert csv == runs.expected(raw)
+
+
+def test_changed_record_is_recleaned(runs):
+    raw = catalogue()
+    raw.loc[42, "Rating_Numeric"] = 12
+    raw.loc[43, "Release_date"] = "N/A"        # écarté par le nettoyage : sa ligne disparaît
+    csv, log = runs.clean(raw)
+    assert ", 2 modifiés, 0 supprimés" in log
+    assert csv == runs.expected(raw)
+
+
+def test_deleted_record_is_dropped(runs):
+    raw = catalogue().drop(index=[5, 200]).reset_index(drop=True)
+    csv, log = runs.clean(raw)
+    assert "0 nouveaux, 0 modifiés, 2 supprimés" in log
+    assert csv == runs.expected(raw)
+
+
+def test_reordered_records_follow_the_raw_order(runs):
+    raw = catalogue()
+    raw = raw.iloc[list(range(150, 300)) + list(range(150))].reset_index(drop=True)
+    csv, log = runs.clean(raw)
+    assert "0 nouveaux, 0 modifiés, 0 supprimés" in log
+    assert csv == runs.expected(raw)
+
+
+def test_full_ignores_previous_run(runs):
+    raw = catalogue()
+    raw.loc[10, "Overview"] = "Résumé réécrit"
+    csv, log = runs.clean(raw, full=True)
+    assert "nettoyage complet" in log
+    assert csv == runs.expected(raw)
+    # Le manifeste écrit par --full sert au run suivant
+    _, log = runs.clean(raw)
+    assert "0 nouveaux, 0 modifiés, 0 supprimés" in log
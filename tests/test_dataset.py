@@ -0,0 +1,58 @@
+import contextlib
+import io
+
+import pytest
+
+from clean_movie import BRIDGE_FILES, add_movie_ids, clean_movie_data, write_bridge_tables, write_parquet
+from manifest import StaleFileError, manifest_file, staged_outputs, write_manifest
+from query import Dataset
+from synthetic import synthetic_movies
+
+
+def clean(n, seed):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return add_movie_ids(clean_movie_data(synthetic_movies(n, seed=seed)))
+
+
+def publish(df, tmp_path):
+    """Écrit le Parquet et les tables de liaison de `df` comme le nettoyage, puis le manifeste."""
+    paths = {"parquet": tmp_path / "movies_clean.parquet",
+             **{name: tmp_path / file.name for name, file in BRIDGE_FILES.items()}}
+    with staged_outputs(paths) as staged:
+        write_parquet(df, staged["parquet"])
+        write_bridge_tables(df, staged)
+    return write_manifest(paths, len(df), tmp_path / "dataset_manifest.json")
+
+
+def open_version(manifest, tmp_path):
+    return Dataset(manifest["version"], lambda role: manifest_file(manifest, role, tmp_path), manifest["files"])
+
+
+def test_staged_outputs_keep_previous_files_on_error(tmp_path):
+    path = tmp_path / "movies_clean.parquet"
+    path.write_text("v1")
+    with pytest.raises(RuntimeError):
+        with staged_outputs({"parquet": path}) as staged:
+            staged["parquet"].write_text("v2 incomplet")
+            raise RuntimeError("nettoyage interrompu")
+    assert path.read_text() == "v1"
+    assert list(tmp_path.iterdir()) == [path]
+
+    with staged_outputs({"parquet": path}) as staged:
+        staged["parquet"].write_text("v2")
+    assert path.read_text() == "v2"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_dataset_refuses_files_rewritten_by_next_version(tmp_path):
+    first = publish(clean(200, seed=3), tmp_path)
+    warmed = open_version(first, tmp_path).warm()
+    lazy = open_version(first, tmp_path)
+
+    second = publish(clean(150, seed=4), tmp_path)
+    assert second["version"] != first["version"]
+    # Version déjà chargée : inchangée ; chargement tardif : erreur plutôt qu'un mélange des deux
+    assert len(warmed.df) == first["rows"]
+    with pytest.raises(StaleFileError):
+        lazy.df
+    assert len(open_version(second, tmp_path).warm().df) == second["rows"]
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from derived import DerivedCache, estimate_size
+
+BLOCK = 1000    # octets d'un résultat (tableau de 1000 uint8)
+
+
+def block(value=0):
+    return lambda: np.full(BLOCK, value, dtype=np.uint8)
+
+
+def test_hits_misses_and_frozen_results():
+    cache = DerivedCache(max_bytes=10 * BLOCK)
+    first = cache.get("v1", "mask", ("Drama",), block(1))
+    again = cache.get("v1", "mask", ("Drama",), block(2))
+    assert again is first and again[0] == 1
+    assert cache.peek("v1", "mask", ("Comedy",)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5 and stats["bytes"] == estimate_size(first)
+    # Résultat partagé entre sessions : en lecture seule
+    with pytest.raises(ValueError):
+        first[0] = 5
+
+
+def test_least_recently_used_is_evicted_under_max_bytes():
+    cache = DerivedCache(max_bytes=3 * BLOCK + 500)
+    for name in "abc":
+        cache.get("v1", "mask", name, block())
+    cache.get("v1", "mask", "a", block())          # « a » relu : « b » devient le plus ancien
+    cache.get("v1", "mask", "d", block())
+    assert cache.peek("v1", "mask", "b") is None
+    assert all(cache.peek("v1", "mask", name) is not None for name in "acd")
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 3
+    assert stats["bytes"] <= cache.max_bytes
+
+
+def test_result_larger_than_cache_is_returned_but_not_kept():
+    cache = DerivedCache(max_bytes=BLOCK // 2)
+    assert len(cache.get("v1", "mask", "big", block())) == BLOCK
+    assert cache.stats()["entries"] == 0 and cache.stats()["evictions"] == 0
+
+
+def test_drop_version_forgets_only_that_version():
+    cache = DerivedCache(max_bytes=10 * BLOCK)
+    cache.get("v1", "mask", "a", block())
+    cache.get("v2", "mask", "a", block())
+    cache.drop_version("v1")
+    assert cache.peek("v1", "mask", "a") is None
+    assert cache.peek("v2", "mask", "a") is not None
+    assert cache.stats()["bytes"] == estimate_size(np.zeros(BLOCK, dtype=np.uint8))
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+
+from extractors import EXTRACTORS, check_parity, parse_detail, parse_localized, saved_pages
+
+# Pages détail TMDb réduites aux balises lues par les extracteurs (même film
+# en plusieurs langues, film sans budget, film à venir presque vide)
+PAGES = Path(__file__).resolve().parent / "fixtures" / "pages" / "detail"
+
+
+def page(name):
+    return (PAGES / name).read_text(encoding="utf-8")
+
+
+def test_backends_agree_on_recorded_pages():
+    count, mismatches, _ = check_parity(saved_pages(PAGES))
+    assert count == len(list(PAGES.glob("*.html"))) > 0
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("backend", list(EXTRACTORS))
+def test_detail_fields(backend):
+    movie = parse_detail(page("avatar-fire-and-ash.fr-FR.html"), backend)
+    assert movie == {
+        "Original_Title": "Avatar: Fire and Ash",
+        "Rating_Numeric": 73.0,
+        "Genre": "Adventure, Fantasy",
+        "Run_time": "3h 18m",
+        "Overview": ("Après la mort de Neteyam, Jake et Neytiri affrontent leur chagrin tout en faisant face au "
+                     "Peuple des Cendres, une tribu Na’vi redoutable menée par le fougueux Varang, alors que le "
+                     "conflit sur Pandora s’intensifie et qu’une nouvelle quête morale s’amorce."),
+        "Director": "James Cameron",
+        "Top_Actors": "Sam Worthington, Zoe Saldaña, Sigourney Weaver, Stephen Lang, Oona Chaplin",
+        "Budget": 35000000000,
+        "Revenue": 148219537700,
+    }
+
+
+@pytest.mark.parametrize("backend", list(EXTRACTORS))
+def test_missing_fields(backend):
+    movie = parse_detail(page("sparse-upcoming.fr-FR.html"), backend)
+    assert movie["Original_Title"] == "L'ultima estate"
+    assert [movie[field] for field in ["Rating_Numeric", "Genre", "Run_time", "Director", "Top_Actors"]] == ["N/A"] * 5
+    assert movie["Budget"] == movie["Revenue"] == 0
+    no_budget = parse_detail(page("your-heart-will-be-broken.fr-FR.html"), backend)
+    assert no_budget["Original_Title"] is None
+    assert no_budget["Budget"] == no_budget["Revenue"] == 0
+    # Acteur sans photo (pas d'attribut alt) ignoré, espaces retirés
+    assert no_budget["Top_Actors"] == "Daniel Vegas, Veronika Zhuravleva, Ivan Trushin, Maksim Saprykin"
+
+
+def test_localized_fields_follow_page_language():
+    localized = {lang: parse_localized(page(f"avatar-fire-and-ash.{lang}.html")) for lang in ["fr-FR", "en-US", "de-DE"]}
+    assert {lang: fields["Title"] for lang, fields in localized.items()} == {
+        "fr-FR": "Avatar : De feu et de cendres", "en-US": "Avatar: Fire and Ash", "de-DE": "Avatar: Fire and Ash"}
+    # Genres tels qu'affichés, sans normalisation
+    assert localized["fr-FR"]["Genre"] == "Science-Fiction, Aventure, Fantastique"
+    assert localized["en-US"]["Genre"] == "Science Fiction, Adventure, Fantasy"
+    assert localized["de-DE"]["Genre"] == "Science Fiction, Abenteuer, Fantasy"
+    assert localized["en-US"]["Overview"].startswith("In the wake of")
+    assert localized["de-DE"]["Overview"].startswith("Nach dem Tod von Neteyam")
+    assert parse_localized(page("sparse-upcoming.fr-FR.html"))["Genre"] == "N/A"
+
+
+@pytest.mark.parametrize("backend", list(EXTRACTORS))
+def test_parse_detail_localized_matches_separate_calls(backend):
+    for file in sorted(PAGES.glob("*.html")):
+        html = file.read_text(encoding="utf-8")
+        assert parse_detail(html, backend, localized=True) == {
+            **parse_detail(html, backend), "Localized": parse_localized(html)}
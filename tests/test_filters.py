@@ -0,0 +1,78 @@
+import contextlib
+import io
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import DIFFUSION_CINEMA, DIFFUSION_STREAMING, diffusion_column
+from clean_movie import add_movie_ids, build_bridge_tables, clean_movie_data
+from filters import FilterIndex
+from synthetic import synthetic_movies
+
+
+def movies(genres, decades, budgets):
+    df = pd.DataFrame({
+        "Movie_id": np.arange(100, 100 + len(genres)),
+        "Genre": genres,
+        "Release_decade": decades,
+        "Source": "TMDb",
+        "Budget": budgets,
+        "Revenue": np.nan,
+    })
+    bridge = df[["Movie_id", "Genre"]].assign(Genre=df["Genre"].str.split(", ")).explode("Genre")
+    return df, bridge.reset_index(drop=True)
+
+
+def test_genre_is_matched_exactly():
+    df, genres = movies(["Drama", "Docudrama", "Comedy, Drama", "Comedy", "Docudrama, Drama"],
+                        ["1990s", "2000s", "1990s", "2000s", "1990s"],
+                        [1e6, np.nan, np.nan, 5e6, np.nan])
+    index = FilterIndex(df, genres)
+    # Un filtre par sous-chaîne (str.contains("Drama")) garderait aussi « Docudrama »
+    assert index.mask(Genre="Drama").tolist() == [True, False, True, False, True]
+    assert index.mask(Genre="Docudrama").tolist() == [False, True, False, False, True]
+    assert index.mask(Genre="Drama", Release_decade="1990s", Diffusion=DIFFUSION_STREAMING).tolist() == \
+        [False, False, True, False, True]
+    assert index.values("Genre", within=index.mask(Release_decade="2000s")) == ["Comedy", "Docudrama"]
+
+
+def test_unknown_value_and_within():
+    df, genres = movies(["Drama", "Comedy"], ["1990s", "2000s"], [1e6, np.nan])
+    index = FilterIndex(df, genres)
+    assert not index.mask(Genre="Western").any()
+    assert index.mask().all() and index.mask(Genre=None).all()
+    assert index.mask(within=np.array([False, True]), Release_decade="1990s").tolist() == [False, False]
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = add_movie_ids(clean_movie_data(synthetic_movies(500, seed=9)))
+    return df, build_bridge_tables(df)["Genre"]
+
+
+def pandas_mask(df, genres, Genre=None, Release_decade=None, Diffusion=None):
+    """Même sélection sans index : colonnes comparées ligne à ligne, genre via la table de liaison."""
+    mask = pd.Series(True, index=df.index)
+    if Genre is not None:
+        mask &= df["Movie_id"].isin(genres.loc[genres["Genre"] == Genre, "Movie_id"])
+    if Release_decade is not None:
+        mask &= df["Release_decade"] == Release_decade
+    if Diffusion is not None:
+        mask &= diffusion_column(df) == Diffusion
+    return mask.to_numpy()
+
+
+def test_bitmaps_match_pandas_masks(catalogue):
+    df, genres = catalogue
+    index = FilterIndex(df, genres)
+    selections = itertools.product(
+        [None, *genres["Genre"].astype(str).unique()[:4]],
+        [None, *df["Release_decade"].astype(str).unique()[:3]],
+        [None, DIFFUSION_CINEMA, DIFFUSION_STREAMING])
+    for genre, decade, diffusion in selections:
+        selected = {"Genre": genre, "Release_decade": decade, "Diffusion": diffusion}
+        np.testing.assert_array_equal(index.mask(**selected), pandas_mask(df, genres, **selected), err_msg=str(selected))
+    assert index.values("Release_decade") == sorted(df["Release_decade"].astype(str).unique())
@@ -0,0 +1,85 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from clean_movie import add_movie_ids, build_bridge_tables, clean_movie_data
+from query import Dataset
+from recommender import SimilarityIndex, build_features, write_neighbors
+from synthetic import synthetic_movies
+
+
+def test_published_neighbors_match_computed_index(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = add_movie_ids(clean_movie_data(synthetic_movies(300, seed=2)))
+    bridges = build_bridge_tables(df)
+    path = tmp_path / "movies_neighbors.parquet"
+    write_neighbors(df, bridges, path)
+
+    computed = SimilarityIndex(df, bridges)
+    loaded = SimilarityIndex(df, neighbors=pd.read_parquet(path))
+    np.testing.assert_array_equal(loaded.neighbors, computed.neighbors)
+    np.testing.assert_array_equal(loaded.scores, computed.scores)
+    for movie_id in df["Movie_id"].iloc[:20]:
+        for by_rating in [False, True]:
+            for got, expected in zip(loaded.recommend(movie_id, 5, by_rating), computed.recommend(movie_id, 5, by_rating)):
+                np.testing.assert_array_equal(got, expected)
+
+
+def test_neighbors_of_missing_movies_are_never_recommended(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = add_movie_ids(clean_movie_data(synthetic_movies(100, seed=3)))
+    table = SimilarityIndex(df, build_bridge_tables(df)).table(df)
+    # Version sans les 10 premiers films : leurs lignes et leurs apparitions comme voisins sont ignorées
+    kept = df.iloc[10:].reset_index(drop=True)
+    index = SimilarityIndex(kept, neighbors=table)
+    removed = set(df["Movie_id"].iloc[:10])
+    for movie_id in kept["Movie_id"]:
+        positions, _ = index.recommend(movie_id, 20)
+        assert not removed & set(kept["Movie_id"].to_numpy()[positions])
+    assert index.recommend(df["Movie_id"].iloc[0])[0].size == 0
+
+
+def test_dataset_reads_published_neighbors(tmp_path, monkeypatch):
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = add_movie_ids(clean_movie_data(synthetic_movies(100, seed=4)))
+    paths = {"parquet": tmp_path / "movies_clean.parquet", "neighbors": tmp_path / "movies_neighbors.parquet"}
+    df.to_parquet(paths["parquet"])
+    write_neighbors(df, build_bridge_tables(df), paths["neighbors"])
+    monkeypatch.setattr(SimilarityIndex, "_top_k", None)   # aucun calcul au chargement
+    dataset = Dataset("test", paths.get)
+    assert dataset.similarity_index.neighbors.shape == (len(df), 20)
+
+
+def brute_force_scores(features, k):
+    """Similarités des k plus proches de chaque film, tous les couples comparés."""
+    sims = (features @ features.T).toarray()
+    np.fill_diagonal(sims, -np.inf)
+    return -np.sort(-sims, axis=1)[:, :k]
+
+
+def test_candidate_search_matches_all_pairs():
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = add_movie_ids(clean_movie_data(synthetic_movies(400, seed=6)))
+    features = build_features(df, build_bridge_tables(df))
+    neighbors, scores = SimilarityIndex._top_k(features, 20)
+    expected = brute_force_scores(features, 20)
+    # Toutes les valeurs servent (MAX_POSTING >= catalogue) : mêmes voisins qu'une comparaison exhaustive
+    np.testing.assert_allclose(scores, np.maximum(expected, 0), rtol=1e-5, atol=1e-6)
+    direct = np.asarray(features[np.repeat(np.arange(len(df)), 20)].multiply(features[neighbors.ravel()]).sum(axis=1))
+    np.testing.assert_allclose(scores.ravel()[scores.ravel() > 0], direct.ravel()[scores.ravel() > 0], rtol=1e-5)
+
+    # Valeurs fréquentes écartées du choix des candidats : voisins approchés, jamais mieux notés qu'en exact
+    _, approx = SimilarityIndex._top_k(features, 20, max_posting=20)
+    assert (approx <= scores + 1e-6).all()
+    assert (approx[:, 0] > 0).mean() > 0.9
+
+
+def test_unknown_runtime_is_not_a_shared_feature():
+    movies = pd.DataFrame({"Movie_id": [1, 2, 3], "Overview": ["N/A"] * 3, "Runtime_minutes": [np.nan, np.nan, 95.0]})
+    empty = {name: pd.DataFrame({"Movie_id": pd.Series([], dtype="int64"), name: pd.Series([], dtype=object)})
+             for name in ["Genre", "Actor", "Director"]}
+    features = build_features(movies, empty)
+    assert features.nnz == 1
+    assert (SimilarityIndex._top_k(features, 2)[1] == 0).all()
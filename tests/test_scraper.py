@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+import socket
+import time
+from pathlib import Path
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import scrape_movie
+from extractors import LOCALIZED_FIELDS
+from scrape_movie import crawl, scrape
+from sinks import NdjsonSink
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "pages"
+RAW_FILE = Path(__file__).resolve().parents[1] / "data" / "raw" / "all_movies_datas.json"
+
+
+class RecordedTmdb:
+    """Serveur TMDb local servant les pages enregistrées de tests/fixtures/pages.
+
+    `/movie?page=N` -> listing/page-N.html, `/movie/<slug>?language=xx-XX` ->
+    detail/<slug>.xx-XX.html (404 sinon). Chaque page porte un ETag et un
+    If-None-Match identique reçoit un 304. `failures[chemin]` liste les
+    réponses (statut, Retry-After) renvoyées avant la page, pour simuler
+    429 / 503. Le serveur note chaque requête et le nombre maximal de
+    requêtes en cours simultanément.
+    """
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.failures = {}
+        self.requests = []      # (chemin, statut, instant)
+        self.active = 0
+        self.max_active = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/movie", self.listing)
+        app.router.add_get("/movie/{slug}", self.detail)
+        return app
+
+    async def listing(self, request):
+        return await self.respond(request, FIXTURES / "listing" / f"page-{request.query['page']}.html")
+
+    async def detail(self, request):
+        name = f"{request.match_info['slug']}.{request.query.get('language', 'fr-FR')}.html"
+        return await self.respond(request, FIXTURES / "detail" / name)
+
+    async def respond(self, request, path):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            response = self.page(request, path)
+        finally:
+            self.active -= 1
+        self.requests.append((request.path_qs, response.status, time.monotonic()))
+        return response
+
+    def page(self, request, path):
+        pending = self.failures.get(request.path_qs)
+        if pending:
+            status, retry_after = pending.pop(0)
+            return web.Response(status=status, headers={"Retry-After": retry_after} if retry_after else None)
+        if not path.exists():
+            return web.Response(status=404)
+        body = path.read_bytes()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, content_type="text/html", charset="utf-8", headers={"ETag": etag})
+
+    def statuses(self, path=None):
+        return [status for qs, status, _ in self.requests if path is None or qs == path]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_crawl(server, monkeypatch, pages=(1, 2), port=None, **kwargs):
+    """Films produits par crawl() sur `server`, par nom (analyse dans la boucle, sans limite de débit).
+
+    Le cache indexe les pages par URL : pour le réutiliser, garder le même `port`.
+    """
+    kwargs = {"concurrency": 4, "rate": 0, "cache_dir": None, "workers": 0, **kwargs}
+
+    async def main():
+        async with TestServer(server.app(), port=port) as http:
+            base = str(http.make_url("")).rstrip("/")
+            monkeypatch.setattr(scrape_movie, "TMDB_URL", base)
+            monkeypatch.setattr(scrape_movie, "LISTING_URL", base + "/movie?page=")
+            return [(page, movies) async for page, movies in crawl(list(pages), **kwargs)]
+
+    results = asyncio.run(main())
+    assert [page for page, _ in results] == list(pages)
+    return {movie["Movie_name"]: movie for _, movies in results for movie in movies}
+
+
+def detail_path(slug, language="fr-FR"):
+    return f"/movie/{slug}?language={language}"
+
+
+def test_crawl_matches_recorded_records(monkeypatch):
+    movies = run_crawl(RecordedTmdb(), monkeypatch)
+    assert sorted(movies) == ["Avatar: Fire and Ash", "Le Dernier Été", "Your Heart Will Be Broken"]
+    # Mêmes valeurs que les enregistrements bruts dont les pages sont tirées
+    raw = {movie["Movie_name"]: movie for movie in json.loads(RAW_FILE.read_text(encoding="utf-8"))}
+    for name in ["Avatar: Fire and Ash", "Your Heart Will Be Broken"]:
+        expected = {key: value for key, value in raw[name].items() if key != "Overview"}
+        assert {key: movies[name][key] for key in expected} == expected
+    assert movies["Le Dernier Été"]["Original_Title"] == "L'ultima estate"
+    assert movies["Le Dernier Été"]["Rating_Numeric"] == "N/A"
+
+
+def test_crawl_respects_concurrency(monkeypatch):
+    server = RecordedTmdb(delay=0.05)
+    movies = run_crawl(server, monkeypatch, concurrency=2, extra_languages=["en-US"])
+    assert len(movies) == 3
+    assert len(server.requests) == 2 + 3 * 2
+    assert server.max_active == 2
+
+
+def test_crawl_adds_localized_columns_per_language(monkeypatch):
+    movies = run_crawl(RecordedTmdb(), monkeypatch, extra_languages=["en-US", "de-DE"])
+    columns = {f"{field}_{language}" for field in LOCALIZED_FIELDS for language in ["fr-FR", "en-US", "de-DE"]}
+    for movie in movies.values():
+        assert columns <= movie.keys()
+    # Langue principale : Title_fr-FR reprend le titre affiché, comme Movie_name
+    avatar = movies["Avatar: Fire and Ash"]
+    assert avatar["Title_fr-FR"] == "Avatar : De feu et de cendres"
+    assert avatar["Genre_fr-FR"] == "Science-Fiction, Aventure, Fantastique"
+    assert avatar["Genre_en-US"] == "Science Fiction, Adventure, Fantasy"
+    assert avatar["Genre_de-DE"] == "Science Fiction, Abenteuer, Fantasy"
+    assert avatar["Overview_en-US"].startswith("In the wake of the devastating war")
+    assert avatar["Overview_de-DE"].startswith("Nach dem Tod von Neteyam")
+    # Page absente dans une langue (404) : ses champs restent à "N/A", le film est gardé
+    for name in ["Your Heart Will Be Broken", "Le Dernier Été"]:
+        assert movies[name]["Title_fr-FR"] == name
+        for field in LOCALIZED_FIELDS:
+            assert movies[name][f"{field}_en-US"] == movies[name][f"{field}_de-DE"] == "N/A"
+    # Sans langue supplémentaire : aucune colonne localisée
+    movies = run_crawl(RecordedTmdb(), monkeypatch)
+    assert not any(key.startswith(("Title_", "Overview_", "Genre_")) for key in movies["Avatar: Fire and Ash"])
+
+
+def test_crawl_retries_transient_statuses(monkeypatch):
+    server = RecordedTmdb()
+    avatar = detail_path("avatar-fire-and-ash")
+    heart = detail_path("your-heart-will-be-broken")
+    server.failures[avatar] = [(429, "0"), (503, "0")]
+    server.failures[heart] = [(503, "0")] * 10
+    movies = run_crawl(server, monkeypatch)
+    assert server.statuses(avatar) == [429, 503, 200]
+    assert movies["Avatar: Fire and Ash"]["Budget"] == 35000000000
+    # Au plus max_retries réessais (4) : le film est ignoré, le reste du crawl continue
+    assert server.statuses(heart) == [503] * 5
+    assert sorted(movies) == ["Avatar: Fire and Ash", "Le Dernier Été"]
+
+
+def test_crawl_waits_for_retry_after(monkeypatch):
+    server = RecordedTmdb()
+    listing = "/movie?page=2"
+    server.failures[listing] = [(429, "1")]
+    run_crawl(server, monkeypatch, pages=[2])
+    first, second = [at for qs, _, at in server.requests if qs == listing]
+    assert second - first >= 0.9
+
+
+def test_cached_crawl_revalidates_with_304(monkeypatch, tmp_path):
+    port = free_port()
+    first = run_crawl(RecordedTmdb(), monkeypatch, cache_dir=tmp_path, port=port)
+    # Pages détail dans leur TTL : seules les listes sont revalidées
+    server = RecordedTmdb()
+    assert run_crawl(server, monkeypatch, cache_dir=tmp_path, port=port) == first
+    assert sorted(qs for qs, _, _ in server.requests) == ["/movie?page=1", "/movie?page=2"]
+    assert server.statuses() == [304, 304]
+    # TTL expiré : chaque page est revalidée, aucune n'est retéléchargée
+    monkeypatch.setattr(scrape_movie, "DETAIL_TTL", 0)
+    server = RecordedTmdb()
+    assert run_crawl(server, monkeypatch, cache_dir=tmp_path, port=port) == first
+    assert server.statuses() == [304] * 5
+
+
+def test_resume_skips_only_completed_pages(monkeypatch, tmp_path):
+    crawled = []
+
+    async def fake_crawl(pages, **kwargs):
+        for page in pages:
+            crawled.append(page)
+            yield page, [{"Movie_name": f"film {page}", "Source": "TMDb"}]
+
+    monkeypatch.setattr(scrape_movie, "crawl", fake_crawl)
+    sink = NdjsonSink(tmp_path / "movies.ndjson")
+    sink.open()
+    # Run interrompu après les pages 5 et 2 (ordre quelconque)
+    for movie in scrape(pages=[5, 2, 3], sink=sink):
+        if movie["Movie_name"] == "film 2":
+            break
+    sink.close(completed=False)
+
+    sink = NdjsonSink(tmp_path / "movies.ndjson")
+    assert sink.open() == {2, 5}
+    crawled.clear()
+    names = [movie["Movie_name"] for movie in scrape(pages=[5, 2, 3, 1], sink=sink)]
+    assert crawled == [3, 1]
+    assert names == ["film 3", "film 1"]
+    sink.close()
+    assert [line["Movie_name"] for line in map(json.loads, sink.path.read_text().splitlines())] == [
+        "film 5", "film 2", "film 3", "film 1"]
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from search import MAX_EXPANSIONS, SearchIndex
+
+
+def catalogue():
+    return pd.DataFrame({
+        "Movie_name": ["Amélie", "Le Fabuleux Destin", "Inception", "Incendies", "Cœur de pirate", "Interstellar"],
+        "Original_Title": ["AMÉLIE", "N/A", "Inception", "Incendies", "Cœur de pirate", "Interstellar"],
+        "Director": ["Jean-Pierre Jeunet", "Jean-Pierre Jeunet", "Christopher Nolan", "Denis Villeneuve",
+                     "Hélène Lefèvre", "Christopher Nolan"],
+        "Top_Actors": ["Audrey Tautou", "Audrey Tautou, Mathieu Kassovitz", "Leonardo DiCaprio", "Lubna Azabal",
+                       None, "Matthew McConaughey"],
+        "Overview": ["Une serveuse à Montmartre.", "La vie d'Amélie Poulain.", "Un voleur de rêves.",
+                     "Des jumeaux au Liban.", "Un cœur brisé.", "Un voyage interstellaire."],
+    })
+
+
+def names(index, df, query):
+    return df["Movie_name"].iloc[index.search(query)].tolist()
+
+
+def test_accents_and_case_are_folded():
+    df = catalogue()
+    index = SearchIndex(df)
+    assert names(index, df, "amelie")[0] == "Amélie"
+    assert names(index, df, "AMÉLIE") == names(index, df, "amelie")
+    # Ligature et accents : « coeur » trouve « Cœur », « lefevre » trouve « Lefèvre »
+    assert names(index, df, "coeur") == ["Cœur de pirate"]
+    assert names(index, df, "helene lefevre") == ["Cœur de pirate"]
+
+
+def test_every_term_is_a_prefix_and_all_are_required():
+    df = catalogue()
+    index = SearchIndex(df)
+    assert set(names(index, df, "inc")) == {"Inception", "Incendies"}
+    assert set(names(index, df, "nol")) == {"Inception", "Interstellar"}
+    assert names(index, df, "nolan inte") == ["Interstellar"]
+    assert names(index, df, "nolan incendies") == []
+    assert names(index, df, "") == [] and names(index, df, "zzz") == []
+
+
+def test_exact_word_ranks_before_completion_and_title_before_overview():
+    df = catalogue()
+    index = SearchIndex(df)
+    # « interstellar » : mot exact du titre ; « interstellaire » : complétion, dans le résumé
+    assert names(index, df, "interstellar") == ["Interstellar"]
+    assert names(index, df, "interstel") == ["Interstellar"]
+    # « Amélie » dans le titre d'un film, dans le résumé de l'autre
+    assert names(index, df, "amelie") == ["Amélie", "Le Fabuleux Destin"]
+
+
+def test_short_prefix_keeps_most_frequent_completions():
+    words = [f"mot{i:03d}" for i in range(MAX_EXPANSIONS + 10)]
+    df = pd.DataFrame({"Movie_name": words + ["mot000 bis"]})
+    index = SearchIndex(df)
+    found = index.search("mot")
+    assert len(found) == MAX_EXPANSIONS + 1
+    # mot000 (deux films) fait partie des complétions gardées
+    assert {0, len(words)} <= set(found.tolist())
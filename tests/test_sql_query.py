@@ -0,0 +1,118 @@
+import contextlib
+import io
+import json
+
+import numpy as np
+import pytest
+
+from clean_movie import (BRIDGE_FILES, add_movie_ids, build_bridge_tables, clean_movie_data, main, write_bridge_tables,
+                         write_parquet)
+from manifest import StaleFileError, describe_files, dataset_version
+from sql_query import SqlDataset, SqlMovieQuery, ensure_store
+from store import connect, store_version, write_store
+from synthetic import synthetic_movies
+
+
+def clean(n, seed):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return add_movie_ids(clean_movie_data(synthetic_movies(n, seed=seed)))
+
+
+@pytest.fixture(scope="module")
+def movies(tmp_path_factory):
+    df = clean(200, seed=1)
+    path = tmp_path_factory.mktemp("store") / "movies.sqlite"
+    write_store(df, build_bridge_tables(df), path, version="test")
+    return df, SqlMovieQuery(SqlDataset("test", lambda role: path))
+
+
+def test_movies_keeps_order_of_large_ids(movies):
+    df, query = movies
+    # Identifiants de 63 bits croissants, très écartés : pandas en faisait un
+    # intervalle dont la borne (2 * max - min) déborde
+    ids = np.sort(df["Movie_id"].to_numpy())
+    pair = np.array([ids[len(ids) // 4], ids[-1]])
+    for ids in [pair, pair[::-1]]:
+        rows = query.movies(ids, ["Movie_id", "Movie_name"])
+        assert rows["Movie_id"].tolist() == ids.tolist()
+        assert rows["Movie_name"].tolist() == df.set_index("Movie_id").loc[ids, "Movie_name"].tolist()
+
+
+def test_movies_unknown_id_gives_empty_row(movies):
+    df, query = movies
+    rows = query.movies([int(df["Movie_id"].iloc[0]), 5], ["Movie_name"])
+    assert rows["Movie_name"].iloc[0] == df["Movie_name"].iloc[0]
+    assert rows["Movie_name"].isna().iloc[1]
+
+
+def test_top_rated_skips_ids_missing_from_version(movies):
+    df, query = movies
+    known = df["Movie_id"].to_numpy()[:3]
+    top = query.top_rated(np.array([known[0], 5, known[1], known[2]]), 10)
+    assert sorted(top.tolist()) == sorted(known.tolist())
+    ratings = df.set_index("Movie_id").loc[top, "Rating"].to_numpy()
+    assert (np.diff(ratings) <= 0).all()
+
+
+def publish(df, tmp_path):
+    """Parquet et tables de liaison de `df`, et le manifeste (sans l'écrire) qui les décrit avec la base."""
+    paths = {"parquet": tmp_path / "movies_clean.parquet", "store": tmp_path / "movies.sqlite",
+             **{name: tmp_path / file.name for name, file in BRIDGE_FILES.items()}}
+    write_parquet(df, paths["parquet"])
+    write_bridge_tables(df, paths)
+    files = describe_files(paths, tmp_path / "dataset_manifest.json")
+    return paths, {"version": dataset_version(files), "rows": len(df), "files": files}
+
+
+def test_ensure_store_builds_missing_base_from_parquet(movies, tmp_path):
+    df, query = movies
+    paths, manifest = publish(df, tmp_path)
+    ensure_store(paths.get, manifest)
+    rebuilt = SqlMovieQuery(SqlDataset(manifest["version"], paths.get))
+    ids = df["Movie_id"].to_numpy()[:5]
+    assert rebuilt.movies(ids, ["Movie_name"]).equals(query.movies(ids, ["Movie_name"]))
+
+
+def test_store_of_another_version_is_refused(tmp_path):
+    first, second = clean(120, seed=2), clean(90, seed=3)
+    path = tmp_path / "movies.sqlite"
+    write_store(first, build_bridge_tables(first), path, version="v1")
+    dataset = SqlDataset("v1", lambda role: path)
+    assert dataset.is_current() and len(dataset.query("SELECT Movie_id FROM movies")) == len(first)
+
+    # Nettoyage suivant : la base est mise à jour sur place, la version v1 ne la lit plus
+    write_store(second, build_bridge_tables(second), path, version="v2")
+    assert not dataset.is_current()
+    with pytest.raises(StaleFileError):
+        dataset.query("SELECT Movie_id FROM movies")
+    with pytest.raises(StaleFileError):
+        SqlMovieQuery(dataset).movies(second["Movie_id"].to_numpy()[:2], ["Movie_name"])
+    assert len(SqlDataset("v2", lambda role: path).query("SELECT Movie_id FROM movies")) == len(second)
+
+
+def test_ensure_store_aligns_base_on_manifest_version(tmp_path):
+    first, second = clean(120, seed=2), clean(90, seed=3)
+    paths, manifest = publish(second, tmp_path)
+    write_store(first, build_bridge_tables(first), paths["store"], version="ancienne")
+    ensure_store(paths.get, manifest)
+    dataset = SqlDataset(manifest["version"], paths.get)
+    assert sorted(dataset.query("SELECT Movie_id FROM movies")["Movie_id"]) == sorted(second["Movie_id"])
+
+    # Base d'une autre version, Parquet déjà réécrits par une version plus récente : rien n'est aligné
+    publish(first, tmp_path)
+    with pytest.raises(StaleFileError):
+        ensure_store(paths.get, {**manifest, "version": "autre"})
+    with contextlib.closing(connect(paths["store"], readonly=True)) as conn:
+        assert store_version(conn) == manifest["version"]
+
+
+@pytest.mark.parametrize("options", [[], ["--chunksize", "40"]])
+def test_cleaning_writes_manifest_version_into_store(tmp_path, options):
+    source = tmp_path / "raw.json"
+    source.write_text(synthetic_movies(100, seed=4).to_json(orient="records", force_ascii=False), encoding="utf-8")
+    store = tmp_path / "movies.sqlite"
+    with contextlib.redirect_stdout(io.StringIO()):
+        main(["--input", str(source), "--output", str(tmp_path / "movies_clean.csv"),
+              "--parquet", str(tmp_path / "movies_clean.parquet"), "--store", str(store), *options])
+    manifest = json.loads((tmp_path / "dataset_manifest.json").read_text(encoding="utf-8"))
+    assert SqlDataset(manifest["version"], lambda role: store).is_current()